@@ -7,6 +7,7 @@ class AIVisionPro {
         this.detectionChart = null;
         this.frameCount = 0;
         this.lastFrameTime = Date.now();
+        this.liveDetections = new Map();
         
         this.initializeElements();
         this.setupEventListeners();
@@ -73,9 +74,32 @@ class AIVisionPro {
             this.handleVideoFrame(data);
         });
 
+        this.socket.on('statistics', (stats) => {
+            this.updateStatistics(stats);
+        });
+
         this.socket.on('connect', () => {
             console.log('Connected to server');
             this.updateStatus('Connected', 'success');
+            
+            // Watch a specific camera with ?stream=<name>, otherwise the server default
+            const params = new URLSearchParams(window.location.search);
+            const stream = params.get('stream');
+            if (stream) {
+                this.socket.emit('join_stream', { stream });
+            }
+            
+            // Optional ?max_width=<px> and ?format=webp to save bandwidth
+            if (params.has('max_width') || params.has('format')) {
+                this.socket.emit('viewer_settings', {
+                    max_width: parseInt(params.get('max_width'), 10) || null,
+                    format: params.get('format')
+                });
+            }
+        });
+
+        this.socket.on('stream_error', (data) => {
+            this.showNotification(data.error, 'error');
         });
 
         this.socket.on('disconnect', () => {
@@ -179,7 +203,7 @@ class AIVisionPro {
                 
                 if (data.status === 'cleared') {
                     this.elements.totalObjects.textContent = '0';
-                    this.elements.recentDetections.innerHTML = '<p class="text-gray-500">No recent detections</p>';
+                    this.updateRecentDetections([]);
                     this.updateChart([]);
                     this.showNotification('Data cleared successfully!', 'success');
                 }
@@ -237,7 +261,11 @@ class AIVisionPro {
 
     handleVideoFrame(data) {
         // Update video feed
-        this.elements.videoFeed.src = `data:image/jpeg;base64,${data.frame}`;
+        const mime = data.format === 'webp' ? 'image/webp' : 'image/jpeg';
+        this.elements.videoFeed.src = `data:${mime};base64,${data.frame}`;
+        
+        // Acknowledge delivery so the server can adapt quality to this link
+        this.socket.emit('frame_ack', { stream: data.stream, frame_count: data.frame_count });
         
         // Update FPS counter
         this.frameCount++;
@@ -248,19 +276,32 @@ class AIVisionPro {
             this.lastFrameTime = now;
         }
         
-        // Update detections
-        if (data.detections && data.detections.length > 0) {
-            this.updateRecentDetections(data.detections);
+        // Update detections only when the visible set changed
+        if (this.applyDetectionChanges(data)) {
+            this.updateRecentDetections(Array.from(this.liveDetections.values()));
         }
-        
-        // Update statistics
-        if (data.stats) {
-            this.updateStatistics(data.stats);
+    }
+
+    applyDetectionChanges(data) {
+        // Snapshots replace the state; deltas patch it by track id
+        if (data.detections) {
+            this.liveDetections = new Map(data.detections.map(d => [d.id, d]));
+            return true;
         }
+        
+        const delta = data.delta || {};
+        (delta.removed || []).forEach(id => this.liveDetections.delete(id));
+        (delta.added || []).forEach(d => this.liveDetections.set(d.id, d));
+        (delta.updated || []).forEach(d => this.liveDetections.set(d.id, d));
+        return Boolean(delta.added || delta.updated || delta.removed);
     }
 
     updateRecentDetections(detections) {
         const container = this.elements.recentDetections;
+        if (detections.length === 0) {
+            container.innerHTML = '<p class="text-gray-500">No recent detections</p>';
+            return;
+        }
         container.innerHTML = '';
         
         detections.slice(-5).reverse().forEach(detection => {
@@ -288,9 +329,15 @@ class AIVisionPro {
         const labels = Object.keys(classStats);
         const data = Object.values(classStats).map(stat => stat.count);
         
-        this.detectionChart.data.labels = labels;
-        this.detectionChart.data.datasets[0].data = data;
-        this.detectionChart.update();
+        const chartData = this.detectionChart.data;
+        if (JSON.stringify(chartData.labels) === JSON.stringify(labels) &&
+            JSON.stringify(chartData.datasets[0].data) === JSON.stringify(data)) {
+            return;
+        }
+        
+        chartData.labels = labels;
+        chartData.datasets[0].data = data;
+        this.detectionChart.update('none');
     }
 
     updateControlStates() {
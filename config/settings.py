@@ -19,6 +19,14 @@ HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", 3000))
 SECRET_KEY = os.getenv("SECRET_KEY", "ai_vision_pro_2024")
 
+# "development" runs the Werkzeug dev server; "production" runs Gunicorn with
+# one threaded worker (see docs/USAGE.md for the load profile)
+SERVER_MODE = os.getenv("SERVER_MODE", "development")
+SERVER_THREADS = int(os.getenv("SERVER_THREADS", 64))  # concurrent viewers + requests
+SERVER_TIMEOUT = int(os.getenv("SERVER_TIMEOUT", 120))
+SERVER_KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", 5))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", 256))
+
 # Detection settings
 YOLO_MODEL_PATH = os.getenv("YOLO_MODEL_PATH", "yolo11n.pt")
 CONFIDENCE_THRESHOLD = float(os.getenv("CONFIDENCE_THRESHOLD", 0.5))
@@ -29,13 +37,84 @@ CAMERA_WIDTH = int(os.getenv("CAMERA_WIDTH", 640))
 CAMERA_HEIGHT = int(os.getenv("CAMERA_HEIGHT", 480))
 CAMERA_FPS = int(os.getenv("CAMERA_FPS", 30))
 
+# Stream settings
+# Comma-separated name=source pairs: device indices, RTSP URLs or video files
+# (files are looped), e.g. "webcam=0,door=rtsp://10.0.0.5/live,demo=demo.mp4"
+STREAM_SOURCES = os.getenv("STREAM_SOURCES", "webcam=0")
+MAX_STREAMS = int(os.getenv("MAX_STREAMS", 16))
+# Capture each stream in its own process, sharing frames through shared memory
+# instead of a thread competing with inference for the GIL
+CAPTURE_PROCESSES = os.getenv("CAPTURE_PROCESSES", "False").lower() == "true"
+
+# Regions of interest as JSON: stream name -> list of polygons, each a list of
+# [x, y] points in fractions of the frame, e.g.
+# '{"door": [[[0.1, 0.3], [0.6, 0.3], [0.6, 1.0], [0.1, 1.0]]]}'.
+# Inference is cropped to the polygons and detections outside them dropped.
+STREAM_ROIS = os.getenv("STREAM_ROIS", "")
+
+# What to do with streams nobody is watching: "full" keeps processing them at
+# the normal rate, "detect" keeps detection and storage running every
+# IDLE_DETECTION_INTERVAL seconds without encoding, "pause" stops capture and
+# inference until a viewer joins
+IDLE_MODE = os.getenv("IDLE_MODE", "detect")
+IDLE_DETECTION_INTERVAL = float(os.getenv("IDLE_DETECTION_INTERVAL", 2.0))
+
 # Performance settings
 FRAME_SKIP_RATE = int(os.getenv("FRAME_SKIP_RATE", 4))
 MAX_DETECTION_HISTORY = int(os.getenv("MAX_DETECTION_HISTORY", 50))
+STATS_INTERVAL = float(os.getenv("STATS_INTERVAL", 2.0))  # seconds between statistics pushes
 JPEG_QUALITY = int(os.getenv("JPEG_QUALITY", 80))
 
+# Adaptive streaming: (quality, max width) tiers from best to cheapest. Each
+# viewer is moved between tiers based on how fast it acknowledges frames.
+STREAM_QUALITY_TIERS = [
+    (JPEG_QUALITY, None),
+    (60, 640),
+    (45, 480),
+    (30, 320),
+]
+STREAM_WEBP_ENABLED = os.getenv("STREAM_WEBP_ENABLED", "False").lower() == "true"
+STREAM_MAX_IN_FLIGHT = int(os.getenv("STREAM_MAX_IN_FLIGHT", 3))
+
+# Inference batching: concurrent detection calls are coalesced into one model
+# call, waiting at most these budgets (ms) for more requests to arrive
+INFERENCE_MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", 16))
+INFERENCE_LIVE_WAIT_MS = float(os.getenv("INFERENCE_LIVE_WAIT_MS", 5))
+INFERENCE_BULK_WAIT_MS = float(os.getenv("INFERENCE_BULK_WAIT_MS", 50))
+
+# Live detection storage: "rows" stores every box of every processed frame,
+# "events" stores one row per tracked object appearance with first/last seen
+# times, peak confidence and a sampled box trajectory
+DETECTION_STORAGE = os.getenv("DETECTION_STORAGE", "rows")
+EVENT_MAX_MISSING_FRAMES = int(os.getenv("EVENT_MAX_MISSING_FRAMES", 8))
+EVENT_TRAJECTORY_INTERVAL = float(os.getenv("EVENT_TRAJECTORY_INTERVAL", 1.0))  # seconds
+
+# Clip recording: comma-separated trigger classes, each optionally limited to
+# local hours, e.g. "knife,person@20-6". Empty disables recording. Recorded
+# streams are sampled at the normal rate even without viewers.
+RECORD_TRIGGERS = os.getenv("RECORD_TRIGGERS", "")
+RECORD_DIR = os.getenv("RECORD_DIR", "clips")
+RECORD_PRE_SECONDS = float(os.getenv("RECORD_PRE_SECONDS", 5.0))
+RECORD_POST_SECONDS = float(os.getenv("RECORD_POST_SECONDS", 5.0))
+RECORD_MAX_SECONDS = float(os.getenv("RECORD_MAX_SECONDS", 300.0))
+
 # Database settings
 DATABASE_PATH = os.getenv("DATABASE_PATH", "ai_vision_detections.db")
+DB_READER_POOL_SIZE = int(os.getenv("DB_READER_POOL_SIZE", 4))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", 5000))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", 1000))
+
+# Retention: raw rows older than RETENTION_RAW_DAYS are folded into hourly
+# aggregates (0 keeps raw rows forever); aggregates are kept for
+# RETENTION_AGGREGATE_DAYS (0 keeps them forever)
+RETENTION_RAW_DAYS = int(os.getenv("RETENTION_RAW_DAYS", 0))
+RETENTION_AGGREGATE_DAYS = int(os.getenv("RETENTION_AGGREGATE_DAYS", 0))
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", 500))
+RETENTION_INTERVAL = int(os.getenv("RETENTION_INTERVAL", 3600))  # seconds between runs
+
+# Uploaded JPEGs are decoded at 1/2, 1/4 or 1/8 scale when the long side
+# stays at least this large (the model's input size); 0 always decodes fully
+DECODE_TARGET_SIZE = int(os.getenv("DECODE_TARGET_SIZE", 640))
 
 # File upload settings
 UPLOAD_FOLDER = BASE_DIR / "uploads"
@@ -9,15 +9,17 @@ import os
 # Add src directory to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from web_app import app, socketio
+from web_app import app, socketio, get_detector
+from server import run_server
+from config import settings
 
 def main():
     """Main entry point for the application"""
     print("YODAVI - Smart Object Detection Platform")
     print("=========================================")
-    print("🚀 Starting server on http://localhost:3000")
+    print(f"🚀 Starting {settings.SERVER_MODE} server on http://localhost:{settings.PORT}")
     print("📊 Professional web interface ready")
-    socketio.run(app, debug=False, host='0.0.0.0', port=3000, allow_unsafe_werkzeug=True)
+    run_server(app, socketio, get_detector)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -53,6 +53,10 @@ setup(
             "torch>=1.9.0",
             "torchvision>=0.10.0",
         ],
+        "server": [
+            "gunicorn>=21.2.0",
+            "simple-websocket>=1.0.0",
+        ],
     },
     entry_points={
         "console_scripts": [
@@ -0,0 +1,62 @@
+"""
+Two-tier model cascade: escalate only uncertain or watched detections
+"""
+
+import numpy as np
+
+
+def escalation_masks(detections, thresholds, margin, watch_ids):
+    """(uncertain, watched) boolean masks over a frame's detections.
+
+    A box is uncertain when its confidence is within margin of its class
+    threshold on either side, so a small error could flip it. A box is
+    watched when its class is one that always gets a second opinion.
+    """
+    class_thresholds = thresholds[detections.class_ids]
+    uncertain = np.abs(detections.confidences - class_thresholds) <= margin
+    watched = np.isin(detections.class_ids, list(watch_ids))
+    return uncertain, watched
+
+
+def crop_window(box, width, height, padding=0.5, min_size=128):
+    """Integer window around a box with context, at least min_size pixels per side"""
+    x1, y1, x2, y2 = box
+    box_width, box_height = x2 - x1, y2 - y1
+    half_width = max(box_width * (1 + padding), min_size) / 2
+    half_height = max(box_height * (1 + padding), min_size) / 2
+    cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+    return (max(0, int(cx - half_width)), max(0, int(cy - half_height)),
+            min(width, int(np.ceil(cx + half_width))), min(height, int(np.ceil(cy + half_height))))
+
+
+class CascadeStats:
+    """Counters for how often the cascade escalates and why"""
+
+    def __init__(self):
+        self.frames = 0
+        self.escalated_frames = 0
+        self.escalated_boxes = 0
+        self.uncertain_boxes = 0
+        self.watched_boxes = 0
+        self.crops = 0
+
+    def record(self, uncertain, watched, crops=0):
+        self.frames += 1
+        escalate = uncertain | watched
+        if escalate.any():
+            self.escalated_frames += 1
+        self.escalated_boxes += int(escalate.sum())
+        self.uncertain_boxes += int(uncertain.sum())
+        self.watched_boxes += int(watched.sum())
+        self.crops += crops
+
+    def describe(self):
+        return {
+            'frames': self.frames,
+            'escalated_frames': self.escalated_frames,
+            'escalation_rate': round(self.escalated_frames / self.frames, 4) if self.frames else 0.0,
+            'escalated_boxes': self.escalated_boxes,
+            'uncertain_boxes': self.uncertain_boxes,
+            'watched_boxes': self.watched_boxes,
+            'crops': self.crops
+        }
@@ -0,0 +1,170 @@
+"""
+Checkpoints for long video runs: resume position, stored rows and output segments
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+
+import cv2
+
+
+def init_checkpoint_table(conn):
+    """Create the table holding one checkpoint per (video, output) pair"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS video_checkpoints (
+            video_path TEXT,
+            output_path TEXT,
+            fingerprint TEXT,
+            position INTEGER,
+            start_row_id INTEGER,
+            last_row_id INTEGER,
+            start_raw_id INTEGER,
+            last_raw_id INTEGER,
+            segments TEXT,
+            updated_at DATETIME,
+            PRIMARY KEY (video_path, output_path)
+        )
+    ''')
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(video_checkpoints)')}
+    for column in ('start_raw_id', 'last_raw_id'):
+        if column not in columns:
+            conn.execute(f'ALTER TABLE video_checkpoints ADD COLUMN {column} INTEGER DEFAULT 0')
+
+
+def segment_path(output_path, index):
+    """output.mp4 -> output.part0003.mp4, next to the final output"""
+    base, extension = os.path.splitext(output_path)
+    return f"{base}.part{index:04d}{extension}"
+
+
+def concat_segments(segments, output_path, fourcc='mp4v'):
+    """Join finished segments into output_path.
+
+    With ffmpeg on the PATH the segments are joined as a stream copy, which
+    costs about as much as copying the files. Otherwise they are decoded
+    and re-encoded with OpenCV.
+    """
+    if shutil.which('ffmpeg'):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as listing:
+            for segment in segments:
+                escaped = os.path.abspath(segment).replace("'", "'\\''")
+                listing.write(f"file '{escaped}'\n")
+        try:
+            subprocess.run(['ffmpeg', '-v', 'error', '-y', '-f', 'concat', '-safe', '0',
+                            '-i', listing.name, '-c', 'copy', output_path], check=True)
+            return
+        except subprocess.CalledProcessError:
+            pass
+        finally:
+            os.unlink(listing.name)
+
+    out = None
+    for segment in segments:
+        cap = cv2.VideoCapture(segment)
+        if out is None:
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            out.write(frame)
+        cap.release()
+    if out is not None:
+        out.release()
+
+
+class VideoCheckpoint:
+    """Resume state of one video run, stored next to its detections.
+
+    A checkpoint records how many frames are fully done, the highest
+    detections and raw_predictions row ids at that point and the output
+    segments already finalized. Rows stored after the last checkpoint
+    belong to frames that will be processed again, so resume() deletes
+    them first; a checkpoint left by other settings has all rows of its
+    run deleted. Rows of earlier, completed runs of the same video are
+    never touched.
+    """
+
+    def __init__(self, conn, video_path, output_path, fingerprint):
+        self.conn = conn
+        self.video_path = video_path
+        self.output_path = output_path or ''
+        self.fingerprint = fingerprint
+        self.position = 0
+        self.segments = []
+        init_checkpoint_table(conn)
+        conn.commit()
+        self.start_row_id = self._max_row_id()
+        self.start_raw_id = self._max_row_id('raw_predictions')
+
+    def _max_row_id(self, table='detections'):
+        return self.conn.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}').fetchone()[0]
+
+    def resume(self):
+        """Load a matching checkpoint and discard rows stored after it; returns the position"""
+        row = self.conn.execute('''
+            SELECT fingerprint, position, start_row_id, last_row_id, start_raw_id, last_raw_id,
+                   segments
+            FROM video_checkpoints
+            WHERE video_path = ? AND output_path = ?
+        ''', (self.video_path, self.output_path)).fetchone()
+        if row is None:
+            return 0
+        fingerprint, position, start_row_id, last_row_id, start_raw_id, last_raw_id, segments = row
+        segments = json.loads(segments)
+        if fingerprint != self.fingerprint or not all(os.path.exists(s) for s in segments):
+            # Different video or settings, or lost segments: drop that run and start over
+            self._discard(start_row_id, start_raw_id)
+            self.clear()
+            return 0
+
+        self._discard(last_row_id, last_raw_id)
+        self.conn.commit()
+        self.position = position
+        self.start_row_id = start_row_id
+        self.start_raw_id = start_raw_id
+        self.segments = segments
+        return position
+
+    def _discard(self, after_row_id, after_raw_id):
+        """Delete this video's detections and raw frames stored after the given ids"""
+        self.conn.execute('DELETE FROM detections WHERE image_path = ? AND id > ?',
+                          (self.video_path, after_row_id))
+        self.conn.execute('DELETE FROM raw_predictions WHERE source = ? AND id > ?',
+                          (self.video_path, after_raw_id))
+
+    def save(self, position, segment=None):
+        """Record position as done, with segment as the latest finalized output part"""
+        if segment:
+            self.segments.append(segment)
+        self.position = position
+        self.conn.execute('''
+            INSERT OR REPLACE INTO video_checkpoints
+                (video_path, output_path, fingerprint, position, start_row_id, last_row_id,
+                 start_raw_id, last_raw_id, segments, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (self.video_path, self.output_path, self.fingerprint, position, self.start_row_id,
+              self._max_row_id(), self.start_raw_id, self._max_row_id('raw_predictions'),
+              json.dumps(self.segments), datetime.now(timezone.utc).isoformat()))
+        self.conn.commit()
+
+    def finish(self):
+        """Join the segments into the final output and drop the checkpoint"""
+        if self.output_path and self.segments:
+            concat_segments(self.segments, self.output_path)
+            for segment in self.segments:
+                os.remove(segment)
+        self.clear()
+
+    def clear(self):
+        self.conn.execute('DELETE FROM video_checkpoints WHERE video_path = ? AND output_path = ?',
+                          (self.video_path, self.output_path))
+        self.conn.commit()
+        self.position = 0
+        self.segments = []
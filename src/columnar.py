@@ -0,0 +1,161 @@
+"""
+Append-only columnar detection log with a memory-mapped NumPy reader
+"""
+
+import json
+import os
+
+import numpy as np
+
+SCHEMA_FILE = 'schema.json'
+SCHEMA_VERSION = 1
+
+# Fixed-width little-endian columns: name -> (dtype, values per row)
+COLUMNS = {
+    'frame': ('<i8', 1),
+    'timestamp': ('<f8', 1),
+    'class_id': ('<i2', 1),
+    'confidence': ('<f4', 1),
+    'box': ('<f4', 4),
+}
+
+
+def _row_bytes(dtype, width):
+    return np.dtype(dtype).itemsize * width
+
+
+class ColumnarWriter:
+    """Buffer detections in memory and append them to one file per column.
+
+    Rows are written in chunks of chunk_rows so the cost per detection is a
+    NumPy copy, not a database statement. A crash mid-chunk leaves columns
+    of different lengths; the reader ignores rows past the shortest column,
+    and a writer reopening the log truncates every file back to that row
+    before appending so the columns stay aligned.
+    """
+
+    def __init__(self, path, class_names=None, chunk_rows=65536):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        os.makedirs(path, exist_ok=True)
+
+        schema_path = os.path.join(path, SCHEMA_FILE)
+        if not os.path.exists(schema_path):
+            schema = {
+                'version': SCHEMA_VERSION,
+                'columns': {name: list(spec) for name, spec in COLUMNS.items()},
+                'class_names': {str(k): v for k, v in (class_names or {}).items()}
+            }
+            with open(schema_path, 'w') as f:
+                json.dump(schema, f, indent=2)
+
+        self._align()
+        self.files = {name: open(os.path.join(path, f'{name}.bin'), 'ab') for name in COLUMNS}
+        self.pending = {name: [] for name in COLUMNS}
+        self.pending_rows = 0
+        self.rows_written = 0
+
+    def _align(self):
+        """Truncate every column file to the number of complete rows they all hold"""
+        sizes = {}
+        for name in COLUMNS:
+            file_path = os.path.join(self.path, f'{name}.bin')
+            sizes[name] = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        rows = min(size // _row_bytes(*COLUMNS[name]) for name, size in sizes.items())
+        for name, size in sizes.items():
+            length = rows * _row_bytes(*COLUMNS[name])
+            if size > length:
+                os.truncate(os.path.join(self.path, f'{name}.bin'), length)
+
+    def append(self, frame_index, timestamp, class_ids, confidences, boxes):
+        """Buffer the detections of one frame; flushes once a chunk is full"""
+        count = len(class_ids)
+        if count == 0:
+            return
+        self.pending['frame'].append(np.full(count, frame_index, dtype=COLUMNS['frame'][0]))
+        self.pending['timestamp'].append(np.full(count, timestamp, dtype=COLUMNS['timestamp'][0]))
+        self.pending['class_id'].append(np.asarray(class_ids, dtype=COLUMNS['class_id'][0]))
+        self.pending['confidence'].append(np.asarray(confidences, dtype=COLUMNS['confidence'][0]))
+        self.pending['box'].append(np.asarray(boxes, dtype=COLUMNS['box'][0]).reshape(count, 4))
+        self.pending_rows += count
+        if self.pending_rows >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.pending_rows:
+            return
+        for name, chunks in self.pending.items():
+            self.files[name].write(np.concatenate(chunks).tobytes())
+            self.files[name].flush()
+            chunks.clear()
+        self.rows_written += self.pending_rows
+        self.pending_rows = 0
+
+    def close(self):
+        self.flush()
+        for f in self.files.values():
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ColumnarReader:
+    """Read-only view of a columnar log as NumPy arrays.
+
+    Each column is memory-mapped, so opening a log is cheap regardless of
+    its size and only the pages a computation touches are read from disk.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, SCHEMA_FILE)) as f:
+            schema = json.load(f)
+        self.class_names = {int(k): v for k, v in schema['class_names'].items()}
+        columns = schema['columns']
+
+        sizes = {}
+        for name, (dtype, width) in columns.items():
+            file_path = os.path.join(path, f'{name}.bin')
+            sizes[name] = os.path.getsize(file_path) // _row_bytes(dtype, width) if os.path.exists(file_path) else 0
+        self.rows = min(sizes.values()) if sizes else 0
+
+        self.columns = {}
+        for name, (dtype, width) in columns.items():
+            shape = (self.rows, width) if width > 1 else (self.rows,)
+            if self.rows == 0:
+                self.columns[name] = np.empty(shape, dtype=dtype)
+            else:
+                self.columns[name] = np.memmap(os.path.join(path, f'{name}.bin'), dtype=dtype,
+                                               mode='r', shape=shape)
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def class_counts(self):
+        """Number of detections per class name"""
+        if not self.rows:
+            return {}
+        counts = np.bincount(self.columns['class_id'])
+        return {self.class_names.get(class_id, str(class_id)): int(count)
+                for class_id, count in enumerate(counts) if count}
+
+    def mask(self, class_name=None, start=None, end=None, min_confidence=None):
+        """Boolean row mask for a class, a [start, end) epoch range and a confidence floor"""
+        mask = np.ones(self.rows, dtype=bool)
+        if class_name is not None:
+            ids = [k for k, v in self.class_names.items() if v == class_name]
+            mask &= np.isin(self.columns['class_id'], ids)
+        if start is not None:
+            mask &= self.columns['timestamp'] >= start
+        if end is not None:
+            mask &= self.columns['timestamp'] < end
+        if min_confidence is not None:
+            mask &= self.columns['confidence'] >= min_confidence
+        return mask
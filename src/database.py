@@ -0,0 +1,242 @@
+"""
+SQLite helpers: connection pooling, history queries, event and raw prediction storage
+"""
+
+import base64
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+class ConnectionPool:
+    """One dedicated writer plus a pool of read-only connections in WAL mode.
+
+    In WAL mode readers see the last committed snapshot and never wait for
+    the writer, so dashboard queries do not block detection inserts. Writes
+    are serialized through a lock around the single writer connection, which
+    avoids "database is locked" errors between writers in the same process.
+    auto_vacuum is applied before anything else touches the file, the only
+    point at which a new database accepts it without a full VACUUM.
+    """
+
+    def __init__(self, path, readers=4, busy_timeout_ms=5000, cache_size_kb=8192,
+                 mmap_size=128 * 1024 * 1024, auto_vacuum='INCREMENTAL'):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+
+        self.writer = self._connect()
+        if auto_vacuum:
+            self.writer.execute(f'PRAGMA auto_vacuum={auto_vacuum}')
+        self.writer.execute('PRAGMA journal_mode=WAL')
+        self.write_lock = threading.RLock()
+
+        self.readers = queue.LifoQueue()
+        for _ in range(readers):
+            self.readers.put(self._connect(readonly=True))
+
+    def _connect(self, readonly=False):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000,
+                               check_same_thread=False)
+        conn.execute(f'PRAGMA busy_timeout={self.busy_timeout_ms}')
+        # NORMAL is durable across application crashes in WAL mode
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{self.cache_size_kb}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute(f'PRAGMA mmap_size={self.mmap_size}')
+        if readonly:
+            conn.execute('PRAGMA query_only=ON')
+        return conn
+
+    @contextmanager
+    def write(self):
+        """Exclusive use of the writer; commits on success, rolls back on error"""
+        with self.write_lock:
+            try:
+                yield self.writer
+                self.writer.commit()
+            except Exception:
+                self.writer.rollback()
+                raise
+
+    @contextmanager
+    def read(self):
+        """Borrow a read-only connection for the duration of the block"""
+        conn = self.readers.get()
+        try:
+            yield conn
+        finally:
+            # End any implicit read transaction so the WAL can be checkpointed
+            if conn.in_transaction:
+                conn.rollback()
+            self.readers.put(conn)
+
+    def close(self):
+        with self.write_lock:
+            self.writer.close()
+        while True:
+            try:
+                self.readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def normalize_timestamp(value):
+    """Convert an ISO-8601 string to SQLite's CURRENT_TIMESTAMP format"""
+    parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def encode_cursor(timestamp, row_id):
+    """Opaque keyset cursor for the (timestamp, id) position of a row"""
+    return base64.urlsafe_b64encode(f"{timestamp}|{row_id}".encode()).decode()
+
+
+def decode_cursor(token):
+    timestamp, _, row_id = base64.urlsafe_b64decode(token.encode()).decode().rpartition('|')
+    if not timestamp:
+        raise ValueError('Malformed cursor')
+    return timestamp, int(row_id)
+
+
+def fetch_history_page(conn, start=None, end=None, class_name=None, source=None,
+                       cursor=None, limit=100, descending=True):
+    """Fetch one page of detections ordered by (timestamp, id).
+
+    Pages continue from the cursor with a row-value comparison instead of
+    OFFSET, so every page is an index range scan no matter how deep it is.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    clauses, params = [], []
+    if start:
+        clauses.append('timestamp >= ?')
+        params.append(start)
+    if end:
+        clauses.append('timestamp < ?')
+        params.append(end)
+    if class_name:
+        clauses.append('class_name = ?')
+        params.append(class_name)
+    if source:
+        clauses.append('source = ?')
+        params.append(source)
+    if cursor:
+        clauses.append('(timestamp, id) < (?, ?)' if descending else '(timestamp, id) > (?, ?)')
+        params.extend(decode_cursor(cursor))
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    direction = 'DESC' if descending else 'ASC'
+    rows = conn.execute(f'''
+        SELECT id, timestamp, class_name, confidence, source
+        FROM detections
+        {where}
+        ORDER BY timestamp {direction}, id {direction}
+        LIMIT ?
+    ''', params + [limit + 1]).fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+
+    items = [{
+        'id': row[0],
+        'timestamp': row[1],
+        'class': row[2],
+        'confidence': row[3],
+        'source': row[4]
+    } for row in rows]
+    return items, next_cursor
+
+
+def init_event_table(conn):
+    """Create the table holding one row per tracked object appearance"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS detection_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT,
+            class_name TEXT,
+            first_seen DATETIME,
+            last_seen DATETIME,
+            peak_confidence REAL,
+            frame_count INTEGER,
+            trajectory TEXT
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_events_last_seen ON detection_events(last_seen, id)')
+
+
+def _utc(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def insert_events(conn, events, source):
+    """Insert finished EventAggregator events"""
+    conn.executemany('''
+        INSERT INTO detection_events
+            (source, class_name, first_seen, last_seen, peak_confidence, frame_count, trajectory)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [(source, event['class'], _utc(event['first_seen']), _utc(event['last_seen']),
+           event['peak_confidence'], event['frames'], json.dumps(event['trajectory']))
+          for event in events])
+
+
+def init_raw_table(conn):
+    """Create the table of unfiltered model outputs, one row per frame.
+
+    detections gains a raw_id column linking each row to the frame it was
+    selected from, so re-scoring replaces exactly those rows.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS raw_predictions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT,
+            frame_index INTEGER,
+            timestamp DATETIME,
+            class_ids BLOB,
+            confidences BLOB,
+            boxes BLOB
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_raw_source ON raw_predictions(source, frame_index)')
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(detections)')}
+    if 'raw_id' not in columns:
+        conn.execute('ALTER TABLE detections ADD COLUMN raw_id INTEGER')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_detections_raw ON detections(raw_id)')
+
+
+def insert_raw_predictions(conn, detections, source):
+    """Store a frame's Detections as packed little-endian arrays; returns the row id"""
+    cursor = conn.execute('''
+        INSERT INTO raw_predictions (source, frame_index, timestamp, class_ids, confidences, boxes)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (source, detections.frame_index, _utc(detections.timestamp),
+          detections.class_ids.astype('<i2').tobytes(),
+          detections.confidences.astype('<f4').tobytes(),
+          detections.boxes.astype('<f4').tobytes()))
+    return cursor.lastrowid
+
+
+def iter_raw_predictions(conn, batch_size=1000):
+    """Yield (raw_id, source, frame_index, timestamp, class_ids, confidences, boxes) per stored frame"""
+    cursor = conn.execute('''
+        SELECT id, source, frame_index, timestamp, class_ids, confidences, boxes
+        FROM raw_predictions ORDER BY id
+    ''')
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for raw_id, source, frame_index, timestamp, class_ids, confidences, boxes in rows:
+            yield (raw_id, source, frame_index, timestamp,
+                   np.frombuffer(class_ids, dtype='<i2'),
+                   np.frombuffer(confidences, dtype='<f4'),
+                   np.frombuffer(boxes, dtype='<f4').reshape(-1, 4))
@@ -0,0 +1,69 @@
+"""
+Image decoding matched to the model input size
+"""
+
+import cv2
+from PIL import Image
+
+JPEG_EXTENSIONS = ('.jpg', '.jpeg')
+
+# JPEG can be decoded directly at 1/2, 1/4 or 1/8 scale by the IDCT
+REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+EXIF_ORIENTATION = 0x0112
+
+
+def image_size(path):
+    """(width, height) as cv2.imread would return it, read from the header only"""
+    with Image.open(path) as image:
+        width, height = image.size
+        # Orientations 5-8 are rotated by 90 degrees, which imread applies
+        if image.getexif().get(EXIF_ORIENTATION, 1) in (5, 6, 7, 8):
+            width, height = height, width
+    return width, height
+
+
+def reduction_factor(width, height, target_size):
+    """Largest JPEG scale-down that keeps the long side at least target_size"""
+    for factor, _ in REDUCED_FLAGS:
+        if max(width, height) / factor >= target_size:
+            return factor
+    return 1
+
+
+def read_image(path, target_size=None):
+    """Decode an image, at reduced resolution when that loses nothing.
+
+    The model letterboxes its input to target_size anyway, so large JPEGs
+    are decoded at the smallest 1/2, 1/4 or 1/8 scale that is still at
+    least that big. Returns (image, (sx, sy)) where the scale maps image
+    pixels back to original pixels, or (None, None) if decoding fails.
+    """
+    if target_size and path.lower().endswith(JPEG_EXTENSIONS):
+        try:
+            width, height = image_size(path)
+        except (OSError, ImportError):
+            # Unreadable headers (ImportError when a lazily registered PIL
+            # plugin is missing) fall back to a plain decode
+            width = height = 0
+        factor = reduction_factor(width, height, target_size)
+        if factor > 1:
+            flag = dict(REDUCED_FLAGS)[factor]
+            image = cv2.imread(path, flag)
+            if image is not None:
+                return image, (width / image.shape[1], height / image.shape[0])
+
+    image = cv2.imread(path)
+    if image is None:
+        return None, None
+    return image, (1.0, 1.0)
+
+
+def scale_bbox(bbox, scale):
+    """Map an [x1, y1, x2, y2] box from decoded to original pixels"""
+    sx, sy = scale
+    return [bbox[0] * sx, bbox[1] * sy, bbox[2] * sx, bbox[3] * sy]
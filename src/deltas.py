@@ -0,0 +1,66 @@
+"""
+Delta encoding of live detections keyed by track identity
+"""
+
+from tracking import IdentityTracker
+
+
+def _compact(track_id, detection):
+    return {
+        'id': track_id,
+        'class': detection['class'],
+        'confidence': detection['confidence'],
+        'bbox': [round(value, 1) for value in detection['bbox']]
+    }
+
+
+class DetectionDeltas:
+    """Client-visible detection state for one stream.
+
+    The state only changes when a box appears, disappears, moves by more
+    than bbox_tolerance pixels or changes confidence by more than
+    conf_tolerance, so jitter does not produce updates. Each call returns
+    the change since the previous frame plus a full snapshot for viewers
+    that are not in sync.
+    """
+
+    def __init__(self, bbox_tolerance=4.0, conf_tolerance=0.02):
+        self.bbox_tolerance = bbox_tolerance
+        self.conf_tolerance = conf_tolerance
+        self.tracker = IdentityTracker()
+        self.boxes = {}
+        self.frame_count = None
+
+    def update(self, detections, frame_count):
+        """Return (base_frame, delta, snapshot) for the new frame"""
+        current = dict(self.tracker.update(detections))
+        delta = {}
+
+        added = [_compact(track_id, detection) for track_id, detection in current.items()
+                 if track_id not in self.boxes]
+        removed = [track_id for track_id in self.boxes if track_id not in current]
+        updated = []
+        for track_id, detection in current.items():
+            previous = self.boxes.get(track_id)
+            if previous is None:
+                continue
+            moved = max(abs(a - b) for a, b in zip(previous['bbox'], detection['bbox']))
+            if (moved > self.bbox_tolerance
+                    or abs(previous['confidence'] - detection['confidence']) > self.conf_tolerance):
+                updated.append(_compact(track_id, detection))
+
+        for item in added + updated:
+            self.boxes[item['id']] = item
+        for track_id in removed:
+            del self.boxes[track_id]
+
+        if added:
+            delta['added'] = added
+        if updated:
+            delta['updated'] = updated
+        if removed:
+            delta['removed'] = removed
+
+        base_frame = self.frame_count
+        self.frame_count = frame_count
+        return base_frame, delta, list(self.boxes.values())
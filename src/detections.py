@@ -0,0 +1,144 @@
+"""
+Compact array-backed detections
+"""
+
+import time
+from datetime import datetime
+
+import numpy as np
+
+CLASS_DTYPE = np.int16
+CONFIDENCE_DTYPE = np.float32
+BOX_DTYPE = np.float32
+
+
+class Detections:
+    """Detections of one frame as parallel NumPy arrays.
+
+    Classes are stored as model class ids and the frame carries a single
+    timestamp, so a box costs 22 bytes instead of a dict with a name string,
+    a float, a list and a formatted time. Use to_dicts() only where the data
+    leaves the process as JSON or database rows. When raw capture is on,
+    raw holds the unfiltered model output the boxes were selected from.
+    """
+
+    __slots__ = ('class_ids', 'confidences', 'boxes', 'frame_index', 'timestamp', 'raw')
+
+    def __init__(self, class_ids, confidences, boxes, frame_index=0, timestamp=None, raw=None):
+        self.class_ids = np.asarray(class_ids, dtype=CLASS_DTYPE)
+        self.confidences = np.asarray(confidences, dtype=CONFIDENCE_DTYPE)
+        self.boxes = np.asarray(boxes, dtype=BOX_DTYPE).reshape(-1, 4)
+        self.frame_index = frame_index
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.raw = raw
+
+    @classmethod
+    def empty(cls, frame_index=0, timestamp=None):
+        return cls([], [], [], frame_index, timestamp)
+
+    @classmethod
+    def from_boxes(cls, boxes, frame_index=0, timestamp=None):
+        """Build from an Ultralytics Boxes object without per-box Python work"""
+        if boxes is None or len(boxes) == 0:
+            return cls.empty(frame_index, timestamp)
+        return cls(boxes.cls.cpu().numpy(), boxes.conf.cpu().numpy(), boxes.xyxy.cpu().numpy(),
+                   frame_index, timestamp)
+
+    def __len__(self):
+        return len(self.class_ids)
+
+    def __getitem__(self, selector):
+        """Subset by boolean mask or index array; keeps the frame metadata"""
+        return Detections(self.class_ids[selector], self.confidences[selector],
+                          self.boxes[selector], self.frame_index, self.timestamp, self.raw)
+
+    def __repr__(self):
+        return f"Detections(frame={self.frame_index}, count={len(self)})"
+
+    def scaled(self, sx, sy):
+        """Boxes mapped to another resolution, e.g. from a reduced decode to the original"""
+        factors = np.array([sx, sy, sx, sy], dtype=BOX_DTYPE)
+        raw = self.raw.scaled(sx, sy) if self.raw is not None else None
+        return Detections(self.class_ids, self.confidences, self.boxes * factors,
+                          self.frame_index, self.timestamp, raw)
+
+    def to_dicts(self, class_names):
+        """The legacy list-of-dicts form, for JSON output and tracking"""
+        clock = datetime.fromtimestamp(self.timestamp).strftime('%H:%M:%S')
+        return [{
+            'class': class_names[class_id],
+            'confidence': confidence,
+            'bbox': box,
+            'timestamp': clock
+        } for class_id, confidence, box in zip(self.class_ids.tolist(),
+                                               self.confidences.tolist(),
+                                               self.boxes.tolist())]
+
+
+class DetectionSeries:
+    """Detections of many frames in growable column arrays.
+
+    Columns match the columnar log (frame, timestamp, class_id, confidence,
+    box), so the same vectorized analysis works on an in-memory run and a
+    log read back from disk. Capacity doubles as needed, keeping appends
+    amortized O(1) without holding one Python object per detection.
+    """
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.columns = {
+            'frame': np.empty(capacity, dtype=np.int64),
+            'timestamp': np.empty(capacity, dtype=np.float64),
+            'class_id': np.empty(capacity, dtype=CLASS_DTYPE),
+            'confidence': np.empty(capacity, dtype=CONFIDENCE_DTYPE),
+            'box': np.empty((capacity, 4), dtype=BOX_DTYPE),
+        }
+
+    def append(self, detections):
+        count = len(detections)
+        if count == 0:
+            return
+        needed = self.size + count
+        capacity = len(self.columns['frame'])
+        if needed > capacity:
+            while capacity < needed:
+                capacity *= 2
+            for name, column in self.columns.items():
+                grown = np.empty((capacity,) + column.shape[1:], dtype=column.dtype)
+                grown[:self.size] = column[:self.size]
+                self.columns[name] = grown
+
+        end = self.size + count
+        self.columns['frame'][self.size:end] = detections.frame_index
+        self.columns['timestamp'][self.size:end] = detections.timestamp
+        self.columns['class_id'][self.size:end] = detections.class_ids
+        self.columns['confidence'][self.size:end] = detections.confidences
+        self.columns['box'][self.size:end] = detections.boxes
+        self.size = end
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, name):
+        return self.columns[name][:self.size]
+
+    def class_counts(self, class_names):
+        """Number of detections per class name"""
+        counts = np.bincount(self['class_id']) if self.size else []
+        return {class_names.get(class_id, str(class_id)): int(count)
+                for class_id, count in enumerate(counts) if count}
+
+
+class FrameResult:
+    """One processed frame yielded by SmartDetectionSystem.iter_detections"""
+
+    __slots__ = ('source', 'frame_index', 'detections', 'frame')
+
+    def __init__(self, source, frame_index, detections, frame=None):
+        self.source = source
+        self.frame_index = frame_index
+        self.detections = detections
+        self.frame = frame
+
+    def __repr__(self):
+        return f"FrameResult(source={self.source!r}, frame={self.frame_index}, count={len(self.detections)})"
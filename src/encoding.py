@@ -0,0 +1,238 @@
+"""
+Per-viewer adaptive frame encoding for the live feed
+"""
+
+import base64
+import threading
+import time
+from collections import deque
+
+import cv2
+
+FORMATS = ('jpeg', 'webp')
+# Narrowest frame a viewer may ask for; frames are never scaled up
+MIN_WIDTH = 64
+
+
+def parse_max_width(value):
+    """Validate a client-requested width: None/0 for no limit, else at least MIN_WIDTH.
+
+    Raises ValueError for anything that is not a positive whole number.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"max_width must be a whole number of pixels, got {value!r}")
+    try:
+        width = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"max_width must be a whole number of pixels, got {value!r}") from None
+    if width < 0:
+        raise ValueError(f"max_width must be positive, got {value!r}")
+    return max(MIN_WIDTH, width) if width else None
+
+
+def encode_frame(frame, quality, max_width=None, fmt='jpeg'):
+    """Downscale a frame to max_width and encode it as base64 JPEG or WebP"""
+    height, width = frame.shape[:2]
+    if max_width:
+        max_width = max(MIN_WIDTH, int(max_width))
+    if max_width and width > max_width:
+        scaled_height = max(1, int(round(height * max_width / width)))
+        frame = cv2.resize(frame, (max_width, scaled_height), interpolation=cv2.INTER_AREA)
+
+    if fmt == 'webp':
+        _, buffer = cv2.imencode('.webp', frame, [cv2.IMWRITE_WEBP_QUALITY, quality])
+    else:
+        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return base64.b64encode(buffer).decode('utf-8')
+
+
+class ViewerState:
+    """Delivery measurements and chosen encoding for one connected client"""
+
+    def __init__(self, sid, stream, fmt='jpeg', max_width=None):
+        self.sid = sid
+        self.stream = stream
+        self.fmt = fmt
+        self.max_width = max_width
+        self.tier = 0
+        self.last_change = time.time()
+        self.last_sent = None
+
+        # Frames emitted but not yet acknowledged: (frame_count, sent_at, size)
+        self.in_flight = deque(maxlen=64)
+        self.latencies = deque(maxlen=20)
+        self.sent = deque(maxlen=100)
+        self.delivered = deque(maxlen=100)
+
+    def send_rate(self, now, window=5.0):
+        """Bytes per second emitted to the client over the recent window"""
+        recent = [size for sent_at, size in self.sent if now - sent_at <= window]
+        return sum(recent) / window
+
+    def delivery_rate(self, now, window=5.0):
+        """Bytes per second acknowledged by the client over the recent window"""
+        recent = [size for acked_at, size in self.delivered if now - acked_at <= window]
+        return sum(recent) / window
+
+    def avg_latency(self):
+        return sum(self.latencies) / len(self.latencies) if self.latencies else 0
+
+
+class ViewerRegistry:
+    """Track viewers and pick an encode tier for each from its delivery rate.
+
+    Each emitted frame is recorded per viewer and clients acknowledge the
+    frames they have displayed. A viewer whose unacknowledged backlog or
+    acknowledgement latency grows, or whose acknowledged bytes per second
+    fall below min_delivery_ratio of the bytes sent to it, steps down to a
+    cheaper tier (lower quality and width); one that keeps up comfortably
+    steps back up after a cooling-off period.
+    """
+
+    def __init__(self, tiers, webp_enabled=False, max_in_flight=3, max_latency=0.5,
+                 downgrade_interval=1.0, upgrade_interval=5.0, min_delivery_ratio=0.75,
+                 rate_window=5.0):
+        self.tiers = tiers
+        self.webp_enabled = webp_enabled
+        self.max_in_flight = max_in_flight
+        self.max_latency = max_latency
+        self.min_delivery_ratio = min_delivery_ratio
+        self.rate_window = rate_window
+        self.downgrade_interval = downgrade_interval
+        self.upgrade_interval = upgrade_interval
+        self.viewers = {}
+        self.lock = threading.Lock()
+
+    def connect(self, sid, stream):
+        with self.lock:
+            self.viewers[sid] = ViewerState(sid, stream)
+
+    def disconnect(self, sid):
+        with self.lock:
+            self.viewers.pop(sid, None)
+
+    def set_stream(self, sid, stream):
+        with self.lock:
+            viewer = self.viewers.get(sid)
+            if viewer:
+                viewer.stream = stream
+                viewer.last_sent = None
+                viewer.in_flight.clear()
+
+    def configure(self, sid, max_width=None, fmt=None):
+        """Apply client-requested downscaling and image format.
+
+        Raises ValueError for an invalid max_width (see parse_max_width).
+        """
+        max_width = parse_max_width(max_width)
+        with self.lock:
+            viewer = self.viewers.get(sid)
+            if viewer is None:
+                return
+            viewer.max_width = max_width
+            if fmt in FORMATS and (fmt != 'webp' or self.webp_enabled):
+                viewer.fmt = fmt
+
+    def encoding_for(self, viewer):
+        """(format, quality, max_width) for the viewer's current tier"""
+        quality, tier_width = self.tiers[viewer.tier]
+        widths = [width for width in (tier_width, viewer.max_width) if width]
+        return viewer.fmt, quality, min(widths) if widths else None
+
+    def viewers_for(self, stream):
+        """Group the stream's viewers by encoding so each tier is encoded once"""
+        now = time.time()
+        groups = {}
+        with self.lock:
+            for viewer in self.viewers.values():
+                if viewer.stream != stream:
+                    continue
+                self._expire(viewer, now)
+                if len(viewer.in_flight) >= 2 * self.max_in_flight:
+                    # Badly backlogged client: drop frames rather than queue them
+                    continue
+                groups.setdefault(self.encoding_for(viewer), []).append(viewer.sid)
+        return groups
+
+    def viewer_counts(self):
+        """Number of connected viewers per stream"""
+        counts = {}
+        with self.lock:
+            for viewer in self.viewers.values():
+                counts[viewer.stream] = counts.get(viewer.stream, 0) + 1
+        return counts
+
+    def last_sent(self, sid):
+        """Frame count of the last frame sent to the viewer on its stream"""
+        with self.lock:
+            viewer = self.viewers.get(sid)
+            return viewer.last_sent if viewer else None
+
+    def on_sent(self, sid, frame_count, size):
+        with self.lock:
+            viewer = self.viewers.get(sid)
+            if viewer:
+                now = time.time()
+                viewer.last_sent = frame_count
+                viewer.in_flight.append((frame_count, now, size))
+                viewer.sent.append((now, size))
+                self._adapt(viewer, now)
+
+    def on_ack(self, sid, frame_count):
+        with self.lock:
+            viewer = self.viewers.get(sid)
+            if viewer is None:
+                return
+            now = time.time()
+            while viewer.in_flight and viewer.in_flight[0][0] <= frame_count:
+                sent_count, sent_at, size = viewer.in_flight.popleft()
+                if sent_count == frame_count:
+                    viewer.latencies.append(now - sent_at)
+                    viewer.delivered.append((now, size))
+            self._adapt(viewer, now)
+
+    def _expire(self, viewer, now):
+        # Forget frames the client will never acknowledge (e.g. lost on reconnect)
+        while viewer.in_flight and now - viewer.in_flight[0][1] > 5.0:
+            viewer.in_flight.popleft()
+
+    def _adapt(self, viewer, now):
+        backlog = len(viewer.in_flight)
+        latency = viewer.avg_latency()
+        since_change = now - viewer.last_change
+
+        # Share of the bytes sent over the window, less those still in flight,
+        # that the client acknowledged; frames it skips or never gets count against it
+        window = self.rate_window
+        pending = sum(size for _, sent_at, size in viewer.in_flight if now - sent_at <= window)
+        settled = viewer.send_rate(now, window) * window - pending
+        delivery_ratio = viewer.delivery_rate(now, window) * window / settled if settled > 0 else 1.0
+        starved = delivery_ratio < self.min_delivery_ratio
+
+        if backlog > self.max_in_flight or latency > self.max_latency or starved:
+            if viewer.tier < len(self.tiers) - 1 and since_change >= self.downgrade_interval:
+                viewer.tier += 1
+                viewer.last_change = now
+                viewer.latencies.clear()
+        elif (viewer.tier > 0 and backlog <= 1 and len(viewer.latencies) >= 10
+              and latency < self.max_latency / 2 and delivery_ratio >= self.min_delivery_ratio
+              and since_change >= self.upgrade_interval):
+            viewer.tier -= 1
+            viewer.last_change = now
+            viewer.latencies.clear()
+
+    def describe(self):
+        now = time.time()
+        with self.lock:
+            return [{
+                'sid': viewer.sid,
+                'stream': viewer.stream,
+                'tier': viewer.tier,
+                'encoding': list(self.encoding_for(viewer)),
+                'in_flight': len(viewer.in_flight),
+                'avg_latency_ms': round(1000 * viewer.avg_latency(), 1),
+                'send_rate_kbps': round(8 * viewer.send_rate(now, self.rate_window) / 1000, 1),
+                'delivery_rate_kbps': round(8 * viewer.delivery_rate(now, self.rate_window) / 1000, 1)
+            } for viewer in self.viewers.values()]
@@ -0,0 +1,137 @@
+"""
+Shared inference service that batches concurrent detection requests
+"""
+
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+PRIORITY_LIVE = 0
+PRIORITY_BULK = 1
+
+PRIORITY_NAMES = {PRIORITY_LIVE: 'live', PRIORITY_BULK: 'bulk'}
+
+
+class InferenceRequest:
+    __slots__ = ('frame', 'priority', 'future', 'enqueued_at')
+
+    def __init__(self, frame, priority):
+        self.frame = frame
+        self.priority = priority
+        self.future = Future()
+        self.enqueued_at = time.time()
+
+
+class InferenceService:
+    """Coalesce concurrent detection calls into micro-batches on one worker.
+
+    Callers from any thread submit frames with a priority class. A single
+    worker pulls requests in priority order, waits at most the latency
+    budget of the most urgent request for more work to arrive, and runs the
+    whole batch through one model call. Live frames are always taken from
+    the queue before bulk uploads, so an upload can delay a live frame by
+    at most one batch.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=16, live_wait=0.005, bulk_wait=0.05):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.wait_budget = {PRIORITY_LIVE: live_wait, PRIORITY_BULK: bulk_wait}
+
+        self.queue = queue.PriorityQueue()
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+        self.thread = None
+
+        self.requests = {priority: 0 for priority in PRIORITY_NAMES}
+        self.queue_waits = {priority: deque(maxlen=1000) for priority in PRIORITY_NAMES}
+        self.batch_sizes = deque(maxlen=1000)
+        self.batch_count = 0
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._worker, daemon=True)
+                self.thread.start()
+
+    def submit(self, frame, priority=PRIORITY_BULK):
+        """Queue a frame and return a Future resolving to its detections"""
+        self.start()
+        request = InferenceRequest(frame, priority)
+        self.queue.put((priority, next(self.sequence), request))
+        return request.future
+
+    def detect(self, frame, priority=PRIORITY_BULK, timeout=None):
+        """Detect objects in one frame, blocking until its batch completes"""
+        return self.submit(frame, priority).result(timeout)
+
+    def detect_many(self, frames, priority=PRIORITY_BULK, timeout=None):
+        """Detect objects in several frames, which usually share one batch"""
+        futures = [self.submit(frame, priority) for frame in frames]
+        return [future.result(timeout) for future in futures]
+
+    def _collect(self):
+        """Block for one request, then gather more until full or out of budget"""
+        _, _, first = self.queue.get()
+        batch = [first]
+        deadline = first.enqueued_at + self.wait_budget[first.priority]
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            try:
+                if remaining > 0:
+                    _, _, request = self.queue.get(timeout=remaining)
+                else:
+                    # Budget spent: only take what is already waiting
+                    _, _, request = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(request)
+            deadline = min(deadline, request.enqueued_at + self.wait_budget[request.priority])
+
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._collect()
+            started = time.time()
+
+            with self.lock:
+                self.batch_count += 1
+                self.batch_sizes.append(len(batch))
+                for request in batch:
+                    self.requests[request.priority] += 1
+                    self.queue_waits[request.priority].append(started - request.enqueued_at)
+
+            try:
+                results = self.batch_fn([request.frame for request in batch])
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
+
+    def get_metrics(self):
+        """Queue-wait and batch-size metrics for monitoring"""
+        with self.lock:
+            batch_sizes = list(self.batch_sizes)
+            metrics = {
+                'batches': self.batch_count,
+                'queue_depth': self.queue.qsize(),
+                'avg_batch_size': round(sum(batch_sizes) / len(batch_sizes), 2) if batch_sizes else 0,
+                'max_batch_size': max(batch_sizes) if batch_sizes else 0,
+                'priorities': {}
+            }
+            for priority, name in PRIORITY_NAMES.items():
+                waits = sorted(self.queue_waits[priority])
+                metrics['priorities'][name] = {
+                    'requests': self.requests[priority],
+                    'avg_queue_wait_ms': round(1000 * sum(waits) / len(waits), 2) if waits else 0,
+                    'p95_queue_wait_ms': round(1000 * waits[int(0.95 * (len(waits) - 1))], 2) if waits else 0
+                }
+        return metrics
@@ -0,0 +1,125 @@
+"""
+Manifest of processed files for incremental, resumable directory runs
+"""
+
+import hashlib
+import os
+from datetime import datetime, timezone
+
+
+def init_manifest(conn):
+    """Create the processed_files table and the index used to replace a file's rows"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS processed_files (
+            path TEXT PRIMARY KEY,
+            size INTEGER,
+            mtime_ns INTEGER,
+            fingerprint TEXT,
+            detections INTEGER,
+            processed_at DATETIME
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_detections_image ON detections(image_path)')
+
+
+def fingerprint(*parts):
+    """Short stable hash of everything that changes detection results"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(repr(part).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()[:16]
+
+
+def scan_files(root, extensions):
+    """Yield (path, size, mtime_ns) for matching files under root, recursively.
+
+    os.scandir gets the file type from the directory listing, so only
+    matching files cost a stat call. Entries are visited in name order,
+    making runs over an unchanged tree process files in the same order.
+    Symlinked directories are not followed to avoid cycles.
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as listing:
+                entries = sorted(listing, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        subdirectories = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.path)
+                elif entry.name.lower().endswith(extensions) and entry.is_file():
+                    stat = entry.stat()
+                    yield entry.path, stat.st_size, stat.st_mtime_ns
+            except OSError:
+                continue
+        stack.extend(reversed(subdirectories))
+
+
+class Manifest:
+    """Which files were processed, at which size and mtime, with which settings.
+
+    A file is skipped while its size, mtime and the settings fingerprint
+    all match its row. Rows are buffered and committed every
+    checkpoint_every files, after the detections they describe, so a
+    crashed run resumes at the last checkpoint and redoes at most that
+    many files.
+    """
+
+    def __init__(self, conn, fingerprint, checkpoint_every=100):
+        self.conn = conn
+        self.fingerprint = fingerprint
+        self.checkpoint_every = checkpoint_every
+        self.buffer = []
+        self.skipped = 0
+        self.processed = 0
+        init_manifest(conn)
+        conn.commit()
+
+    def pending(self, entries, chunk_size=500):
+        """Filter (path, size, mtime_ns) entries down to new or changed files"""
+        chunk = []
+        for entry in entries:
+            chunk.append(entry)
+            if len(chunk) >= chunk_size:
+                yield from self._pending_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from self._pending_chunk(chunk)
+
+    def _pending_chunk(self, chunk):
+        known = {row[0]: row[1:] for row in self.conn.execute(
+            f"SELECT path, size, mtime_ns, fingerprint FROM processed_files "
+            f"WHERE path IN ({','.join('?' * len(chunk))})", [path for path, _, _ in chunk])}
+        for path, size, mtime_ns in chunk:
+            if known.get(path) == (size, mtime_ns, self.fingerprint):
+                self.skipped += 1
+            else:
+                yield path, size, mtime_ns
+
+    def forget(self, path):
+        """Drop rows stored for path by an earlier or interrupted run"""
+        self.conn.execute('DELETE FROM detections WHERE image_path = ?', (path,))
+        self.conn.execute('DELETE FROM raw_predictions WHERE source = ?', (path,))
+
+    def record(self, path, size, mtime_ns, detections):
+        self.buffer.append((path, size, mtime_ns, self.fingerprint, detections,
+                            datetime.now(timezone.utc).isoformat()))
+        self.processed += 1
+        if len(self.buffer) >= self.checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Commit buffered rows; everything recorded so far survives a crash"""
+        if self.buffer:
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO processed_files
+                    (path, size, mtime_ns, fingerprint, detections, processed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', self.buffer)
+            self.buffer = []
+        self.conn.commit()
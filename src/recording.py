@@ -0,0 +1,193 @@
+"""
+Event-triggered clip recording with pre-roll and post-roll
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import cv2
+
+
+def parse_triggers(spec):
+    """Parse "knife,person@20-6" into {'knife': None, 'person': (20, 6)}.
+
+    A class without hours triggers at any time; with start-end hours it only
+    triggers inside that local-time window, which may wrap past midnight.
+    Raises ValueError for a malformed entry.
+    """
+    triggers = {}
+    for entry in spec.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        class_name, sep, hours = entry.partition('@')
+        class_name = class_name.strip()
+        if not class_name:
+            raise ValueError(f"Trigger '{entry}' has no class name")
+        if not sep:
+            triggers[class_name] = None
+            continue
+        start, _, end = hours.partition('-')
+        try:
+            window = (int(start), int(end))
+        except ValueError:
+            raise ValueError(f"Trigger '{entry}' needs hours as class@start-end, e.g. person@20-6") from None
+        if not all(0 <= hour <= 24 for hour in window):
+            raise ValueError(f"Trigger '{entry}' has hours outside 0-24")
+        if window[0] == window[1]:
+            raise ValueError(f"Trigger '{entry}' has an empty window; start and end hours must differ")
+        triggers[class_name] = window
+    return triggers
+
+
+def within_hours(hours, now=None):
+    if hours is None:
+        return True
+    start, end = hours
+    hour = time.localtime(now).tm_hour
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+class ClipWriter:
+    """Encode clips on a background thread.
+
+    Frames are handed over through a bounded queue so capture and detection
+    never wait on the encoder. If the encoder falls behind, live frames are
+    dropped and counted in dropped_frames rather than queued without limit;
+    offline callers pass block=True to wait for room instead.
+    """
+
+    def __init__(self, fourcc='mp4v', max_queue=256):
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.writers = {}
+        self.dropped_frames = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def open(self, key, path, fps, size):
+        self.queue.put(('open', key, (path, fps, size)))
+
+    def write(self, key, frame, block=False):
+        if block:
+            self.queue.put(('frame', key, frame))
+            return
+        try:
+            self.queue.put_nowait(('frame', key, frame))
+        except queue.Full:
+            self.dropped_frames += 1
+
+    def close(self, key):
+        self.queue.put(('close', key, None))
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            action, key, value = item
+            try:
+                if action == 'open':
+                    path, fps, size = value
+                    self.writers[key] = (cv2.VideoWriter(path, self.fourcc, fps, size), size)
+                elif action == 'frame' and key in self.writers:
+                    writer, size = self.writers[key]
+                    if (value.shape[1], value.shape[0]) != size:
+                        value = cv2.resize(value, size)
+                    writer.write(value)
+                elif action == 'close' and key in self.writers:
+                    self.writers.pop(key)[0].release()
+            except Exception as e:
+                print(f"Clip writer error: {e}")
+        for writer, _ in self.writers.values():
+            writer.release()
+        self.writers = {}
+
+    def stop(self):
+        """Finish every queued frame, release open clips and end the thread"""
+        self.queue.put(None)
+        self.thread.join()
+
+
+class ClipRecorder:
+    """Record only the segments of a feed around trigger detections.
+
+    The last pre_seconds of frames are kept in a fixed-size ring buffer.
+    When a trigger class is detected the buffer becomes the start of a new
+    clip, and frames keep being recorded until no trigger has been seen for
+    post_seconds (or the clip reaches max_seconds). Times come from the
+    caller so files can be recorded on their own timeline; trigger hours
+    are always checked against the wall clock. With block, frames wait for
+    room in the writer's queue instead of being dropped (for files, where
+    nothing is lost by waiting).
+    """
+
+    def __init__(self, output_dir, triggers, fps, writer, name='clip', pre_seconds=5.0,
+                 post_seconds=5.0, max_seconds=300.0, extension='.mp4', block=False):
+        self.output_dir = output_dir
+        self.block = block
+        self.triggers = triggers
+        self.fps = fps
+        self.writer = writer
+        self.name = name
+        self.post_seconds = post_seconds
+        self.max_seconds = max_seconds
+        self.extension = extension
+        self.buffer = deque(maxlen=max(1, int(round(pre_seconds * fps))))
+        self.clip_key = None
+        self.clip_start = 0
+        self.clip_end = 0
+        self.clips = []
+        os.makedirs(output_dir, exist_ok=True)
+
+    def matches(self, class_names):
+        """Trigger classes among the detected class names right now"""
+        return sorted({name for name in class_names
+                       if name in self.triggers and within_hours(self.triggers[name])})
+
+    def push(self, frame, class_names=(), now=None):
+        """Feed one frame and the classes detected in it; returns a new clip path or None"""
+        now = time.time() if now is None else now
+        matched = self.matches(class_names)
+        started = None
+
+        if self.clip_key is None:
+            if not matched:
+                self.buffer.append(frame)
+                return None
+            started = self._start(frame, matched, now)
+
+        self.writer.write(self.clip_key, frame, block=self.block)
+        if matched:
+            self.clip_end = now + self.post_seconds
+        if now >= self.clip_end or now - self.clip_start >= self.max_seconds:
+            self.close()
+        return started
+
+    def _start(self, frame, matched, now):
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]
+        base = os.path.join(self.output_dir, f"{self.name}_{stamp}_{'-'.join(matched)}")
+        path, suffix = base + self.extension, 1
+        while path in self.clips or os.path.exists(path):
+            suffix += 1
+            path = f"{base}_{suffix}{self.extension}"
+        self.clip_key = (self.name, path)
+        self.clip_start = now
+        self.writer.open(self.clip_key, path, self.fps, (frame.shape[1], frame.shape[0]))
+        for buffered in self.buffer:
+            self.writer.write(self.clip_key, buffered, block=self.block)
+        self.buffer.clear()
+        self.clips.append(path)
+        return path
+
+    def close(self):
+        """End the clip in progress, e.g. when the source stops"""
+        if self.clip_key is not None:
+            self.writer.close(self.clip_key)
+            self.clip_key = None
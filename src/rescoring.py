@@ -0,0 +1,93 @@
+"""
+Re-score stored raw predictions with new thresholds, without re-running the model
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+from database import iter_raw_predictions
+from tiling import nms
+
+# NMS IoU the model runs with while raw predictions are captured; re-scoring
+# can apply any stricter (lower) IoU afterwards
+RAW_IOU = 0.7
+
+
+def select_batch(class_ids, confidences, boxes, bounds, threshold_table, iou):
+    """Indices of predictions that pass per-class thresholds and NMS, for many frames at once.
+
+    The frames' predictions are laid end to end and frame k owns indices
+    bounds[k]:bounds[k + 1] (np.cumsum of the frame sizes, starting at 0).
+    Thresholds are one vectorized comparison over the whole batch; NMS then
+    only runs on frames left with more than one box.
+    """
+    keep = np.flatnonzero(confidences >= threshold_table[class_ids])
+    if len(keep) < 2 or iou >= RAW_IOU:
+        return keep
+    owners = np.searchsorted(bounds, keep, side='right') - 1
+    groups = np.split(keep, np.flatnonzero(np.diff(owners)) + 1)
+    return np.concatenate([
+        group[nms(boxes[group], confidences[group], class_ids[group], iou)] if len(group) > 1 else group
+        for group in groups])
+
+
+def select_predictions(class_ids, confidences, boxes, threshold_table, iou):
+    """Indices of one frame's predictions that pass per-class thresholds and NMS"""
+    return select_batch(class_ids, confidences, boxes, np.array([0, len(class_ids)]),
+                        threshold_table, iou)
+
+
+def rescore(conn, class_names, threshold_table, iou=0.4, batch_frames=1000):
+    """Rebuild the detections rows that were selected from stored raw predictions.
+
+    Only rows linked to a stored raw frame through detections.raw_id are
+    replaced, so rows of the same source stored by runs without raw capture
+    stay. Each batch of frames goes through select_batch, the selection a
+    live run applies per frame, and the old rows are replaced in a single
+    transaction.
+    """
+    sources = conn.execute('SELECT COUNT(DISTINCT source) FROM raw_predictions').fetchone()[0]
+    summary = {'sources': sources, 'frames': 0, 'raw_boxes': 0, 'kept_boxes': 0}
+
+    def flush(frames):
+        class_ids = np.concatenate([f[4] for f in frames])
+        confidences = np.concatenate([f[5] for f in frames])
+        boxes = np.concatenate([f[6] for f in frames])
+        bounds = np.cumsum([0] + [len(f[4]) for f in frames])
+
+        kept = select_batch(class_ids, confidences, boxes, bounds, threshold_table, iou)
+        owners = np.searchsorted(bounds, kept, side='right') - 1
+        rows = [(frames[owner][3], class_names[class_id], confidence, *box,
+                 frames[owner][1], frames[owner][0])
+                for owner, class_id, confidence, box in zip(owners.tolist(),
+                                                            class_ids[kept].tolist(),
+                                                            confidences[kept].tolist(),
+                                                            boxes[kept].tolist())]
+        conn.executemany('''
+            INSERT INTO detections (timestamp, class_name, confidence, x1, y1, x2, y2, image_path, raw_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        summary['frames'] += len(frames)
+        summary['raw_boxes'] += len(class_ids)
+        summary['kept_boxes'] += len(rows)
+
+    try:
+        # Rows whose raw frame was pruned cannot be rebuilt, so they are kept
+        conn.execute('DELETE FROM detections WHERE raw_id IN (SELECT id FROM raw_predictions)')
+
+        frames = []
+        for frame in iter_raw_predictions(conn):
+            frames.append(frame)
+            if len(frames) >= batch_frames:
+                flush(frames)
+                frames = []
+        if frames:
+            flush(frames)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    summary['finished_at'] = datetime.now(timezone.utc).isoformat()
+    return summary
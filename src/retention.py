@@ -0,0 +1,198 @@
+"""
+Retention, downsampling and compaction for detection databases
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+# Box counts from detections and event counts from detection_events, kept apart
+AGGREGATE_TABLES = ('detection_aggregates', 'event_aggregates')
+
+
+@contextmanager
+def connection_writer(conn):
+    """Adapt a plain sqlite3 connection to the write() context of ConnectionPool"""
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+class RetentionManager:
+    """Keep the raw detections table small without losing long-term trends.
+
+    Raw rows older than raw_days are folded into hourly per-class, per-source
+    aggregates and deleted in small batches, each in its own short write
+    transaction so live inserts are never held up for long. Tracked events
+    (detection_events) expire the same way into event_aggregates, counting
+    one per event rather than one per box, and stored raw predictions past
+    raw_days are deleted outright. Freed pages
+    are returned to the filesystem with incremental vacuum. Aggregates older
+    than aggregate_days are dropped too (0 keeps them forever).
+    """
+
+    def __init__(self, write, raw_days, aggregate_days=0, batch_size=500,
+                 source_column='source', batch_pause=0.05, vacuum_pages=1000):
+        self.write = write
+        self.raw_days = raw_days
+        self.aggregate_days = aggregate_days
+        self.batch_size = batch_size
+        self.source_column = source_column
+        self.batch_pause = batch_pause
+        self.vacuum_pages = vacuum_pages
+        self.last_summary = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.tables = set()
+
+    def init_schema(self):
+        with self.write() as conn:
+            self.tables = {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'")}
+            for aggregate_table in AGGREGATE_TABLES:
+                conn.execute(f'''
+                    CREATE TABLE IF NOT EXISTS {aggregate_table} (
+                        bucket DATETIME,
+                        class_name TEXT,
+                        source TEXT,
+                        count INTEGER,
+                        confidence_sum REAL,
+                        max_confidence REAL,
+                        PRIMARY KEY (bucket, class_name, source)
+                    )
+                ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_detections_time ON detections(timestamp, id)')
+
+    def enable_incremental_vacuum(self):
+        """Switch the file to incremental auto-vacuum; a one-off VACUUM on old files"""
+        with self.write() as conn:
+            mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+        if mode == 2:
+            return
+        with self.write() as conn:
+            conn.commit()
+            conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+            # Changing auto_vacuum on an existing database needs a full rebuild
+            conn.execute('VACUUM')
+
+    def downsample_batch(self, cutoff, table='detections', time_column='timestamp',
+                         confidence_column='confidence', source_column=None,
+                         aggregate_table='detection_aggregates'):
+        """Fold one batch of expired rows into aggregate_table; returns rows removed"""
+        source_column = source_column or self.source_column
+        with self.write() as conn:
+            ids = [row[0] for row in conn.execute(f'''
+                SELECT id FROM {table}
+                WHERE {time_column} < ?
+                ORDER BY {time_column}, id
+                LIMIT ?
+            ''', (cutoff, self.batch_size))]
+            if not ids:
+                return 0
+
+            placeholders = ','.join('?' * len(ids))
+            conn.execute(f'''
+                INSERT INTO {aggregate_table}
+                    (bucket, class_name, source, count, confidence_sum, max_confidence)
+                SELECT strftime('%Y-%m-%d %H:00:00', {time_column}), class_name,
+                       COALESCE({source_column}, ''), COUNT(*),
+                       SUM({confidence_column}), MAX({confidence_column})
+                FROM {table}
+                WHERE id IN ({placeholders})
+                GROUP BY 1, 2, 3
+                ON CONFLICT (bucket, class_name, source) DO UPDATE SET
+                    count = count + excluded.count,
+                    confidence_sum = confidence_sum + excluded.confidence_sum,
+                    max_confidence = MAX(max_confidence, excluded.max_confidence)
+            ''', ids)
+            conn.execute(f'DELETE FROM {table} WHERE id IN ({placeholders})', ids)
+        return len(ids)
+
+    def downsample_events_batch(self, cutoff):
+        """Fold one batch of events that ended before cutoff into event_aggregates"""
+        return self.downsample_batch(cutoff, 'detection_events', 'last_seen',
+                                     'peak_confidence', 'source', 'event_aggregates')
+
+    def prune_raw_batch(self, cutoff):
+        """Delete one batch of expired raw predictions; returns rows removed"""
+        with self.write() as conn:
+            # Ids follow capture order, so the oldest frames come first
+            return conn.execute('''
+                DELETE FROM raw_predictions WHERE id IN (
+                    SELECT id FROM raw_predictions WHERE timestamp < ? ORDER BY id LIMIT ?
+                )
+            ''', (cutoff, self.batch_size)).rowcount
+
+    def _drain(self, batch, cutoff):
+        """Repeat batch(cutoff) until it runs short; returns rows removed"""
+        total = 0
+        while not self.stop_event.is_set():
+            removed = batch(cutoff)
+            total += removed
+            if removed < self.batch_size:
+                break
+            # Let live writers in between batches
+            time.sleep(self.batch_pause)
+        return total
+
+    def run_once(self):
+        """Apply the retention policy once; returns a summary of the work done"""
+        now = datetime.now(timezone.utc)
+        cutoff = (now - timedelta(days=self.raw_days)).strftime('%Y-%m-%d %H:%M:%S')
+
+        downsampled = self._drain(self.downsample_batch, cutoff)
+        downsampled_events = 0
+        if 'detection_events' in self.tables:
+            downsampled_events = self._drain(self.downsample_events_batch, cutoff)
+        pruned_raw = 0
+        if 'raw_predictions' in self.tables:
+            pruned_raw = self._drain(self.prune_raw_batch, cutoff)
+
+        expired_aggregates = 0
+        if self.aggregate_days:
+            aggregate_cutoff = (now - timedelta(days=self.aggregate_days)).strftime('%Y-%m-%d %H:%M:%S')
+            with self.write() as conn:
+                expired_aggregates = sum(
+                    conn.execute(f'DELETE FROM {table} WHERE bucket < ?', (aggregate_cutoff,)).rowcount
+                    for table in AGGREGATE_TABLES)
+
+        with self.write() as conn:
+            free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            conn.execute(f'PRAGMA incremental_vacuum({self.vacuum_pages})').fetchall()
+
+        self.last_summary = {
+            'finished_at': datetime.now(timezone.utc).isoformat(),
+            'downsampled_rows': downsampled,
+            'downsampled_events': downsampled_events,
+            'pruned_raw_predictions': pruned_raw,
+            'expired_aggregates': expired_aggregates,
+            'vacuumed_pages': min(free_pages, self.vacuum_pages)
+        }
+        return self.last_summary
+
+    def start(self, interval):
+        """Run the policy every interval seconds on a background thread"""
+        if self.thread:
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._loop, args=(interval,), daemon=True)
+        self.thread.start()
+
+    def _loop(self, interval):
+        self.enable_incremental_vacuum()
+        while not self.stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Retention error: {e}")
+            self.stop_event.wait(interval)
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5.0)
+            self.thread = None
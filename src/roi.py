@@ -0,0 +1,99 @@
+"""
+Per-source regions of interest: crop inference and discard outside detections
+"""
+
+import json
+
+import numpy as np
+
+
+def points_in_polygon(points, polygon):
+    """Even-odd ray casting for many points at once; returns a bool array"""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    polygon = np.asarray(polygon, dtype=np.float64)
+    x, y = points[:, 0:1], points[:, 1:2]
+    x1, y1 = polygon[:, 0], polygon[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+
+    # Edges that straddle each point's horizontal line...
+    straddles = (y1 <= y) != (y2 <= y)
+    # ...and cross it to the right of the point
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crossing_x = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    crosses = straddles & (x < crossing_x)
+    return np.count_nonzero(crosses, axis=1) % 2 == 1
+
+
+def validate_polygons(polygons):
+    """Normalize a list of polygons given as [[x, y], ...] fractions of the frame"""
+    if not isinstance(polygons, list) or not polygons:
+        raise ValueError('Expected a non-empty list of polygons')
+    normalized = []
+    for polygon in polygons:
+        points = np.asarray(polygon, dtype=np.float64)
+        if points.ndim != 2 or points.shape[1] != 2 or len(points) < 3:
+            raise ValueError('Each polygon needs at least three [x, y] points')
+        if points.min() < 0 or points.max() > 1:
+            raise ValueError('Polygon coordinates are fractions of the frame between 0 and 1')
+        if np.ptp(points, axis=0).min() == 0:
+            raise ValueError('Polygons must enclose an area')
+        normalized.append(points.tolist())
+    return normalized
+
+
+def parse_rois(spec):
+    """Parse a JSON object mapping stream names to lists of polygons"""
+    if not spec:
+        return {}
+    return {name: RegionOfInterest(polygons) for name, polygons in json.loads(spec).items()}
+
+
+class RegionOfInterest:
+    """Polygons a camera should look at, in fractions of the frame size.
+
+    Inference runs on the bounding rectangle of all polygons only, and
+    detections whose box centre falls outside every polygon are dropped.
+    """
+
+    def __init__(self, polygons):
+        self.polygons = validate_polygons(polygons)
+        self._pixels = {}
+
+    def pixel_polygons(self, width, height):
+        """Polygons in pixels for a frame size (cached per size)"""
+        if (width, height) not in self._pixels:
+            scale = np.array([width, height], dtype=np.float64)
+            self._pixels[(width, height)] = [np.asarray(p) * scale for p in self.polygons]
+        return self._pixels[(width, height)]
+
+    def bounds(self, width, height):
+        """Integer (x1, y1, x2, y2) rectangle enclosing every polygon"""
+        points = np.concatenate(self.pixel_polygons(width, height))
+        x1, y1 = np.floor(points.min(axis=0)).astype(int)
+        x2, y2 = np.ceil(points.max(axis=0)).astype(int)
+        return max(0, x1), max(0, y1), min(width, x2), min(height, y2)
+
+    def crop(self, frame):
+        """The part of the frame inference needs, and its (x, y) offset"""
+        x1, y1, x2, y2 = self.bounds(frame.shape[1], frame.shape[0])
+        return frame[y1:y2, x1:x2], (x1, y1)
+
+    def inside(self, boxes, width, height):
+        """Boolean mask of [x1, y1, x2, y2] boxes whose centre is in any polygon"""
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        centres = np.column_stack(((boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2))
+        mask = np.zeros(len(boxes), dtype=bool)
+        for polygon in self.pixel_polygons(width, height):
+            mask |= points_in_polygon(centres, polygon)
+        return mask
+
+    def restore(self, detections, offset, width, height):
+        """Shift crop-relative detection dicts back to the frame and keep those inside"""
+        if not detections:
+            return detections
+        dx, dy = offset
+        for detection in detections:
+            x1, y1, x2, y2 = detection['bbox']
+            detection['bbox'] = [x1 + dx, y1 + dy, x2 + dx, y2 + dy]
+        keep = self.inside([d['bbox'] for d in detections], width, height)
+        return [d for d, inside in zip(detections, keep) if inside]
@@ -0,0 +1,88 @@
+"""
+Frame sampling that avoids decoding frames nobody looks at
+"""
+
+import cv2
+
+# Sampling intervals at least this long (seconds) seek instead of grabbing
+SEEK_MIN_SECONDS = 2.0
+
+
+class VideoSampler:
+    """Iterate every stride-th frame of a capture, yielding (frame_index, frame).
+
+    Skipped frames are only grab()bed: the demuxer advances and the codec
+    keeps its reference frames, but the frame is never converted to BGR or
+    copied into a NumPy array. When the sampling interval is long enough
+    (SEEK_MIN_SECONDS) and the source is a seekable file, the sampler seeks
+    straight to the next wanted frame so whole stretches are never decoded.
+    Frame indices are 1-based, matching the frame counters elsewhere.
+    """
+
+    def __init__(self, source, stride=1, seek=None):
+        self.source = source
+        self.stride = max(1, int(stride))
+        self.capture = cv2.VideoCapture(source)
+        if not self.capture.isOpened():
+            raise FileNotFoundError(f"Could not open video source {source}")
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        if seek is None:
+            seek = self.frame_count > 0 and self.stride / self.fps >= SEEK_MIN_SECONDS
+        self.seek = seek
+        self.position = 0
+        self.retrieved = 0
+        self.grabbed = 0
+        self.seeks = 0
+
+    @classmethod
+    def every(cls, source, seconds, **kwargs):
+        """Sample one frame every `seconds` of video time"""
+        probe = cv2.VideoCapture(source)
+        fps = probe.get(cv2.CAP_PROP_FPS) or 30.0
+        probe.release()
+        return cls(source, stride=max(1, round(seconds * fps)), **kwargs)
+
+    def _seek_to(self, position):
+        """Position the capture so the next read returns frame position + 1"""
+        self.capture.set(cv2.CAP_PROP_POS_FRAMES, position)
+        self.position = position
+        self.seeks += 1
+
+    def __iter__(self):
+        try:
+            while True:
+                target = (self.position // self.stride + 1) * self.stride
+                if self.seek and target - self.position > 1:
+                    if target > self.frame_count:
+                        return
+                    self._seek_to(target - 1)
+                while self.position < target - 1:
+                    if not self.capture.grab():
+                        return
+                    self.position += 1
+                    self.grabbed += 1
+                ret, frame = self.capture.read()
+                if not ret:
+                    return
+                self.position += 1
+                self.retrieved += 1
+                yield self.position, frame
+        finally:
+            self.release()
+
+    def release(self):
+        self.capture.release()
+
+    def summary(self):
+        """How many frames were passed over and how much decoding was avoided"""
+        skipped = self.position - self.retrieved
+        return {
+            'frames': self.position,
+            'retrieved': self.retrieved,
+            'grabbed_only': self.grabbed,
+            'seeks': self.seeks,
+            'never_decoded': max(0, skipped - self.grabbed),
+            # Share of frames whose BGR conversion and copy was avoided
+            'retrieve_savings': round(skipped / self.position, 3) if self.position else 0.0
+        }
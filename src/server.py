@@ -0,0 +1,78 @@
+"""
+Server launchers for the web application
+"""
+
+import sys
+import os
+
+# Make the config package importable however we are launched
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config import settings
+
+
+def run_development(app, socketio, init_worker=None):
+    """Werkzeug development server; fine for a single local dashboard"""
+    if init_worker:
+        init_worker()
+    socketio.run(app, debug=False, host=settings.HOST, port=settings.PORT,
+                 allow_unsafe_werkzeug=True)
+
+
+def run_production(app, socketio, init_worker=None):
+    """Gunicorn with one threaded worker.
+
+    Socket.IO runs in threading mode on simple-websocket, so every viewer
+    connection holds one worker thread while the capture, inference and
+    encoding pipeline keeps running on its own native threads rather than
+    sharing an event loop with request handling. Detection state lives in
+    the worker process, so there is exactly one worker; SERVER_THREADS caps
+    concurrent viewers plus in-flight HTTP requests. init_worker runs in the
+    worker after the fork, never in the master, so database connections and
+    background threads are only ever created where they are used.
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+        import simple_websocket  # noqa: F401 (WebSocket transport for threading mode)
+    except ImportError:
+        print("Production mode needs the server extras: pip install -e .[server]")
+        sys.exit(1)
+
+    class GunicornServer(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    options = {
+        'bind': f"{settings.HOST}:{settings.PORT}",
+        'workers': 1,
+        'worker_class': 'gthread',
+        'threads': settings.SERVER_THREADS,
+        'timeout': settings.SERVER_TIMEOUT,
+        'keepalive': settings.SERVER_KEEPALIVE,
+        'backlog': settings.SERVER_BACKLOG,
+        'accesslog': '-' if settings.DEBUG else None,
+    }
+    if init_worker:
+        options['post_worker_init'] = lambda worker: init_worker()
+    GunicornServer(app, options).run()
+
+
+def run_server(app, socketio, init_worker=None):
+    """Start the server selected by SERVER_MODE.
+
+    init_worker, if given, builds the serving process's state up front
+    instead of on the first request.
+    """
+    if settings.SERVER_MODE == 'production':
+        run_production(app, socketio, init_worker)
+    else:
+        run_development(app, socketio, init_worker)
@@ -0,0 +1,238 @@
+"""
+Frames shared between processes through a ring of preallocated shared-memory slots
+"""
+
+import multiprocessing
+import os
+import queue
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+# Largest frame a slot holds by default; bigger frames are scaled down to fit
+DEFAULT_SLOT_SHAPE = (1080, 1920, 3)
+# Tag of the ready item a producer posts once it has allocated a lazy ring
+ALLOCATED = 'allocated'
+
+
+def spawn_context():
+    """Processes are spawned, never forked, so no model or thread state is inherited"""
+    return multiprocessing.get_context('spawn')
+
+
+class FrameRing:
+    """Fixed frame slots in one shared-memory block, handed around by index.
+
+    The producer takes a free slot index, writes pixels into the slot in
+    place and puts (slot, frame_id, timestamp, height, width) on the ready
+    queue. Whoever finishes with the frame puts the index back on the free
+    queue. Only these small tuples are pickled, never pixels. When no slot
+    is free the producer drops frames instead of waiting, so a slow
+    consumer never stalls capture.
+
+    With shape None the slots are left for the producer to allocate()
+    once it knows its frame size; the ring's creator attaches to them when
+    take_latest() meets the announcement, and still owns the block.
+    """
+
+    def __init__(self, slots=4, shape=DEFAULT_SLOT_SHAPE, context=None):
+        context = context or spawn_context()
+        self.slots = slots
+        self.shape = self.shm = self.buffer = None
+        self.owner = True
+        self.free = context.Queue()
+        self.ready = context.Queue()
+        self.dropped = context.Value('L', 0)
+        self.ended = False
+        for slot in range(slots):
+            self.free.put(slot)
+        if shape is not None:
+            self.allocate(shape)
+
+    def allocate(self, shape):
+        """Create the shared slots for frames of up to shape and announce them to the creator"""
+        self._attach(shared_memory.SharedMemory(create=True, size=self.slots * int(np.prod(shape))),
+                     shape)
+        if not self.owner:
+            self.ready.put((ALLOCATED, self.shm.name, self.shape))
+
+    def _attach(self, shm, shape):
+        self.shm = shm
+        self.shape = tuple(shape)
+        self.slot_bytes = int(np.prod(self.shape))
+        self.buffer = np.ndarray((self.slots, self.slot_bytes), dtype=np.uint8, buffer=self.shm.buf)
+
+    def __getstate__(self):
+        return {'name': self.shm.name if self.shm else None, 'slots': self.slots,
+                'shape': self.shape, 'free': self.free, 'ready': self.ready,
+                'dropped': self.dropped}
+
+    def __setstate__(self, state):
+        name = state.pop('name')
+        self.__dict__.update(state)
+        self.shm = self.buffer = None
+        # Spawned children share the creator's resource tracker, which unlinks
+        # the block only if the creator dies without close()
+        self.owner = False
+        self.ended = False
+        if name:
+            self._attach(shared_memory.SharedMemory(name=name), self.shape)
+
+    def frame(self, slot, height, width):
+        """A (height, width, 3) view of a slot; no pixels are copied"""
+        return self.buffer[slot, :height * width * 3].reshape(height, width, 3)
+
+    def fit(self, height, width):
+        """Frame size that fits a slot, keeping the aspect ratio"""
+        scale = min(1.0, self.shape[0] / height, self.shape[1] / width)
+        return int(height * scale), int(width * scale)
+
+    def take_latest(self, timeout=0.0):
+        """Newest ready item, handing any older ones straight back to the free queue.
+
+        Returns None when nothing arrived within timeout or the producer has
+        ended (see ended).
+        """
+        items = []
+        try:
+            items.append(self.ready.get(timeout=timeout) if timeout else self.ready.get_nowait())
+            while True:
+                items.append(self.ready.get_nowait())
+        except queue.Empty:
+            pass
+        if None in items:
+            self.ended = True
+            items.remove(None)
+        if items and items[0][0] == ALLOCATED:
+            # A single producer announces its slots before any frame
+            _, name, shape = items.pop(0)
+            self._attach(shared_memory.SharedMemory(name=name), shape)
+        for stale in items[:-1]:
+            self.free.put(stale[0])
+        return items[-1] if items else None
+
+    def close(self):
+        if self.owner and self.shm is None:
+            # The producer may have allocated slots nobody read from yet
+            self.take_latest()
+        if self.shm is None:
+            return
+        self.buffer = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # A view of a slot is still alive; the mapping goes when the process does
+            pass
+        if self.owner:
+            self.shm.unlink()
+            self.owner = False
+
+
+def open_capture(source, width=None, height=None, fps=None):
+    """cv2.VideoCapture with the requested size and rate applied to devices"""
+    cap = cv2.VideoCapture(source)
+    if isinstance(source, int):
+        if width:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        if height:
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if fps:
+            cap.set(cv2.CAP_PROP_FPS, fps)
+    return cap
+
+
+def capture_frames(ring, source, stop, width=None, height=None, fps=None):
+    """Capture process: decode frames from source straight into free ring slots.
+
+    Devices stop on a read failure (StreamManager restarts them), network
+    streams reconnect with a short backoff and local files are paced to
+    their FPS and looped, like streams.VideoStream. A None on the ready
+    queue marks the end.
+    """
+    cap = open_capture(source, width, height, fps)
+    is_file = isinstance(source, str) and os.path.isfile(source)
+    interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or fps or 30) if is_file else 0
+    # Decode straight into a slot at the size the source reports
+    reported = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or height or DEFAULT_SLOT_SHAPE[0],
+                int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or width or DEFAULT_SLOT_SHAPE[1])
+    if ring.shape is None:
+        ring.allocate((*reported, 3))
+    size = ring.fit(*reported)
+    frame_id = 0
+    failures = 0
+    try:
+        while not stop.is_set():
+            start_time = time.time()
+            try:
+                slot = ring.free.get_nowait()
+            except queue.Empty:
+                slot = None
+
+            if slot is None:
+                # Every slot is in use downstream: drain the source without decoding
+                ret = cap.grab()
+                if ret:
+                    with ring.dropped.get_lock():
+                        ring.dropped.value += 1
+            else:
+                target = ring.frame(slot, *size)
+                ret, frame = cap.read(target)
+                if ret and frame.__array_interface__['data'][0] != target.__array_interface__['data'][0]:
+                    # A different frame size: OpenCV decoded into its own buffer once
+                    size = ring.fit(*frame.shape[:2])
+                    target = ring.frame(slot, *size)
+                    if frame.shape[:2] == size:
+                        target[...] = frame
+                    else:
+                        cv2.resize(frame, (size[1], size[0]), dst=target)
+                if ret:
+                    frame_id += 1
+                    ring.ready.put((slot, frame_id, time.time(), size[0], size[1]))
+                else:
+                    ring.free.put(slot)
+
+            if not ret:
+                failures += 1
+                if is_file and failures == 1:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                if isinstance(source, int) or failures > 5:
+                    print(f"Error reading from {source}")
+                    break
+                time.sleep(min(failures, 5))
+                cap.release()
+                cap = open_capture(source, width, height, fps)
+                continue
+
+            failures = 0
+            if interval:
+                time.sleep(max(0, interval - (time.time() - start_time)))
+    finally:
+        cap.release()
+        ring.ready.put(None)
+        ring.close()
+
+
+def display_frames(ring, results, stop, draw, window):
+    """Display process: annotate frames in place of the caller and show them.
+
+    results carries (slot, height, width, payload) tuples; draw(frame,
+    payload) returns the annotated copy, after which the slot is free
+    again. Pressing 'q' sets stop; a None on results ends the process.
+    """
+    try:
+        while True:
+            item = results.get()
+            if item is None:
+                break
+            slot, height, width, payload = item
+            annotated = draw(ring.frame(slot, height, width), payload)
+            ring.free.put(slot)
+            cv2.imshow(window, annotated)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                stop.set()
+    finally:
+        cv2.destroyAllWindows()
+        ring.close()
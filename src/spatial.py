@@ -0,0 +1,139 @@
+"""
+Numeric bounding-box columns and an R*Tree index for region queries
+"""
+
+import sqlite3
+
+BOX_COLUMNS = ('x1', 'y1', 'x2', 'y2')
+
+# Exact box tests on the stored columns
+REGION_MODES = {
+    # Box overlaps the region at all
+    'intersects': 'd.x1 <= ? AND d.x2 >= ? AND d.y1 <= ? AND d.y2 >= ?',
+    # Box lies entirely inside the region
+    'within': 'd.x1 >= ? AND d.x2 <= ? AND d.y1 >= ? AND d.y2 <= ?',
+    # Box covers the whole region
+    'contains': 'd.x1 <= ? AND d.x2 >= ? AND d.y1 <= ? AND d.y2 >= ?',
+}
+
+# R*Tree coordinates are rounded outwards to 32-bit floats, so the index is
+# only used for the intersection test, which is a superset for every mode
+RTREE_INTERSECTS = 'r.min_x <= ? AND r.max_x >= ? AND r.min_y <= ? AND r.max_y >= ?'
+
+
+def _region_params(mode, region):
+    x1, y1, x2, y2 = region
+    if mode == 'intersects':
+        return [x2, x1, y2, y1]
+    return [x1, x2, y1, y2]
+
+
+def init_spatial_index(conn):
+    """Add box columns to detections and keep an R*Tree index in sync.
+
+    Existing rows that only have the legacy JSON bbox are backfilled once.
+    The index is filled from the table only while its sync triggers are
+    missing: they are created in the same transaction as the backfill, so
+    they double as the marker that it completed and later startups skip
+    the scan. Returns False when SQLite was built without the R*Tree
+    module, in which case region queries fall back to scanning the numeric
+    columns.
+    """
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(detections)')}
+    missing = [column for column in BOX_COLUMNS if column not in columns]
+    for column in missing:
+        conn.execute(f'ALTER TABLE detections ADD COLUMN {column} REAL')
+    if missing and 'bbox' in columns:
+        conn.execute('''
+            UPDATE detections SET
+                x1 = json_extract(bbox, '$[0]'), y1 = json_extract(bbox, '$[1]'),
+                x2 = json_extract(bbox, '$[2]'), y2 = json_extract(bbox, '$[3]')
+            WHERE bbox IS NOT NULL AND x1 IS NULL
+        ''')
+
+    try:
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS detections_rtree
+            USING rtree(id, min_x, max_x, min_y, max_y)
+        ''')
+    except sqlite3.OperationalError:
+        return False
+
+    synced = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN "
+        "('detections_rtree_insert', 'detections_rtree_delete')").fetchone()[0] == 2
+    if synced:
+        return True
+
+    conn.execute('''
+        INSERT INTO detections_rtree
+        SELECT id, x1, x2, y1, y2 FROM detections
+        WHERE x1 IS NOT NULL AND id NOT IN (SELECT id FROM detections_rtree)
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS detections_rtree_insert
+        AFTER INSERT ON detections WHEN NEW.x1 IS NOT NULL
+        BEGIN
+            INSERT INTO detections_rtree VALUES (NEW.id, NEW.x1, NEW.x2, NEW.y1, NEW.y2);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS detections_rtree_delete
+        AFTER DELETE ON detections
+        BEGIN
+            DELETE FROM detections_rtree WHERE id = OLD.id;
+        END
+    ''')
+    return True
+
+
+def query_region(conn, region, mode='intersects', start=None, end=None, class_name=None,
+                 image_path=None, limit=None, use_rtree=True):
+    """Detections whose box intersects, lies within or contains a region.
+
+    region is (x1, y1, x2, y2) in pixels. Candidates come from the R*Tree
+    and the exact box test and remaining filters run on those rows only.
+    """
+    if mode not in REGION_MODES:
+        raise ValueError(f"Unknown region mode '{mode}'")
+
+    clauses = [REGION_MODES[mode]]
+    params = _region_params(mode, region)
+    if use_rtree:
+        source = 'detections_rtree r JOIN detections d ON d.id = r.id'
+        clauses.insert(0, RTREE_INTERSECTS)
+        params = _region_params('intersects', region) + params
+    else:
+        source = 'detections d'
+
+    if start:
+        clauses.append('d.timestamp >= ?')
+        params.append(start)
+    if end:
+        clauses.append('d.timestamp < ?')
+        params.append(end)
+    if class_name:
+        clauses.append('d.class_name = ?')
+        params.append(class_name)
+    if image_path:
+        clauses.append('d.image_path = ?')
+        params.append(image_path)
+
+    sql = f'''
+        SELECT d.id, d.timestamp, d.class_name, d.confidence, d.x1, d.y1, d.x2, d.y2, d.image_path
+        FROM {source}
+        WHERE {' AND '.join(clauses)}
+        ORDER BY d.timestamp, d.id
+    '''
+    if limit:
+        sql += ' LIMIT ?'
+        params.append(limit)
+
+    return [{
+        'id': row[0],
+        'timestamp': row[1],
+        'class': row[2],
+        'confidence': row[3],
+        'bbox': list(row[4:8]),
+        'image_path': row[8]
+    } for row in conn.execute(sql, params)]
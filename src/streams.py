@@ -0,0 +1,338 @@
+"""
+Multi-stream video ingestion for the web application
+"""
+
+import os
+import re
+import threading
+import time
+
+import cv2
+
+from sharedframes import FrameRing, capture_frames, spawn_context
+
+
+def parse_source(source):
+    """Convert a source spec into something cv2.VideoCapture accepts"""
+    if isinstance(source, int):
+        return source
+    source = str(source).strip()
+    if source.isdigit():
+        return int(source)
+    return source
+
+
+def parse_stream_sources(spec):
+    """Parse a 'name=source,name=source' spec into an ordered dict.
+
+    Names are word characters only; an item without one is an unnamed source.
+    """
+    streams = {}
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, source = item.partition('=')
+        # 'rtsp://cam/live?channel=1' has an '=' but no name in front of it
+        if not sep or not re.fullmatch(r'\w+', name.strip()):
+            name, source = f"stream{len(streams)}", item
+        streams[name.strip()] = source.strip()
+    return streams
+
+
+class VideoStream:
+    """Background capture for a single named source.
+
+    Device indices and RTSP URLs are read as fast as the source delivers
+    frames. Local video files are paced to their native FPS and looped so
+    they can stand in for a live camera.
+    """
+
+    def __init__(self, name, source, width=640, height=480, fps=30):
+        self.name = name
+        self.source = parse_source(source)
+        self.is_device = isinstance(self.source, int)
+        self.is_file = isinstance(self.source, str) and os.path.isfile(self.source)
+        self.width = width
+        self.height = height
+        self.fps = fps
+
+        self.cap = None
+        self.thread = None
+        self.is_running = False
+        self.lock = threading.Lock()
+        self.frame = None
+        self.frame_id = 0
+
+    def open(self):
+        """Open the capture and apply camera settings for devices"""
+        cap = cv2.VideoCapture(self.source)
+        if self.is_device:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            cap.set(cv2.CAP_PROP_FPS, self.fps)
+        return cap
+
+    def start(self):
+        """Start the capture thread"""
+        if self.is_running:
+            return
+        self.cap = self.open()
+        self.is_running = True
+        self.thread = threading.Thread(target=self._reader, daemon=True)
+        self.thread.start()
+
+    def _reader(self):
+        """Keep the latest frame from the source available to the sampler"""
+        interval = 0
+        if self.is_file:
+            interval = 1.0 / (self.cap.get(cv2.CAP_PROP_FPS) or self.fps)
+
+        failures = 0
+        while self.is_running:
+            start_time = time.time()
+            ret, frame = self.cap.read()
+
+            if not ret:
+                failures += 1
+                if self.is_file and failures == 1:
+                    # End of file: rewind and keep looping
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                if self.is_device or failures > 5:
+                    print(f"Error reading from stream '{self.name}'")
+                    break
+                # Network streams drop occasionally; reconnect with a short backoff
+                time.sleep(min(failures, 5))
+                self.cap.release()
+                self.cap = self.open()
+                continue
+
+            failures = 0
+            with self.lock:
+                self.frame = frame
+                self.frame_id += 1
+
+            if interval:
+                time.sleep(max(0, interval - (time.time() - start_time)))
+
+        self.is_running = False
+        self.cap.release()
+
+    def read(self):
+        """Return the id and pixels of the most recent frame"""
+        with self.lock:
+            return self.frame_id, self.frame
+
+    def restart(self):
+        """Stop whatever is left of a previous capture and start a fresh one"""
+        self.stop()
+        self.start()
+
+    def stop(self):
+        """Stop the capture thread and release the source"""
+        self.is_running = False
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2.0)
+        self.thread = None
+
+    def describe(self):
+        return {
+            'name': self.name,
+            'source': str(self.source),
+            'running': self.is_running,
+            'frame_id': self.frame_id
+        }
+
+
+class ProcessVideoStream(VideoStream):
+    """VideoStream whose capture runs in its own process.
+
+    Frames arrive through a FrameRing, so capture keeps its own core and
+    GIL. read() returns a view of a shared slot that stays valid until the
+    next read() of this stream; copy it to keep it longer. As with
+    VideoStream, width and height only apply to devices: other sources
+    keep their own frame size. The capture process sizes the slots from
+    the first frame size its source reports, unless slot_shape fixes them;
+    frames larger than the slots are scaled down to fit.
+    """
+
+    def __init__(self, name, source, width=640, height=480, fps=30, slots=3,
+                 slot_shape=None):
+        super().__init__(name, source, width, height, fps)
+        self.slots = slots
+        self.slot_shape = slot_shape
+        self.ring = None
+        self.process = None
+        self.stop_event = None
+        self.held = None
+
+    def start(self):
+        """Start the capture process"""
+        if self.is_running:
+            return
+        context = spawn_context()
+        self.ring = FrameRing(self.slots, self.slot_shape, context)
+        self.stop_event = context.Event()
+        self.process = context.Process(
+            target=capture_frames, daemon=True,
+            args=(self.ring, self.source, self.stop_event, self.width, self.height, self.fps))
+        self.is_running = True
+        self.process.start()
+
+    def read(self):
+        """Return the id and a shared view of the most recent frame"""
+        with self.lock:
+            if self.ring is None:
+                return self.frame_id, None
+            item = self.ring.take_latest()
+            if self.ring.ended:
+                self.is_running = False
+            if item is not None:
+                if self.held is not None:
+                    self.ring.free.put(self.held[0])
+                self.held = item
+                self.frame_id += 1
+            if self.held is None:
+                return self.frame_id, None
+            slot, _, _, height, width = self.held
+            return self.frame_id, self.ring.frame(slot, height, width)
+
+    def stop(self):
+        """Stop the capture process and free the shared memory"""
+        self.is_running = False
+        with self.lock:
+            if self.process is None:
+                return
+            self.stop_event.set()
+            self.process.join(timeout=2.0)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.ring.close()
+            self.ring = self.process = self.held = None
+
+    def describe(self):
+        return dict(super().describe(), process=self.process.pid if self.process else None,
+                    dropped=self.ring.dropped.value if self.ring else 0)
+
+
+class StreamManager:
+    """Registry of named streams that are sampled together once per tick.
+
+    With capture_processes each stream captures in its own process
+    (ProcessVideoStream) instead of a thread. An active stream whose
+    capture has stopped on its own, such as an unplugged device, is
+    restarted by sample() at most once every restart_interval seconds.
+    """
+
+    def __init__(self, max_streams=16, width=640, height=480, fps=30, capture_processes=False,
+                 restart_interval=5.0):
+        self.max_streams = max_streams
+        self.restart_interval = restart_interval
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.stream_class = ProcessVideoStream if capture_processes else VideoStream
+        self.streams = {}
+        self.last_sampled = {}
+        self.restarted_at = {}
+        self.active = set()
+        self.is_running = False
+        self.lock = threading.Lock()
+
+    def add(self, name, source):
+        """Register a stream, starting it if the manager is running"""
+        with self.lock:
+            if name in self.streams:
+                raise ValueError(f"Stream '{name}' already exists")
+            if len(self.streams) >= self.max_streams:
+                raise ValueError(f"Stream limit of {self.max_streams} reached")
+            stream = self.stream_class(name, source, self.width, self.height, self.fps)
+            self.streams[name] = stream
+            self.last_sampled[name] = 0
+            if self.is_running:
+                self.active.add(name)
+        if self.is_running:
+            stream.start()
+        return stream
+
+    def remove(self, name):
+        """Stop and unregister a stream"""
+        with self.lock:
+            stream = self.streams.pop(name, None)
+            self.last_sampled.pop(name, None)
+            self.restarted_at.pop(name, None)
+            self.active.discard(name)
+        if stream is None:
+            raise KeyError(name)
+        stream.stop()
+
+    def names(self):
+        with self.lock:
+            return list(self.streams)
+
+    def describe(self):
+        with self.lock:
+            return [stream.describe() for stream in self.streams.values()]
+
+    def start_all(self, names=None):
+        """Start capture for every stream, or only the named ones"""
+        self.is_running = True
+        with self.lock:
+            self.active = set(self.streams) if names is None else set(names)
+            streams = [stream for name, stream in self.streams.items() if name in self.active]
+        for stream in streams:
+            stream.start()
+
+    def stop_all(self):
+        self.is_running = False
+        with self.lock:
+            streams = list(self.streams.values())
+        for stream in streams:
+            stream.stop()
+
+    def set_active(self, names):
+        """Capture only the named streams, starting and stopping on changes"""
+        names = set(names)
+        with self.lock:
+            if names == self.active:
+                return
+            started = [self.streams[name] for name in names - self.active if name in self.streams]
+            stopped = [self.streams[name] for name in self.active - names if name in self.streams]
+            self.active = names
+        for stream in started:
+            stream.start()
+        for stream in stopped:
+            stream.stop()
+
+    def sample(self, names=None):
+        """Collect one fresh frame per stream for a batched model call.
+
+        Returns a list of (name, frame_id, frame, is_device) tuples, skipping
+        streams that have not produced a new frame since the previous tick.
+        When names is given only those streams are sampled.
+        """
+        with self.lock:
+            streams = [stream for name, stream in self.streams.items()
+                       if names is None or name in names]
+        self.restart_stopped(streams)
+
+        batch = []
+        for stream in streams:
+            frame_id, frame = stream.read()
+            if frame is None or frame_id == self.last_sampled.get(stream.name):
+                continue
+            self.last_sampled[stream.name] = frame_id
+            batch.append((stream.name, frame_id, frame, stream.is_device))
+        return batch
+
+    def restart_stopped(self, streams):
+        """Restart active streams whose capture gave up, with a pause between attempts"""
+        now = time.time()
+        for stream in streams:
+            if (not self.is_running or stream.is_running or stream.name not in self.active
+                    or now - self.restarted_at.get(stream.name, 0) < self.restart_interval):
+                continue
+            self.restarted_at[stream.name] = now
+            print(f"Restarting stream '{stream.name}'")
+            stream.restart()
@@ -0,0 +1,141 @@
+"""
+Sliced inference helpers: overlapping tiles and cross-tile box merging
+"""
+
+import numpy as np
+
+
+def tile_starts(length, tile_size, overlap):
+    """Start offsets of overlapping tiles covering [0, length); the last one ends flush"""
+    if length <= tile_size:
+        return [0]
+    step = max(1, int(tile_size * (1 - overlap)))
+    starts = list(range(0, length - tile_size, step))
+    starts.append(length - tile_size)
+    return starts
+
+
+def tile_windows(width, height, tile_size=640, overlap=0.2):
+    """(x1, y1, x2, y2) windows of tile_size squares overlapping by the given fraction"""
+    return [(x, y, min(x + tile_size, width), min(y + tile_size, height))
+            for y in tile_starts(height, tile_size, overlap)
+            for x in tile_starts(width, tile_size, overlap)]
+
+
+def nms(boxes, scores, class_ids, threshold=0.5, metric='iou'):
+    """Class-aware non-maximum suppression; returns kept indices, best first.
+
+    metric 'iou' is the usual intersection over union; 'ios' divides by the
+    smaller box instead, so a box nested inside a larger one counts as a copy.
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    # Offset each class into its own coordinate range so classes never suppress each other
+    offsets = class_ids.astype(np.float64)[:, None] * (boxes.max() + 1)
+    shifted = boxes.astype(np.float64) + offsets
+    x1, y1, x2, y2 = shifted.T
+    areas = (x2 - x1) * (y2 - y1)
+
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        ix1 = np.maximum(x1[best], x1[rest])
+        iy1 = np.maximum(y1[best], y1[rest])
+        ix2 = np.minimum(x2[best], x2[rest])
+        iy2 = np.minimum(y2[best], y2[rest])
+        intersection = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+        if metric == 'ios':
+            denominator = np.minimum(areas[best], areas[rest])
+        else:
+            denominator = areas[best] + areas[rest] - intersection
+        overlap = intersection / np.maximum(denominator, 1e-9)
+        order = rest[overlap <= threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def touches_seam(boxes, window, width, height, margin=2):
+    """Mask of boxes (in window coordinates) that end at an edge of window inside the frame.
+
+    Such a box may be an object cut short by the tile; edges on the frame
+    border cut nothing.
+    """
+    x1, y1, x2, y2 = window
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    return (((boxes[:, 0] <= margin) & (x1 > 0))
+            | ((boxes[:, 1] <= margin) & (y1 > 0))
+            | ((boxes[:, 2] >= x2 - x1 - margin) & (x2 < width))
+            | ((boxes[:, 3] >= y2 - y1 - margin) & (y2 < height)))
+
+
+def merge_seam_copies(class_ids, scores, boxes, at_seam, threshold=0.6):
+    """Fold boxes cut at a tile seam into the overlapping box of the same object.
+
+    A pair of same-class boxes where at least one touches a seam and the
+    intersection covers more than threshold of the smaller box is one
+    object: the more confident box stays and grows to the union of both.
+    Boxes away from seams are never merged, so a genuinely nested object
+    survives. Returns kept indices and the merged boxes.
+    """
+    boxes = boxes.copy()
+    merged = np.zeros(len(boxes), dtype=bool)
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    order = np.argsort(-scores, kind='stable')
+    for position, best in enumerate(order):
+        if merged[best]:
+            continue
+        rest = order[position + 1:]
+        rest = rest[~merged[rest] & (class_ids[rest] == class_ids[best])
+                    & (at_seam[rest] | at_seam[best])]
+        if not rest.size:
+            continue
+        ix1 = np.maximum(boxes[best, 0], boxes[rest, 0])
+        iy1 = np.maximum(boxes[best, 1], boxes[rest, 1])
+        ix2 = np.minimum(boxes[best, 2], boxes[rest, 2])
+        iy2 = np.minimum(boxes[best, 3], boxes[rest, 3])
+        intersection = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+        copies = rest[intersection / np.maximum(np.minimum(areas[best], areas[rest]), 1e-9) > threshold]
+        if copies.size:
+            boxes[best, :2] = np.minimum(boxes[best, :2], boxes[copies, :2].min(axis=0))
+            boxes[best, 2:] = np.maximum(boxes[best, 2:], boxes[copies, 2:].max(axis=0))
+            merged[copies] = True
+    keep = np.flatnonzero(~merged)
+    return keep, boxes[keep]
+
+
+def merge_tiles(tile_results, threshold=0.5, metric='iou', seam_threshold=0.6):
+    """Map per-tile (x_offset, y_offset, class_ids, scores, boxes[, at_seam]) to global coordinates and merge.
+
+    Objects on a seam are seen by both neighbouring tiles (and the optional
+    full-frame pass); NMS keeps the most confident copy of each. A tile may
+    add an at_seam mask (see touches_seam) for boxes that end at one of its
+    inner edges; before NMS those are joined with their copy from the
+    neighbouring tile by merge_seam_copies. Returns (class_ids, scores,
+    boxes) in global pixels.
+    """
+    class_ids, scores, boxes, at_seam = [], [], [], []
+    for x_offset, y_offset, tile_classes, tile_scores, tile_boxes, *tile_seam in tile_results:
+        if len(tile_classes) == 0:
+            continue
+        class_ids.append(np.asarray(tile_classes))
+        scores.append(np.asarray(tile_scores))
+        boxes.append(np.asarray(tile_boxes, dtype=np.float32).reshape(-1, 4)
+                     + np.array([x_offset, y_offset, x_offset, y_offset], dtype=np.float32))
+        at_seam.append(np.asarray(tile_seam[0], dtype=bool) if tile_seam
+                       else np.zeros(len(tile_classes), dtype=bool))
+    if not class_ids:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), np.empty((0, 4), dtype=np.float32)
+
+    class_ids = np.concatenate(class_ids)
+    scores = np.concatenate(scores)
+    boxes = np.concatenate(boxes)
+    at_seam = np.concatenate(at_seam)
+    if at_seam.any():
+        # Join cut-off pieces first so NMS compares whole objects
+        merged, boxes = merge_seam_copies(class_ids, scores, boxes, at_seam, seam_threshold)
+        class_ids, scores = class_ids[merged], scores[merged]
+    keep = nms(boxes, scores, class_ids, threshold, metric)
+    return class_ids[keep], scores[keep], boxes[keep]
@@ -0,0 +1,131 @@
+"""
+Frame-to-frame association of detections and track-level events
+"""
+
+import time
+
+
+def box_iou(a, b):
+    """Intersection over union of two [x1, y1, x2, y2] boxes"""
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    intersection = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    if intersection == 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return intersection / (area_a + area_b - intersection)
+
+
+class IdentityTracker:
+    """Assign stable ids to boxes across consecutive frames by greedy IoU.
+
+    A box keeps its id while it overlaps a box of the same class in the
+    previous frame by at least iou_threshold. Tracks that go unmatched are
+    kept for max_missing frames so brief dropouts do not create new ids.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_missing=0):
+        self.iou_threshold = iou_threshold
+        self.max_missing = max_missing
+        self.tracks = {}
+        self.missing = {}
+        self.expired = []
+        self.next_id = 1
+
+    def update(self, detections):
+        """Return (track_id, detection) pairs for the current frame"""
+        candidates = []
+        for index, detection in enumerate(detections):
+            for track_id, previous in self.tracks.items():
+                if previous['class'] != detection['class']:
+                    continue
+                overlap = box_iou(previous['bbox'], detection['bbox'])
+                if overlap >= self.iou_threshold:
+                    candidates.append((overlap, index, track_id))
+
+        assigned = {}
+        used_tracks = set()
+        for overlap, index, track_id in sorted(candidates, reverse=True):
+            if index in assigned or track_id in used_tracks:
+                continue
+            assigned[index] = track_id
+            used_tracks.add(track_id)
+
+        matched = []
+        for index, detection in enumerate(detections):
+            track_id = assigned.get(index)
+            if track_id is None:
+                track_id = self.next_id
+                self.next_id += 1
+            self.tracks[track_id] = detection
+            self.missing[track_id] = 0
+            matched.append((track_id, detection))
+
+        current = {track_id for track_id, _ in matched}
+        self.expired = []
+        for track_id in list(self.tracks):
+            if track_id in current:
+                continue
+            self.missing[track_id] += 1
+            if self.missing[track_id] > self.max_missing:
+                del self.tracks[track_id]
+                del self.missing[track_id]
+                self.expired.append(track_id)
+
+        return matched
+
+
+class EventAggregator:
+    """Collapse per-frame detections into one event per object appearance.
+
+    Detections are associated across frames with an IdentityTracker. Each
+    track accumulates first/last seen times, peak confidence, the number of
+    frames it was seen in and a box trajectory sampled at most once every
+    trajectory_interval seconds. An event is finished once its track has
+    been missing for more than max_missing processed frames.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_missing=10, trajectory_interval=1.0,
+                 max_trajectory=300):
+        self.tracker = IdentityTracker(iou_threshold, max_missing)
+        self.trajectory_interval = trajectory_interval
+        self.max_trajectory = max_trajectory
+        self.events = {}
+
+    def update(self, detections, now=None):
+        """Add one frame of detections; returns events for objects that left"""
+        now = time.time() if now is None else now
+
+        for track_id, detection in self.tracker.update(detections):
+            bbox = [round(value, 1) for value in detection['bbox']]
+            event = self.events.get(track_id)
+            if event is None:
+                self.events[track_id] = {
+                    'track_id': track_id,
+                    'class': detection['class'],
+                    'first_seen': now,
+                    'last_seen': now,
+                    'peak_confidence': detection['confidence'],
+                    'frames': 1,
+                    'trajectory': [[0.0] + bbox]
+                }
+                continue
+
+            event['last_seen'] = now
+            event['frames'] += 1
+            event['peak_confidence'] = max(event['peak_confidence'], detection['confidence'])
+            offset = round(now - event['first_seen'], 2)
+            if (offset - event['trajectory'][-1][0] >= self.trajectory_interval
+                    and len(event['trajectory']) < self.max_trajectory):
+                event['trajectory'].append([offset] + bbox)
+
+        return [self.events.pop(track_id) for track_id in self.tracker.expired
+                if track_id in self.events]
+
+    def flush(self):
+        """Finish every open event, e.g. when the source stops"""
+        finished = list(self.events.values())
+        self.events = {}
+        self.tracker = IdentityTracker(self.tracker.iou_threshold, self.tracker.max_missing)
+        return finished
@@ -0,0 +1,180 @@
+"""
+Watch a spool directory for new images: inotify on Linux, polling elsewhere
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+
+from manifest import scan_files
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """Kernel notifications for files finished writing or moved into the tree.
+
+    Only IN_CLOSE_WRITE and IN_MOVED_TO are reported for files, so nothing
+    is seen while a file is still open for writing. New subdirectories are
+    watched as they appear and scanned once for files created before the
+    watch was added. On queue overflow the whole tree is reported again.
+    """
+
+    def __init__(self, root, extensions):
+        self.root = root
+        self.extensions = extensions
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.watches = {}
+        try:
+            for directory, _, _ in os.walk(root):
+                self._watch(directory)
+        except OSError:
+            self.close()
+            raise
+
+    def _watch(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self.watches[wd] = directory
+
+    def changes(self, timeout):
+        """Paths of matching files written or moved in, waiting up to timeout seconds"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        paths = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                return [path for path, _, _ in scan_files(self.root, self.extensions)]
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    paths.extend(self._watch_tree(path))
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO) and name.lower().endswith(self.extensions):
+                paths.append(path)
+        return paths
+
+    def _watch_tree(self, directory):
+        try:
+            for subdirectory, _, _ in os.walk(directory):
+                self._watch(subdirectory)
+        except OSError as e:
+            if e.errno not in (errno.ENOENT, errno.ENOTDIR):
+                raise
+        return [path for path, _, _ in scan_files(directory, self.extensions)]
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher:
+    """Rescan the tree every interval seconds and report new or changed files"""
+
+    def __init__(self, root, extensions, interval=2.0):
+        self.root = root
+        self.extensions = extensions
+        self.interval = interval
+        self.known = self._scan()
+        self.next_scan = time.monotonic() + interval
+
+    def _scan(self):
+        return {path: (size, mtime_ns) for path, size, mtime_ns in scan_files(self.root, self.extensions)}
+
+    def changes(self, timeout):
+        wait = self.next_scan - time.monotonic()
+        if wait > timeout:
+            time.sleep(max(0.0, timeout))
+            return []
+        time.sleep(max(0.0, wait))
+        current = self._scan()
+        self.next_scan = time.monotonic() + self.interval
+        changed = [path for path, state in current.items() if self.known.get(path) != state]
+        self.known = current
+        return changed
+
+    def close(self):
+        pass
+
+
+def open_watcher(root, extensions, poll_interval=2.0, polling=False):
+    """inotify where available, otherwise (or when asked) a polling watcher"""
+    if not polling and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root, extensions)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}), polling every {poll_interval}s")
+    return PollingWatcher(root, extensions, poll_interval)
+
+
+class Debouncer:
+    """Hold changed paths until their size and mtime stop changing.
+
+    A file is ready once it has looked the same for settle seconds, so a
+    copy in progress is not read half written. Files that disappear
+    while waiting are dropped.
+    """
+
+    def __init__(self, settle=1.0):
+        self.settle = settle
+        self.pending = {}
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, path):
+        self.pending.setdefault(path, (None, None, None))
+
+    def ready(self, now=None):
+        """(path, size, mtime_ns) of files that have settled, in path order"""
+        now = time.monotonic() if now is None else now
+        settled = []
+        for path, (size, mtime_ns, since) in list(self.pending.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self.pending[path]
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                self.pending[path] = (stat.st_size, stat.st_mtime_ns, now)
+            elif now - since >= self.settle:
+                settled.append((path, size, mtime_ns))
+                del self.pending[path]
+        return sorted(settled)
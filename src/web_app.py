@@ -1,9 +1,9 @@
-from flask import Flask, render_template, request, jsonify
-from flask_socketio import SocketIO, emit
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
+from flask_socketio import SocketIO, emit, join_room, leave_room
+from werkzeug.local import LocalProxy
 import cv2
-import base64
 import json
-import sqlite3
+import sys
 from datetime import datetime
 from ultralytics import YOLO
 import threading
@@ -11,19 +11,72 @@ import os
 import time
 from collections import deque
 
+# Make sibling modules and the config package importable however we are launched
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config import settings
+from database import (ConnectionPool, fetch_history_page, init_event_table, insert_events,
+                      normalize_timestamp)
+from decoding import read_image, scale_bbox
+from deltas import DetectionDeltas
+from encoding import ViewerRegistry, encode_frame
+from inference import InferenceService, PRIORITY_BULK, PRIORITY_LIVE
+from recording import ClipRecorder, ClipWriter, parse_triggers
+from retention import RetentionManager
+from roi import RegionOfInterest, parse_rois
+from server import run_server
+from tracking import EventAggregator
+from streams import StreamManager, parse_stream_sources
+
 app = Flask(__name__, static_folder='../assets/static', template_folder='../assets/templates')
 app.config['SECRET_KEY'] = 'mit_photobooth_detection_2024'
-socketio = SocketIO(app, cors_allowed_origins="*")
+# Threading mode keeps the detection pipeline on native threads under both servers
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 
 class PhotoBoothDetector:
-    def __init__(self):
+    def __init__(self, db_path='photobooth_detections.db'):
         self.model = YOLO('yolo11n.pt')
         self.detection_log = deque(maxlen=50)
         self.is_running = False
-        self.cap = None
-        self.db = self.init_database()
+        self.streams = StreamManager(
+            max_streams=settings.MAX_STREAMS,
+            width=settings.CAMERA_WIDTH,
+            height=settings.CAMERA_HEIGHT,
+            fps=settings.CAMERA_FPS,
+            capture_processes=settings.CAPTURE_PROCESSES
+        )
+        for name, source in parse_stream_sources(settings.STREAM_SOURCES).items():
+            self.streams.add(name, source)
+        self.rois = parse_rois(settings.STREAM_ROIS)
+        self.viewers = ViewerRegistry(
+            settings.STREAM_QUALITY_TIERS,
+            webp_enabled=settings.STREAM_WEBP_ENABLED,
+            max_in_flight=settings.STREAM_MAX_IN_FLIGHT
+        )
+        self.deltas = {}
+        self.event_aggregators = {}
+        try:
+            self.record_triggers = parse_triggers(settings.RECORD_TRIGGERS)
+        except ValueError as e:
+            print(f"Config error in RECORD_TRIGGERS: {e}; clip recording is disabled")
+            self.record_triggers = {}
+        self.clip_writer = ClipWriter() if self.record_triggers else None
+        self.recorders = {}
+        self.wake = threading.Event()
+        self.last_stats = None
+        self.last_stats_time = 0
+        self.db = self.init_database(db_path)
         self.class_names = self.model.names
         
+        # All callers share the model through one batching queue
+        self.inference = InferenceService(
+            self.detect_batch,
+            max_batch_size=settings.INFERENCE_MAX_BATCH,
+            live_wait=settings.INFERENCE_LIVE_WAIT_MS / 1000,
+            bulk_wait=settings.INFERENCE_BULK_WAIT_MS / 1000
+        )
+        
         # Optimized for performance
         self.confidence_thresholds = {
             'person': 0.7,
@@ -36,29 +89,63 @@ class PhotoBoothDetector:
             'session_start': datetime.now()
         }
 
-    def init_database(self):
-        conn = sqlite3.connect('photobooth_detections.db', check_same_thread=False)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS detections (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                class_name TEXT,
-                confidence REAL,
-                source TEXT
-            )
-        ''')
-        
-        conn.commit()
-        return conn
+    def init_database(self, db_path):
+        """Create the schema and return the dedicated writer connection.
+
+        All access goes through self.db_pool: db_pool.write() for inserts and
+        deletes, db_pool.read() for queries.
+        """
+        self.db_pool = ConnectionPool(db_path,
+                                      readers=settings.DB_READER_POOL_SIZE,
+                                      busy_timeout_ms=settings.DB_BUSY_TIMEOUT_MS)
+        with self.db_pool.write() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS detections (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    class_name TEXT,
+                    confidence REAL,
+                    source TEXT
+                )
+            ''')
+            
+            # Keyset pagination over (timestamp, id), optionally per class or source
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_detections_time ON detections(timestamp, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_detections_class_time ON detections(class_name, timestamp, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_detections_source_time ON detections(source, timestamp, id)')
+            
+            init_event_table(conn)
 
-    def detect_objects(self, frame):
+        # Rows and events past their retention are folded into hourly aggregates
+        self.retention = RetentionManager(
+            self.db_pool.write,
+            raw_days=settings.RETENTION_RAW_DAYS,
+            aggregate_days=settings.RETENTION_AGGREGATE_DAYS,
+            batch_size=settings.RETENTION_BATCH_SIZE
+        )
+        self.retention.init_schema()
+        if settings.RETENTION_RAW_DAYS > 0:
+            self.retention.start(settings.RETENTION_INTERVAL)
+
+        return self.db_pool.writer
+
+    def detect_objects(self, frame, priority=PRIORITY_BULK):
         """Lightweight object detection optimized for real-time"""
-        results = self.model(frame, conf=0.5, iou=0.4, verbose=False)
-        detections = []
+        return self.inference.detect(frame, priority)
+
+    def detect_batch(self, frames):
+        """Run one model call over several frames, one detection list per frame"""
+        if not frames:
+            return []
+
+        results = self.model(frames, conf=0.5, iou=0.4, verbose=False)
+        timestamp = datetime.now().strftime('%H:%M:%S')
+        batch_detections = []
         
         for result in results:
+            detections = []
             if result.boxes is not None:
                 for box in result.boxes:
                     class_id = int(box.cls[0])
@@ -73,11 +160,12 @@ class PhotoBoothDetector:
                             'class': class_name,
                             'confidence': round(confidence, 3),
                             'bbox': box.xyxy[0].cpu().numpy().tolist(),
-                            'timestamp': datetime.now().strftime('%H:%M:%S')
+                            'timestamp': timestamp
                         }
                         detections.append(detection)
+            batch_detections.append(detections)
         
-        return detections
+        return batch_detections
 
     def draw_detections(self, frame, detections):
         """Draw PhotoBooth-style overlays"""
@@ -127,30 +215,73 @@ class PhotoBoothDetector:
         if not detections:
             return
             
-        cursor = self.db.cursor()
-        for detection in detections:
-            cursor.execute('''
+        with self.db_pool.write() as conn:
+            conn.executemany('''
                 INSERT INTO detections (class_name, confidence, source)
                 VALUES (?, ?, ?)
-            ''', (detection['class'], detection['confidence'], source))
+            ''', [(detection['class'], detection['confidence'], source)
+                  for detection in detections])
         
-        self.db.commit()
         self.stats['total_detections'] += len(detections)
 
+    def store_live_detections(self, stream_name, detections):
+        """Persist one processed frame of a stream according to DETECTION_STORAGE"""
+        if settings.DETECTION_STORAGE != 'events':
+            if detections:
+                self.store_detections(detections, stream_name)
+            return
+        
+        # Empty frames still count: they are how a track learns its object left
+        if stream_name not in self.event_aggregators:
+            if stream_name not in self.streams.names():
+                return  # removed while this tick was in progress
+            self.event_aggregators[stream_name] = EventAggregator(
+                max_missing=settings.EVENT_MAX_MISSING_FRAMES,
+                trajectory_interval=settings.EVENT_TRAJECTORY_INTERVAL
+            )
+        self.store_events(self.event_aggregators[stream_name].update(detections), stream_name)
+
+    def flush_events(self, stream_names=None):
+        """Close open events, for all streams or only the given ones"""
+        for name in list(self.event_aggregators):
+            if stream_names is None or name in stream_names:
+                self.store_events(self.event_aggregators.pop(name).flush(), name)
+
+    def store_events(self, events, source):
+        """Store one row per finished object appearance"""
+        if not events:
+            return
+        
+        with self.db_pool.write() as conn:
+            insert_events(conn, events, source)
+        self.stats['total_detections'] += len(events)
+
     def get_statistics(self):
         """Get lightweight statistics"""
-        cursor = self.db.cursor()
-        cursor.execute('''
-            SELECT class_name, COUNT(*) as count, AVG(confidence) as avg_conf
-            FROM detections 
-            WHERE timestamp > datetime('now', '-10 minutes')
-            GROUP BY class_name
-            ORDER BY count DESC
-            LIMIT 5
-        ''')
+        if settings.DETECTION_STORAGE == 'events':
+            query = '''
+                SELECT class_name, COUNT(*) as count, AVG(peak_confidence) as avg_conf
+                FROM detection_events
+                WHERE last_seen > datetime('now', '-10 minutes')
+                GROUP BY class_name
+                ORDER BY count DESC
+                LIMIT 5
+            '''
+        else:
+            query = '''
+                SELECT class_name, COUNT(*) as count, AVG(confidence) as avg_conf
+                FROM detections 
+                WHERE timestamp > datetime('now', '-10 minutes')
+                GROUP BY class_name
+                ORDER BY count DESC
+                LIMIT 5
+            '''
+        
+        with self.db_pool.read() as conn:
+            rows = conn.execute(query).fetchall()
         
         class_stats = {}
-        for row in cursor.fetchall():
+        for row in rows:
             class_stats[row[0]] = {
                 'count': row[1],
                 'avg_confidence': round(row[2], 3)
@@ -162,71 +293,197 @@ class PhotoBoothDetector:
             'session_duration': str(datetime.now() - self.stats['session_start']).split('.')[0]
         }
 
-    def start_webcam(self):
-        """Start PhotoBooth-style webcam with optimized performance"""
-        self.cap = cv2.VideoCapture(0)
+    def detect_live(self, names, frames):
+        """Detect on a batch of stream frames, cropped to each stream's region of interest"""
+        rois = [self.rois.get(name) for name in names]
+        crops, offsets = [], []
+        for roi, frame in zip(rois, frames):
+            crop, offset = roi.crop(frame) if roi else (frame, None)
+            crops.append(crop)
+            offsets.append(offset)
         
-        # Optimize camera settings for performance
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        self.cap.set(cv2.CAP_PROP_FPS, 30)
+        # Live frames jump ahead of uploads and share one model call
+        batch_detections = self.inference.detect_many(crops, PRIORITY_LIVE)
         
+        return [roi.restore(detections, offset, frame.shape[1], frame.shape[0]) if roi else detections
+                for roi, offset, frame, detections in zip(rois, offsets, frames, batch_detections)]
+
+    def record_frame(self, stream_name, frame, detections, fps):
+        """Feed a stream's clip recorder; clips start when a trigger class appears"""
+        if stream_name not in self.recorders:
+            if stream_name not in self.streams.names():
+                return
+            self.recorders[stream_name] = ClipRecorder(
+                settings.RECORD_DIR, self.record_triggers, fps, self.clip_writer,
+                name=stream_name,
+                pre_seconds=settings.RECORD_PRE_SECONDS,
+                post_seconds=settings.RECORD_POST_SECONDS,
+                max_seconds=settings.RECORD_MAX_SECONDS
+            )
+        if settings.CAPTURE_PROCESSES:
+            # Shared capture slots are reused; the recorder keeps frames for its pre-roll
+            frame = frame.copy()
+        clip = self.recorders[stream_name].push(frame, [d['class'] for d in detections])
+        if clip:
+            print(f"Recording clip {clip}")
+
+    def close_recordings(self, stream_names=None):
+        """End clips in progress, for all streams or only the given ones"""
+        for name in list(self.recorders):
+            if stream_names is None or name in stream_names:
+                self.recorders.pop(name).close()
+
+    def remove_stream(self, name):
+        """Stop a stream and drop everything kept for it; KeyError if unknown"""
+        self.streams.remove(name)
+        self.flush_events({name})
+        self.close_recordings({name})
+        self.rois.pop(name, None)
+        self.deltas.pop(name, None)
+
+    def start_webcam(self):
+        """Run batched detection across all registered streams"""
+        idle_mode = settings.IDLE_MODE
+        if idle_mode == 'pause' and not self.clip_writer:
+            self.streams.start_all(self.viewers.viewer_counts())
+        else:
+            self.streams.start_all()
         self.is_running = True
-        frame_count = 0
         
-        print("PhotoBooth detection started...")
+        # Sample every stream at the rate the single webcam used to be processed
+        tick_interval = settings.FRAME_SKIP_RATE / settings.CAMERA_FPS
+        last_idle_sample = 0
+        
+        print(f"PhotoBooth detection started on {len(self.streams.names())} stream(s)...")
         
         while self.is_running:
-            ret, frame = self.cap.read()
-            if not ret:
-                print("Error reading from webcam")
-                break
+            tick_start = time.time()
+            
+            # Only streams with viewers run at full rate; the rest follow IDLE_MODE
+            watched = set(self.viewers.viewer_counts())
+            # Recorded streams need every tick for a continuous pre-roll
+            recorded = set(self.streams.names()) if self.clip_writer else set()
+            due = watched | recorded
+            if idle_mode == 'full':
+                due = None
+            elif idle_mode == 'pause':
+                self.streams.set_active(due)
+                # Paused streams see no more frames, so close their events now
+                self.flush_events(set(self.event_aggregators) - due)
+            elif tick_start - last_idle_sample >= settings.IDLE_DETECTION_INTERVAL:
+                due = None
+                last_idle_sample = tick_start
             
-            frame_count += 1
+            batch = self.streams.sample(due)
             
-            # Process every 4th frame for optimal performance
-            if frame_count % 4 == 0:
-                # Flip frame for PhotoBooth mirror effect
-                frame = cv2.flip(frame, 1)
+            if batch:
+                # Flip device frames for PhotoBooth mirror effect
+                frames = [cv2.flip(frame, 1) if is_device else frame
+                          for _, _, frame, is_device in batch]
                 
-                detections = self.detect_objects(frame)
+                batch_detections = self.detect_live([name for name, _, _, _ in batch], frames)
                 
-                if detections:
-                    self.store_detections(detections)
+                for (name, _, _, _), frame, detections in zip(batch, frames, batch_detections):
+                    self.store_live_detections(name, detections)
                     self.detection_log.extend(detections)
+                    if name in recorded:
+                        self.record_frame(name, frame, detections, 1 / tick_interval)
                 
-                annotated_frame = self.draw_detections(frame, detections)
-                
-                # Add PhotoBooth-style frame counter
-                cv2.putText(annotated_frame, f"Frame: {frame_count}", (10, 30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                
-                # Convert to base64 with optimized quality
-                _, buffer = cv2.imencode('.jpg', annotated_frame, 
-                                       [cv2.IMWRITE_JPEG_QUALITY, 80])
-                frame_base64 = base64.b64encode(buffer).decode('utf-8')
-                
-                # Emit to clients
-                socketio.emit('video_frame', {
-                    'frame': frame_base64,
-                    'detections': detections,
-                    'stats': self.get_statistics(),
-                    'frame_count': frame_count
-                })
+                for (name, frame_id, _, _), frame, detections in zip(batch, frames, batch_detections):
+                    if name in watched:
+                        self.publish_frame(name, frame, detections, frame_id)
+            
+            if watched:
+                self.publish_statistics()
+            if watched or recorded or idle_mode == 'full':
+                wait = tick_interval
+            elif idle_mode == 'detect':
+                wait = settings.IDLE_DETECTION_INTERVAL
+            else:
+                wait = None
             
-            time.sleep(0.03)  # ~30 FPS
+            # Sleep until the next tick, or until a viewer connects
+            self.wake.wait(None if wait is None else max(0, wait - (time.time() - tick_start)))
+            self.wake.clear()
         
-        if self.cap:
-            self.cap.release()
-            print("PhotoBooth stopped")
+        self.streams.stop_all()
+        self.flush_events()
+        self.close_recordings()
+        print("PhotoBooth stopped")
+
+    def publish_statistics(self, force=False):
+        """Emit statistics on a fixed cadence, and only when they changed"""
+        now = time.time()
+        if not force and now - self.last_stats_time < settings.STATS_INTERVAL:
+            return
+        self.last_stats_time = now
+        
+        stats = self.get_statistics()
+        # Session duration ticks every second; the client keeps its own timer
+        changed = {k: v for k, v in stats.items() if k != 'session_duration'}
+        if force or self.last_stats is None or changed != self.last_stats:
+            self.last_stats = changed
+            socketio.emit('statistics', stats)
+
+    def publish_frame(self, stream_name, frame, detections, frame_count):
+        """Annotate a frame and send each viewer an encoding matched to its link"""
+        groups = self.viewers.viewers_for(stream_name)
+        if not groups:
+            return
+        
+        # Viewers that saw the previous frame get a delta, others a snapshot
+        if stream_name not in self.deltas:
+            if stream_name not in self.streams.names():
+                return
+            self.deltas[stream_name] = DetectionDeltas()
+        base_frame, delta, snapshot = self.deltas[stream_name].update(detections, frame_count)
+        
+        annotated_frame = self.draw_detections(frame, detections)
+        
+        # Add PhotoBooth-style frame counter
+        cv2.putText(annotated_frame, f"Frame: {frame_count}", (10, 30), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        
+        # Encode once per tier actually in use, then fan out to its viewers
+        for (fmt, quality, max_width), sids in groups.items():
+            frame_base64 = encode_frame(annotated_frame, quality, max_width, fmt)
+            payload = {
+                'stream': stream_name,
+                'frame': frame_base64,
+                'format': fmt,
+                'frame_count': frame_count
+            }
+            delta_payload = dict(payload, base=base_frame, delta=delta)
+            snapshot_payload = dict(payload, detections=snapshot)
+            for sid in sids:
+                in_sync = base_frame is not None and self.viewers.last_sent(sid) == base_frame
+                socketio.emit('video_frame', delta_payload if in_sync else snapshot_payload, to=sid)
+                self.viewers.on_sent(sid, frame_count, len(frame_base64))
 
     def stop_webcam(self):
-        """Stop webcam detection"""
+        """Stop detection and release all stream sources"""
         self.is_running = False
-        if self.cap:
-            self.cap.release()
+        self.wake.set()
+        self.streams.stop_all()
 
-detector = PhotoBoothDetector()
+_detector = None
+_detector_lock = threading.Lock()
+
+def get_detector():
+    """The process's detector, created on first use.
+
+    Loading the model, opening the database pool and starting the retention
+    thread all wait until a worker needs them, so a Gunicorn master that
+    imports this module forks no sqlite connections or threads into it.
+    """
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                _detector = PhotoBoothDetector()
+    return _detector
+
+detector = LocalProxy(get_detector)
 
 @app.route('/')
 def index():
@@ -246,6 +503,107 @@ def stop_webcam():
     detector.stop_webcam()
     return jsonify({'status': 'stopped'})
 
+@app.route('/streams', methods=['GET'])
+def list_streams():
+    counts = detector.viewers.viewer_counts()
+    streams = detector.streams.describe()
+    for stream in streams:
+        stream['viewers'] = counts.get(stream['name'], 0)
+        roi = detector.rois.get(stream['name'])
+        stream['roi'] = roi.polygons if roi else None
+    return jsonify(streams)
+
+@app.route('/streams', methods=['POST'])
+def add_stream():
+    data = request.get_json(silent=True) or {}
+    name = data.get('name')
+    source = data.get('source')
+    if not name or source is None:
+        return jsonify({'error': 'Both name and source are required'}), 400
+    
+    try:
+        detector.streams.add(name, source)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'status': 'added', 'stream': name})
+
+@app.route('/streams/<name>', methods=['DELETE'])
+def remove_stream(name):
+    try:
+        detector.remove_stream(name)
+    except KeyError:
+        return jsonify({'error': f"Unknown stream '{name}'"}), 404
+    return jsonify({'status': 'removed', 'stream': name})
+
+@app.route('/streams/<name>/roi', methods=['GET'])
+def get_stream_roi(name):
+    if name not in detector.streams.names():
+        return jsonify({'error': f"Unknown stream '{name}'"}), 404
+    roi = detector.rois.get(name)
+    return jsonify({'stream': name, 'polygons': roi.polygons if roi else None})
+
+@app.route('/streams/<name>/roi', methods=['PUT'])
+def set_stream_roi(name):
+    if name not in detector.streams.names():
+        return jsonify({'error': f"Unknown stream '{name}'"}), 404
+    data = request.get_json(silent=True) or {}
+    try:
+        detector.rois[name] = RegionOfInterest(data.get('polygons'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'stream': name, 'polygons': detector.rois[name].polygons})
+
+@app.route('/streams/<name>/roi', methods=['DELETE'])
+def clear_stream_roi(name):
+    if name not in detector.streams.names():
+        return jsonify({'error': f"Unknown stream '{name}'"}), 404
+    detector.rois.pop(name, None)
+    return jsonify({'stream': name, 'polygons': None})
+
+@socketio.on('connect')
+def handle_connect():
+    # Viewers watch the first configured stream until they pick another
+    names = detector.streams.names()
+    if names:
+        join_room(names[0])
+        detector.viewers.connect(request.sid, names[0])
+        detector.wake.set()
+    if detector.last_stats is not None:
+        emit('statistics', detector.get_statistics())
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    detector.viewers.disconnect(request.sid)
+
+@socketio.on('join_stream')
+def handle_join_stream(data):
+    name = (data or {}).get('stream')
+    if name not in detector.streams.names():
+        emit('stream_error', {'error': f"Unknown stream '{name}'"})
+        return
+    for other in detector.streams.names():
+        leave_room(other)
+    join_room(name)
+    detector.viewers.set_stream(request.sid, name)
+    detector.wake.set()
+    emit('stream_joined', {'stream': name})
+
+@socketio.on('viewer_settings')
+def handle_viewer_settings(data):
+    data = data or {}
+    try:
+        detector.viewers.configure(request.sid, data.get('max_width'), data.get('format'))
+    except ValueError as e:
+        emit('stream_error', {'error': str(e), 'status': 400})
+
+@socketio.on('frame_ack')
+def handle_frame_ack(data):
+    detector.viewers.on_ack(request.sid, (data or {}).get('frame_count', 0))
+
+@app.route('/viewers')
+def viewers():
+    return jsonify(detector.viewers.describe())
+
 @app.route('/upload_file', methods=['POST'])
 def upload_file():
     if 'file' not in request.files:
@@ -262,17 +620,20 @@ def upload_file():
     file.save(filepath)
     
     if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp')):
-        frame = cv2.imread(filepath)
+        # Large JPEGs are decoded at the smallest scale the model can use
+        frame, scale = read_image(filepath, settings.DECODE_TARGET_SIZE)
         if frame is not None:
             detections = detector.detect_objects(frame)
             
+            # The preview is drawn on the reduced image; results use original pixels
+            annotated_frame = detector.draw_detections(frame, detections)
+            for detection in detections:
+                detection['bbox'] = scale_bbox(detection['bbox'], scale)
+            
             if detections:
                 detector.store_detections(detections, filename)
             
-            annotated_frame = detector.draw_detections(frame, detections)
-            
-            _, buffer = cv2.imencode('.jpg', annotated_frame)
-            frame_base64 = base64.b64encode(buffer).decode('utf-8')
+            frame_base64 = encode_frame(annotated_frame, settings.JPEG_QUALITY)
             
             return jsonify({
                 'frame': frame_base64,
@@ -286,23 +647,82 @@ def upload_file():
 def statistics():
     return jsonify(detector.get_statistics())
 
+@app.route('/inference_metrics')
+def inference_metrics():
+    return jsonify(detector.inference.get_metrics())
+
 @app.route('/get_logs')
 def get_logs():
     recent_logs = list(detector.detection_log)[-20:]
     return jsonify(recent_logs)
 
+@app.route('/history')
+def history():
+    """Detection history filtered by time range, class and source.
+
+    Query parameters: start, end (ISO-8601, UTC), class, source, order
+    (desc or asc), limit and cursor (from the previous page's next_cursor).
+    With format=ndjson every matching row is streamed as one JSON object
+    per line, fetched page by page so exports never load the full result.
+    """
+    args = request.args
+    try:
+        filters = {
+            'start': normalize_timestamp(args['start']) if args.get('start') else None,
+            'end': normalize_timestamp(args['end']) if args.get('end') else None,
+            'class_name': args.get('class'),
+            'source': args.get('source'),
+            'descending': args.get('order', 'desc') != 'asc'
+        }
+        limit = min(max(int(args.get('limit', 100)), 1), settings.HISTORY_MAX_PAGE_SIZE)
+        cursor = args.get('cursor')
+        
+        if args.get('format') != 'ndjson':
+            with detector.db_pool.read() as conn:
+                items, next_cursor = fetch_history_page(conn, cursor=cursor, limit=limit, **filters)
+            return jsonify({'items': items, 'next_cursor': next_cursor})
+        
+        # Validate the cursor before the streaming response starts
+        with detector.db_pool.read() as conn:
+            fetch_history_page(conn, cursor=cursor, limit=1, **filters)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def generate(cursor):
+        while True:
+            with detector.db_pool.read() as conn:
+                items, cursor = fetch_history_page(
+                    conn, cursor=cursor, limit=settings.HISTORY_MAX_PAGE_SIZE, **filters)
+            for item in items:
+                yield json.dumps(item) + '\n'
+            if cursor is None:
+                break
+    
+    return Response(stream_with_context(generate(cursor)), mimetype='application/x-ndjson')
+
+@app.route('/retention')
+def retention():
+    return jsonify({
+        'raw_days': detector.retention.raw_days,
+        'aggregate_days': detector.retention.aggregate_days,
+        'last_run': detector.retention.last_summary
+    })
+
 @app.route('/clear_logs', methods=['POST'])
 def clear_logs():
-    cursor = detector.db.cursor()
-    cursor.execute('DELETE FROM detections')
-    detector.db.commit()
+    with detector.db_pool.write() as conn:
+        conn.execute('DELETE FROM detections')
+        conn.execute('DELETE FROM detection_aggregates')
+        conn.execute('DELETE FROM event_aggregates')
+        conn.execute('DELETE FROM detection_events')
     detector.stats['total_detections'] = 0
     detector.detection_log.clear()
+    detector.publish_statistics(force=True)
     return jsonify({'status': 'cleared'})
 
 if __name__ == '__main__':
     print("AI Vision Pro - Object Detection Platform")
     print("=========================================")
-    print("🚀 Starting server on http://localhost:3000")
+    print(f"🚀 Starting {settings.SERVER_MODE} server on http://localhost:{settings.PORT}")
     print("📊 Professional web interface ready")
-    socketio.run(app, debug=False, host='0.0.0.0', port=3000, allow_unsafe_werkzeug=True)
\ No newline at end of file
+    run_server(app, socketio, get_detector)
\ No newline at end of file
@@ -5,37 +5,154 @@ YODAVI - Smart Object Detection and Analysis for Vision Intelligence
 
 import cv2
 import os
+import sys
 import argparse
 import json
 import sqlite3
+import signal
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from datetime import datetime
 from collections import deque
 import numpy as np
 from ultralytics import YOLO
 
+# Make sibling modules importable however we are launched
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cascade import CascadeStats, crop_window, escalation_masks
+from checkpoint import VideoCheckpoint, segment_path
+from columnar import ColumnarWriter
+from manifest import Manifest, fingerprint, scan_files
+from watching import Debouncer, open_watcher
+from tiling import merge_tiles, tile_windows, touches_seam
+from detections import Detections, DetectionSeries, FrameResult
+from decoding import read_image
+from database import (init_event_table, init_raw_table, insert_events, insert_raw_predictions,
+                      normalize_timestamp)
+from rescoring import RAW_IOU, rescore, select_predictions
+from recording import ClipRecorder, ClipWriter, parse_triggers
+from sampling import VideoSampler
+from sharedframes import FrameRing, capture_frames, display_frames, spawn_context
+from retention import RetentionManager, connection_writer
+from spatial import init_spatial_index, query_region
+from tracking import EventAggregator
+
+
+SINKS = ('sqlite', 'columnar', 'both')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+
+
+def draw_boxes(frame, detections, class_names):
+    """Draw bounding boxes and labels on a copy of frame"""
+    annotated = frame.copy()
+    
+    for class_id, confidence, bbox in zip(detections.class_ids.tolist(),
+                                          detections.confidences.tolist(),
+                                          detections.boxes.tolist()):
+        class_name = class_names[class_id]
+        x1, y1, x2, y2 = map(int, bbox)
+        
+        # Color coding based on object type
+        if 'weapon' in class_name.lower() or 'knife' in class_name.lower():
+            color = (0, 0, 255)  # Red for weapons
+        elif 'person' in class_name.lower():
+            color = (255, 0, 0)  # Blue for persons
+        else:
+            color = (0, 255, 0)  # Green for vehicles/others
+        
+        # Draw bounding box
+        cv2.rectangle(annotated, (x1, y1), (x2, y2), color, 2)
+        
+        # Draw label with confidence
+        label = f"{class_name} {confidence:.2f}"
+        font_scale = 0.6
+        font_thickness = 2
+        
+        # Get text size for background
+        (text_width, text_height), baseline = cv2.getTextSize(
+            label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, font_thickness)
+        
+        # Draw label background
+        cv2.rectangle(annotated, (x1, y1 - text_height - 10), 
+                     (x1 + text_width + 10, y1), color, -1)
+        
+        # Add text
+        cv2.putText(annotated, label, (x1 + 5, y1 - 5), 
+                   cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255), font_thickness)
+    
+    return annotated
+
+
+def draw_live(class_names, frame, payload):
+    """Annotate a live frame from (class_ids, confidences, boxes, fps); runs in the display process"""
+    class_ids, confidences, boxes, fps = payload
+    annotated = draw_boxes(frame, Detections(class_ids, confidences, boxes), class_names)
+    cv2.putText(annotated, f"FPS: {fps:.1f}", (10, 30), 
+               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    cv2.putText(annotated, f"Detections: {len(class_ids)}", (10, 60), 
+               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    return annotated
+
 
 class SmartDetectionSystem:
-    def __init__(self, model_path='yolo11n.pt'):
-        self.model = YOLO(model_path)
+    def __init__(self, model_path='yolo11n.pt', sink='sqlite', log_dir='detection_log',
+                 db='detections.db', model=None):
+        # An already loaded model (anything with YOLO's call interface and names) may be passed in
+        self.model = model if model is not None else YOLO(model_path)
+        # Long side the model letterboxes images to; larger photos are decoded reduced
+        self.input_size = 640
         self.detection_history = deque(maxlen=100)
-        self.db = self.init_database()
+        self.db = self.init_database(db)
         self.class_names = self.model.names
         
+        # Where detections are persisted: the detections table, a columnar log, or both
+        self.sink = sink
+        self.columnar = ColumnarWriter(log_dir, self.class_names) if sink in ('columnar', 'both') else None
+        
+        # Sliced inference for high-resolution frames, off until enable_tiling() is called
+        self.tiling = None
+        
+        # Second-opinion model for uncertain detections, off until enable_cascade() is called
+        self.cascade = None
+        self.cascade_stats = CascadeStats()
+        
+        # Event-triggered clip recording, off until enable_recording() is called
+        self.clip_writer = None
+        self.record_options = None
+        
+        # Unfiltered predictions kept for re-scoring, off until enable_raw_capture() is called
+        self.raw_floor = None
+        # NMS IoU of a normal run; raw capture applies it after the model (see model_iou)
+        self.nms_iou = 0.4
+        
         # Fine-tuned confidence thresholds for better accuracy
         self.confidence_thresholds = {
             'person': 0.6,
             'car': 0.7, 'truck': 0.7, 'bus': 0.7, 'motorcycle': 0.6,
             'knife': 0.4, 'scissors': 0.5
         }
+        # Per-class-id thresholds so filtering is one vectorized comparison
+        self.threshold_table = np.array([
+            self.get_adaptive_confidence(self.class_names[class_id])
+            for class_id in range(max(self.class_names) + 1)], dtype=np.float32)
 
     def get_adaptive_confidence(self, class_name):
         """Get adaptive confidence threshold based on class type"""
         return self.confidence_thresholds.get(class_name, 0.5)
 
-    def init_database(self):
-        """Initialize SQLite database for detection storage"""
-        conn = sqlite3.connect('detections.db')
+    def init_database(self, db='detections.db'):
+        """Initialize SQLite database for detection storage.
+
+        db is a file path or an open sqlite3 connection; the schema is
+        created on it either way.
+        """
+        conn = db if isinstance(db, sqlite3.Connection) else sqlite3.connect(db)
+        # Only a new, still empty file accepts this without a full VACUUM
+        conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -48,45 +165,208 @@ class SmartDetectionSystem:
                 image_path TEXT
             )
         ''')
+        init_event_table(conn)
+        init_raw_table(conn)
+        self.has_rtree = init_spatial_index(conn)
         
         conn.commit()
         return conn
 
-    def detect_objects(self, frame, conf_threshold=0.5):
+    def apply_retention(self, raw_days, aggregate_days=0):
+        """Fold detections older than raw_days into hourly aggregates and compact"""
+        retention = RetentionManager(lambda: connection_writer(self.db), raw_days,
+                                     aggregate_days=aggregate_days, source_column='image_path')
+        retention.init_schema()
+        retention.enable_incremental_vacuum()
+        return retention.run_once()
+
+    def enable_tiling(self, tile_size=640, overlap=0.2, full_frame=True):
+        """Detect on overlapping tiles so small objects keep their pixels.
+
+        With full_frame the downscaled whole frame is added to the batch so
+        large objects spanning several tiles are still found in one piece.
+        Images are then always decoded at full resolution.
+        """
+        self.tiling = {'tile_size': tile_size, 'overlap': overlap, 'full_frame': full_frame}
+        self.input_size = None
+
+    def enable_cascade(self, model_path='yolo11s.pt', margin=0.15, watch_classes=('knife',),
+                       crops=False):
+        """Re-check uncertain frames with a larger model.
+
+        The primary model runs on every frame. Frames with a box within margin
+        of its class threshold, or with a watched class, are escalated: either
+        the whole frame is re-detected by the larger model, or with crops=True
+        only padded windows around the escalated boxes are.
+        """
+        model = YOLO(model_path)
+        if dict(model.names) != dict(self.class_names):
+            raise ValueError(f"Cascade model {model_path} has different classes")
+        self.cascade = {
+            'model': model,
+            'margin': margin,
+            'watch_ids': {class_id for class_id, name in self.class_names.items()
+                          if name in watch_classes},
+            'crops': crops
+        }
+
+    def enable_raw_capture(self, floor=0.05):
+        """Store every prediction above floor so thresholds can be re-tuned later.
+
+        The model then runs with a loose NMS IoU and the usual thresholds and
+        IoU are applied afterwards, so the stored output is a superset of
+        what any stricter setting would keep. See rescore().
+        """
+        self.raw_floor = floor
+
+    @property
+    def model_iou(self):
+        """NMS IoU the model itself runs with: loosened to RAW_IOU while raw output is captured"""
+        return RAW_IOU if self.raw_floor is not None else self.nms_iou
+
+    def _predict(self, model, frame, conf_threshold, frame_index, timestamp):
+        """One frame through a model, tiled when tiling is enabled"""
+        if self.tiling:
+            return self._detect_tiled(model, frame, conf_threshold, frame_index, timestamp)
+        results = model(frame, conf=conf_threshold, iou=self.model_iou)
+        if not results:
+            return Detections.empty(frame_index, timestamp)
+        return Detections.from_boxes(results[0].boxes, frame_index, timestamp)
+
+    def _detect_tiled(self, model, frame, conf_threshold, frame_index, timestamp):
+        """Run all tiles as one batch and merge duplicates across the seams"""
+        height, width = frame.shape[:2]
+        windows = tile_windows(width, height, self.tiling['tile_size'], self.tiling['overlap'])
+        if self.tiling['full_frame'] and len(windows) > 1:
+            windows.append((0, 0, width, height))
+        return self._detect_windows(model, frame, windows, conf_threshold, frame_index, timestamp)
+
+    def _detect_windows(self, model, frame, windows, conf_threshold, frame_index, timestamp,
+                        extra=None):
+        """Detect on several windows of a frame as one batch and merge into frame coordinates"""
+        crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in windows]
+        results = model(crops, conf=conf_threshold, iou=self.model_iou)
+        
+        height, width = frame.shape[:2]
+        tiles = [extra] if extra else []
+        for window, result in zip(windows, results):
+            tile = Detections.from_boxes(result.boxes)
+            tiles.append((window[0], window[1], tile.class_ids, tile.confidences, tile.boxes,
+                          touches_seam(tile.boxes, window, width, height)))
+        return Detections(*merge_tiles(tiles), frame_index, timestamp)
+
+    def _detect_cascade(self, frame, conf_threshold, frame_index, timestamp):
+        """Primary model everywhere, larger model only where the answer is in doubt"""
+        margin = self.cascade['margin']
+        # Look slightly below the threshold so near misses can be escalated too
+        detections = self._predict(self.model, frame, max(0.01, conf_threshold - margin),
+                                   frame_index, timestamp)
+        uncertain, watched = escalation_masks(detections, self.threshold_table, margin,
+                                              self.cascade['watch_ids'])
+        escalate = uncertain | watched
+        if not escalate.any():
+            self.cascade_stats.record(uncertain, watched)
+            return detections
+        
+        large = self.cascade['model']
+        if not self.cascade['crops']:
+            self.cascade_stats.record(uncertain, watched)
+            return self._predict(large, frame, conf_threshold, frame_index, timestamp)
+        
+        # Confident boxes stay; escalated ones are replaced by what the larger model sees
+        height, width = frame.shape[:2]
+        windows = [crop_window(box, width, height) for box in detections.boxes[escalate].tolist()]
+        self.cascade_stats.record(uncertain, watched, crops=len(windows))
+        kept = detections[~escalate]
+        return self._detect_windows(large, frame, windows, conf_threshold, frame_index, timestamp,
+                                    extra=(0, 0, kept.class_ids, kept.confidences, kept.boxes))
+
+    def detect_objects(self, frame, conf_threshold=0.5, frame_index=0):
         """Enhanced detection with adaptive confidence and NMS"""
-        results = self.model(frame, conf=conf_threshold, iou=0.4)
-        detections = []
-        
-        for result in results:
-            if result.boxes is not None:
-                for box in result.boxes:
-                    class_id = int(box.cls[0])
-                    class_name = self.class_names[class_id]
-                    confidence = float(box.conf[0])
-                    
-                    # Apply adaptive confidence threshold
-                    adaptive_conf = self.get_adaptive_confidence(class_name)
-                    
-                    if confidence >= adaptive_conf:
-                        detection = {
-                            'class': class_name,
-                            'confidence': confidence,
-                            'bbox': box.xyxy[0].cpu().numpy().tolist(),
-                            'timestamp': datetime.now().strftime('%H:%M:%S')
-                        }
-                        detections.append(detection)
-        
-        return detections
+        timestamp = time.time()
+        model_threshold = conf_threshold
+        if self.raw_floor is not None:
+            model_threshold = min(conf_threshold, self.raw_floor)
+        if self.cascade:
+            detections = self._detect_cascade(frame, model_threshold, frame_index, timestamp)
+        else:
+            detections = self._predict(self.model, frame, model_threshold, frame_index, timestamp)
+        return self._select(detections, conf_threshold)
+
+    def detect_many(self, frames, conf_threshold=0.5):
+        """Detect objects in several frames with one model call where possible"""
+        if self.tiling or self.cascade or len(frames) < 2:
+            return [self.detect_objects(frame, conf_threshold) for frame in frames]
+        timestamp = time.time()
+        model_threshold = conf_threshold
+        if self.raw_floor is not None:
+            model_threshold = min(conf_threshold, self.raw_floor)
+        results = self.model(frames, conf=model_threshold, iou=self.model_iou)
+        return [self._select(Detections.from_boxes(result.boxes, 0, timestamp), conf_threshold)
+                for result in results]
+
+    def _select(self, detections, conf_threshold):
+        """Keep what passes the per-class thresholds, remembering raw output if captured"""
+        if self.raw_floor is not None:
+            # Same result as a normal run: the model threshold, class thresholds, then NMS
+            table = np.maximum(self.threshold_table, conf_threshold)
+            kept = detections[select_predictions(detections.class_ids, detections.confidences,
+                                                 detections.boxes, table, self.nms_iou)]
+            kept.raw = detections
+            return kept
+        
+        # Apply adaptive confidence threshold
+        return detections[detections.confidences >= self.threshold_table[detections.class_ids]]
 
     def store_detection(self, detection, image_path='webcam'):
         """Store detection in database"""
         cursor = self.db.cursor()
         cursor.execute('''
-            INSERT INTO detections (class_name, confidence, bbox, image_path)
-            VALUES (?, ?, ?, ?)
-        ''', (detection['class'], detection['confidence'], 
-             json.dumps(detection['bbox']), image_path))
+            INSERT INTO detections (class_name, confidence, x1, y1, x2, y2, image_path)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (detection['class'], detection['confidence'],
+             *detection['bbox'], image_path))
         self.db.commit()
+
+    def store_frame(self, detections, source='webcam'):
+        """Persist all detections of one frame to the configured sinks"""
+        raw_id = None
+        if detections.raw is not None and len(detections.raw):
+            raw_id = insert_raw_predictions(self.db, detections.raw, source)
+            self.db.commit()
+        if not len(detections):
+            return
+        if self.sink in ('sqlite', 'both'):
+            self.db.executemany('''
+                INSERT INTO detections (class_name, confidence, x1, y1, x2, y2, image_path, raw_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(self.class_names[class_id], confidence, *box, source, raw_id)
+                  for class_id, confidence, box in zip(detections.class_ids.tolist(),
+                                                       detections.confidences.tolist(),
+                                                       detections.boxes.tolist())])
+            self.db.commit()
+        if self.columnar:
+            self.columnar.append(detections.frame_index, detections.timestamp,
+                                 detections.class_ids, detections.confidences, detections.boxes)
+
+    def rescore(self, thresholds=None, default=None, iou=0.4, conf_threshold=0.5):
+        """Rebuild the detections table from stored raw predictions with new settings.
+
+        thresholds maps class names to confidences and overrides the built-in
+        ones; default replaces 0.5 for every other class. As in a live run,
+        no box below conf_threshold is kept whatever its class threshold.
+        """
+        merged = dict(self.confidence_thresholds, **(thresholds or {}))
+        fallback = 0.5 if default is None else default
+        table = np.array([merged.get(self.class_names[class_id], fallback)
+                          for class_id in range(len(self.threshold_table))], dtype=np.float32)
+        return rescore(self.db, self.class_names, np.maximum(table, conf_threshold), iou)
+
+    def query_region(self, region, mode='intersects', start=None, end=None,
+                     class_name=None, limit=None):
+        """Stored detections whose box intersects, lies within or contains region"""
+        return query_region(self.db, region, mode, start=start, end=end,
+                            class_name=class_name, limit=limit, use_rtree=self.has_rtree)
     
     def calculate_accuracy_metrics(self):
         """Calculate detection accuracy metrics for academic analysis"""
@@ -114,82 +394,393 @@ class SmartDetectionSystem:
         
         return metrics
 
-    def process_image(self, image_path, output_path=None):
-        """Process single image with enhanced accuracy"""
-        frame = cv2.imread(image_path)
+    def enable_recording(self, output_dir, triggers, pre_seconds=5.0, post_seconds=5.0):
+        """Record clips around trigger classes instead of whole outputs.
+
+        triggers is a parse_triggers() spec such as "knife,person@20-6".
+        """
+        self.record_options = {
+            'output_dir': output_dir,
+            'triggers': parse_triggers(triggers),
+            'pre_seconds': pre_seconds,
+            'post_seconds': post_seconds
+        }
+        if not self.clip_writer:
+            self.clip_writer = ClipWriter()
+
+    def make_recorder(self, name, fps, block=False):
+        if not self.record_options:
+            return None
+        return ClipRecorder(fps=fps, writer=self.clip_writer, name=name, block=block,
+                            **self.record_options)
+
+    def detected_classes(self, detections):
+        return [self.class_names[class_id] for class_id in detections.class_ids.tolist()]
+
+    def _iter_frames(self, source, stride=1, full_resolution=False):
+        """Yield (name, frame_index, frame, scale) for every stride-th frame of a source.
+
+        Images are decoded at reduced resolution unless full_resolution is set;
+        scale maps their pixels back to the original image.
+        """
+        target_size = None if full_resolution else self.input_size
+        if isinstance(source, int) or source.isdigit():
+            capture_source, name = int(source), f'camera{source}'
+        elif source.lower() == 'webcam':
+            capture_source, name = 0, 'webcam'
+        elif os.path.isdir(source):
+            for filename in sorted(os.listdir(source)):
+                if filename.lower().endswith(IMAGE_EXTENSIONS):
+                    path = os.path.join(source, filename)
+                    frame, scale = read_image(path, target_size)
+                    if frame is not None:
+                        yield path, 0, frame, scale
+            return
+        elif source.lower().endswith(VIDEO_EXTENSIONS):
+            capture_source, name = source, source
+        else:
+            frame, scale = read_image(source, target_size)
+            if frame is None:
+                raise FileNotFoundError(f"Could not load image {source}")
+            yield source, 0, frame, scale
+            return
+        
+        # Frames between samples are grabbed but never retrieved
+        for frame_index, frame in VideoSampler(capture_source, stride):
+            yield name, frame_index, frame, (1.0, 1.0)
+
+    def iter_detections(self, source, stride=1, annotate=False, store=False,
+                        conf_threshold=0.5):
+        """Lazily yield a FrameResult per processed frame of any source.
+
+        source is an image, a folder of images, a video file, 'webcam' or a
+        camera index. Only one frame is held at a time, so callers can stop
+        early or consume endless camera streams with constant memory.
+        Closing the generator releases the capture. With annotate=True
+        result.frame is an annotated full-resolution copy; otherwise large
+        images are decoded reduced for speed. Boxes are always in original
+        pixels. With store=True detections are also written to the
+        configured sinks.
+        """
+        for name, frame_index, frame, scale in self._iter_frames(source, stride, annotate):
+            detections = self.detect_objects(frame, conf_threshold, frame_index=frame_index)
+            if scale != (1.0, 1.0):
+                detections = detections.scaled(*scale)
+            if store:
+                self.store_frame(detections, name)
+            if annotate:
+                frame = self.draw_detections(frame, detections)
+            yield FrameResult(name, frame_index, detections, frame)
+
+    def process_image(self, image_path, output_path=None, preview=True):
+        """Process single image with enhanced accuracy.
+
+        Detection runs on a reduced-resolution decode sized for the model;
+        the full image is only decoded when an annotated output is written.
+        """
+        frame, scale = read_image(image_path, self.input_size)
         if frame is None:
             print(f"Error: Could not load image {image_path}")
             return []
         
         detections = self.detect_objects(frame)
         
-        # Store detections
-        for detection in detections:
-            self.store_detection(detection, image_path)
-        
-        # Annotate frame
-        annotated_frame = self.draw_detections(frame, detections)
+        # Store detections in original image pixels
+        original = detections.scaled(*scale) if scale != (1.0, 1.0) else detections
+        self.store_frame(original, image_path)
         
         if output_path:
-            cv2.imwrite(output_path, annotated_frame)
+            if original is not detections:
+                frame = cv2.imread(image_path)
+            cv2.imwrite(output_path, self.draw_detections(frame, original))
             print(f"Results saved to {output_path}")
-        else:
+        elif preview:
+            # The reduced decode is plenty for an on-screen preview
+            annotated_frame = self.draw_detections(frame, detections)
             cv2.imshow('Smart Detection - Image', annotated_frame)
             cv2.waitKey(0)
             cv2.destroyAllWindows()
         
-        return detections
+        return original.to_dicts(self.class_names)
+
+    def settings_fingerprint(self):
+        """Hash of the model and settings; a change makes every file count as new"""
+        model_path = getattr(self.model, 'ckpt_path', None) or ''
+        model_stat = os.stat(model_path) if os.path.isfile(model_path) else None
+        cascade = self.cascade and {key: value for key, value in self.cascade.items() if key != 'model'}
+        return fingerprint(model_path, model_stat and (model_stat.st_size, model_stat.st_mtime_ns),
+                           self.threshold_table.tobytes(), self.input_size, self.tiling,
+                           cascade, self.raw_floor)
+
+    def process_directory(self, directory, output_dir=None, rescan=False, checkpoint_every=100):
+        """Process new and changed images under directory, recursively.
 
-    def process_video(self, video_path, output_path=None):
-        """Process video with optimized frame sampling"""
+        Files already in the manifest with the same size, mtime and settings
+        are skipped. A file processed again first loses the rows an earlier
+        or interrupted run stored for it, so resuming never duplicates
+        detections in the database (the columnar log is append-only).
+        """
+        manifest = Manifest(self.db, self.settings_fingerprint(), checkpoint_every)
+        entries = scan_files(directory, IMAGE_EXTENSIONS)
+        try:
+            for path, size, mtime_ns in (entries if rescan else manifest.pending(entries)):
+                print(f"Processing: {os.path.relpath(path, directory)}")
+                manifest.forget(path)
+                output_path = None
+                if output_dir:
+                    output_path = os.path.join(output_dir, os.path.relpath(path, directory))
+                    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                detections = self.process_image(path, output_path, preview=False)
+                manifest.record(path, size, mtime_ns, len(detections))
+        finally:
+            manifest.checkpoint()
+        
+        print(f"\nProcessed {manifest.processed} images, skipped {manifest.skipped} unchanged")
+        return {'processed': manifest.processed, 'skipped': manifest.skipped}
+
+    def watch_directory(self, directory, batch_size=8, workers=4, settle=1.0,
+                        poll_interval=2.0, polling=False, stop=None):
+        """Process images as they land in directory until SIGINT/SIGTERM or stop is set.
+
+        Files already waiting are processed first, skipping any the manifest
+        knows. New files are held until they stop changing, decoded by up to
+        workers threads and detected batch_size at a time; each batch is
+        stored and checkpointed before the next, so an interrupted daemon
+        loses nothing it reported as processed.
+        """
+        stop = stop or threading.Event()
+        previous_handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                previous_handlers[signum] = signal.signal(signum, lambda *_: stop.set())
+        
+        manifest = Manifest(self.db, self.settings_fingerprint(), checkpoint_every=batch_size)
+        watcher = open_watcher(directory, IMAGE_EXTENSIONS, poll_interval, polling)
+        debouncer = Debouncer(settle)
+        for path, _, _ in manifest.pending(scan_files(directory, IMAGE_EXTENSIONS)):
+            debouncer.add(path)
+        print(f"Watching {directory} ({type(watcher).__name__}), {len(debouncer)} files waiting")
+        
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                while not stop.is_set():
+                    for path in watcher.changes(max(0.05, settle / 2) if len(debouncer) else 0.5):
+                        debouncer.add(path)
+                    ready = list(manifest.pending(debouncer.ready()))
+                    for start in range(0, len(ready), batch_size):
+                        if stop.is_set():
+                            break  # the rest is found again by the startup scan
+                        self._ingest_batch(pool, ready[start:start + batch_size], manifest)
+        finally:
+            watcher.close()
+            manifest.checkpoint()
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+        
+        print(f"Stopped watching: processed {manifest.processed} images")
+        return {'processed': manifest.processed, 'skipped': manifest.skipped}
+
+    def _ingest_batch(self, pool, entries, manifest):
+        """Decode a batch of settled files in parallel, detect them together and store"""
+        decoded = list(pool.map(lambda entry: read_image(entry[0], self.input_size), entries))
+        readable = [i for i, (frame, _) in enumerate(decoded) if frame is not None]
+        results = dict(zip(readable, self.detect_many([decoded[i][0] for i in readable])))
+        
+        for i, (path, size, mtime_ns) in enumerate(entries):
+            manifest.forget(path)
+            detections = results.get(i)
+            if detections is None:
+                print(f"Error: Could not load image {path}")
+            else:
+                scale = decoded[i][1]
+                if scale != (1.0, 1.0):
+                    detections = detections.scaled(*scale)
+                self.store_frame(detections, path)
+            # Unreadable files are recorded too; they are retried once they change again
+            manifest.record(path, size, mtime_ns, len(detections) if detections is not None else 0)
+        manifest.checkpoint()
+        print(f"Ingested {len(entries)} files ({len(readable)} readable)")
+
+    def process_video(self, video_path, output_path=None, checkpoint_seconds=None):
+        """Process video with optimized frame sampling.
+
+        With checkpoint_seconds, progress is checkpointed every that many
+        seconds of video: the frame position, the stored detections and
+        the output written so far as a finished segment file. Running again
+        with the same arguments continues from the last checkpoint, and the
+        segments are joined into output_path once the video is done.
+        Returns a DetectionSeries holding every detection of this run as
+        compact arrays.
+        """
         cap = cv2.VideoCapture(video_path)
         frame_count = 0
-        all_detections = []
+        all_detections = DetectionSeries()
+        video_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        # Offline: wait for the encoder rather than drop frames from clips
+        recorder = self.make_recorder(os.path.splitext(os.path.basename(video_path))[0], video_fps,
+                                      block=True)
+        
+        checkpoint = None
+        if checkpoint_seconds:
+            stat = os.stat(video_path)
+            checkpoint = VideoCheckpoint(self.db, video_path, output_path, fingerprint(
+                self.settings_fingerprint(), stat.st_size, stat.st_mtime_ns))
+            frame_count = checkpoint.resume()
+            if frame_count:
+                print(f"Resuming at frame {frame_count} from checkpoint")
+                cap = self._seek_capture(cap, video_path, frame_count)
+            else:
+                checkpoint.save(0)
+            checkpoint_frames = max(1, round(checkpoint_seconds * video_fps))
         
         if output_path:
             fourcc = cv2.VideoWriter_fourcc(*'mp4v')
             fps = int(cap.get(cv2.CAP_PROP_FPS))
             width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
             height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+            # With checkpoints the output is written as segments joined at the end
+            target = segment_path(output_path, len(checkpoint.segments)) if checkpoint else output_path
+            out = cv2.VideoWriter(target, fourcc, fps, (width, height))
+            segment_frames = 0
         else:
             out = None
         
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            frame_count += 1
-            
-            # Process every 3rd frame for better accuracy vs performance balance
-            if frame_count % 3 == 0:
-                detections = self.detect_objects(frame)
-                all_detections.extend(detections)
-                annotated_frame = self.draw_detections(frame, detections)
-            else:
-                annotated_frame = frame
-            
-            if output_path and out:
-                out.write(annotated_frame)
-            else:
-                cv2.imshow('Smart Detection - Video', annotated_frame)
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+        finished = False
+        done = frame_count
+        try:
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    finished = True
                     break
+                
+                frame_count += 1
+                
+                # Process every 3rd frame for better accuracy vs performance balance
+                if frame_count % 3 == 0:
+                    detections = self.detect_objects(frame, frame_index=frame_count)
+                    self.store_frame(detections, video_path)
+                    all_detections.append(detections)
+                    annotated_frame = self.draw_detections(frame, detections)
+                else:
+                    detections = None
+                    annotated_frame = frame
+                
+                if recorder:
+                    # Clips follow the video's own timeline
+                    recorder.push(frame, self.detected_classes(detections) if detections else (),
+                                  now=frame_count / video_fps)
+                
+                if out:
+                    out.write(annotated_frame)
+                    segment_frames += 1
+                done = frame_count
+                if not out and not recorder:
+                    cv2.imshow('Smart Detection - Video', annotated_frame)
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        break
+                
+                if checkpoint and frame_count % checkpoint_frames == 0:
+                    if out:
+                        out.release()
+                        checkpoint.save(frame_count, target)
+                        target = segment_path(output_path, len(checkpoint.segments))
+                        out = cv2.VideoWriter(target, fourcc, fps, (width, height))
+                        segment_frames = 0
+                    else:
+                        checkpoint.save(frame_count)
+        finally:
+            cap.release()
+            if out:
+                out.release()
+            if checkpoint:
+                # Every frame up to done is stored and written, so keep it
+                if out and segment_frames:
+                    checkpoint.save(done, target)
+                else:
+                    if out and os.path.exists(target):
+                        os.remove(target)
+                    checkpoint.save(done)
+                if finished:
+                    checkpoint.finish()
+            if recorder:
+                recorder.close()
+                print(f"Recorded {len(recorder.clips)} clips to {recorder.output_dir}")
+            cv2.destroyAllWindows()
         
+        print(f"Processed {frame_count} frames, found {len(all_detections)} detections")
+        return all_detections
+
+    def _seek_capture(self, cap, video_path, position):
+        """Position cap so the next read returns frame position + 1"""
+        cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+        if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == position:
+            return cap
+        # Inexact seek: start over and skip frames without decoding them to BGR
         cap.release()
+        cap = cv2.VideoCapture(video_path)
+        for _ in range(position):
+            cap.grab()
+        return cap
+
+    def analyze_video(self, video_path, output_path=None, stride=3, sample_seconds=None):
+        """Analysis-only video run that decodes just the sampled frames.
+
+        Skipped frames are grabbed without being retrieved, and coarse
+        intervals (sample_seconds) seek past whole stretches of video. With
+        output_path a sparse video of the annotated samples is written.
+        Returns a DetectionSeries like process_video.
+        """
+        if sample_seconds:
+            sampler = VideoSampler.every(video_path, sample_seconds)
+        else:
+            sampler = VideoSampler(video_path, stride)
+        all_detections = DetectionSeries()
+        out = None
+        
+        for frame_index, frame in sampler:
+            detections = self.detect_objects(frame, frame_index=frame_index)
+            self.store_frame(detections, video_path)
+            all_detections.append(detections)
+            
+            if output_path:
+                if out is None:
+                    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+                    out = cv2.VideoWriter(output_path, fourcc, max(1.0, sampler.fps / sampler.stride),
+                                          (frame.shape[1], frame.shape[0]))
+                out.write(self.draw_detections(frame, detections))
+        
         if out:
             out.release()
-        cv2.destroyAllWindows()
         
-        print(f"Processed {frame_count} frames, found {len(all_detections)} detections")
+        summary = sampler.summary()
+        print(f"Analyzed {summary['retrieved']} of {summary['frames']} frames "
+              f"(every {sampler.stride}), found {len(all_detections)} detections")
+        print(f"Decode savings: {summary['retrieve_savings']:.0%} of frames never retrieved, "
+              f"{summary['never_decoded']} skipped by {summary['seeks']} seeks")
         return all_detections
 
-    def process_webcam(self):
-        """Real-time webcam detection with performance monitoring"""
+    def store_events(self, events, source='webcam'):
+        """Store finished object appearances in the detection_events table"""
+        if events:
+            insert_events(self.db, events, source)
+            self.db.commit()
+
+    def process_webcam(self, events=False, multiprocess=False):
+        """Real-time webcam detection with performance monitoring.
+
+        With events=True detections are associated across frames and stored
+        as one detection_events row per object appearance instead of one
+        detections row per box per frame. With multiprocess=True capture and
+        display run in their own processes (see _process_webcam_shared).
+        """
+        if multiprocess:
+            return self._process_webcam_shared(events)
         cap = cv2.VideoCapture(0)
         frame_count = 0
         fps_counter = deque(maxlen=30)
+        aggregator = EventAggregator() if events else None
+        recorder = None
         
         print("Starting webcam detection. Press 'q' to quit.")
         
@@ -202,12 +793,8 @@ class SmartDetectionSystem:
             frame_count += 1
             start_time = time.time()
             
-            detections = self.detect_objects(frame)
-            
-            # Store detections
-            for detection in detections:
-                self.store_detection(detection, 'webcam')
-                self.detection_history.append(detection)
+            detections = self.detect_objects(frame, frame_index=frame_count)
+            self._store_live(detections, aggregator)
             
             # Draw detections
             annotated_frame = self.draw_detections(frame, detections)
@@ -218,6 +805,14 @@ class SmartDetectionSystem:
             fps_counter.append(fps)
             avg_fps = sum(fps_counter) / len(fps_counter)
             
+            # Clips are encoded at the measured loop rate once it has settled
+            if self.record_options and not recorder and len(fps_counter) == fps_counter.maxlen:
+                recorder = self.make_recorder('webcam', max(1.0, avg_fps))
+            if recorder:
+                clip = recorder.push(frame, self.detected_classes(detections))
+                if clip:
+                    print(f"Recording clip {clip}")
+            
             # Add performance info
             cv2.putText(annotated_frame, f"FPS: {avg_fps:.1f}", (10, 30), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
@@ -229,47 +824,107 @@ class SmartDetectionSystem:
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
         
+        if aggregator:
+            self.store_events(aggregator.flush())
+        if recorder:
+            recorder.close()
+        
         cap.release()
         cv2.destroyAllWindows()
         print(f"Session ended. Processed {frame_count} frames.")
 
-    def draw_detections(self, frame, detections):
-        """Draw bounding boxes and labels on frame"""
-        annotated = frame.copy()
+    def _process_webcam_shared(self, events=False, slots=4):
+        """Webcam loop split over processes that share frames through a FrameRing.
+
+        A capture process decodes straight into shared-memory slots and a
+        display process draws and shows them; only slot indices and
+        detection arrays cross between processes. This process only runs
+        inference on the newest frame, skipping stale ones, so neither
+        capture nor display competes with the model for the GIL.
+        """
+        context = spawn_context()
+        ring = FrameRing(slots, context=context)
+        stop = context.Event()
+        results = context.Queue()
+        workers = [
+            context.Process(target=capture_frames, args=(ring, 0, stop), daemon=True),
+            context.Process(target=display_frames, daemon=True, args=(
+                ring, results, stop, partial(draw_live, dict(self.class_names)),
+                'Smart Detection System - Live'))
+        ]
+        for worker in workers:
+            worker.start()
         
-        for detection in detections:
-            bbox = detection['bbox']
-            x1, y1, x2, y2 = map(int, bbox)
-            
-            # Color coding based on object type
-            if 'weapon' in detection['class'].lower() or 'knife' in detection['class'].lower():
-                color = (0, 0, 255)  # Red for weapons
-            elif 'person' in detection['class'].lower():
-                color = (255, 0, 0)  # Blue for persons
-            else:
-                color = (0, 255, 0)  # Green for vehicles/others
-            
-            # Draw bounding box
-            cv2.rectangle(annotated, (x1, y1), (x2, y2), color, 2)
-            
-            # Draw label with confidence
-            label = f"{detection['class']} {detection['confidence']:.2f}"
-            font_scale = 0.6
-            font_thickness = 2
-            
-            # Get text size for background
-            (text_width, text_height), baseline = cv2.getTextSize(
-                label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, font_thickness)
-            
-            # Draw label background
-            cv2.rectangle(annotated, (x1, y1 - text_height - 10), 
-                         (x1 + text_width + 10, y1), color, -1)
-            
-            # Add text
-            cv2.putText(annotated, label, (x1 + 5, y1 - 5), 
-                       cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255), font_thickness)
+        frame_count = 0
+        fps_counter = deque(maxlen=30)
+        aggregator = EventAggregator() if events else None
+        recorder = None
+        
+        print("Starting webcam detection in capture and display processes. Press 'q' to quit.")
         
-        return annotated
+        try:
+            while not stop.is_set():
+                item = ring.take_latest(timeout=0.5)
+                if item is None:
+                    if ring.ended or not workers[0].is_alive():
+                        print("Error: Could not read from webcam")
+                        break
+                    if not workers[1].is_alive():
+                        print("Error: Display process exited")
+                        break
+                    continue
+                slot, frame_id, _, height, width = item
+                frame = ring.frame(slot, height, width)
+                frame_count += 1
+                start_time = time.time()
+                
+                detections = self.detect_objects(frame, frame_index=frame_id)
+                self._store_live(detections, aggregator)
+                
+                processing_time = time.time() - start_time
+                fps_counter.append(1.0 / processing_time if processing_time > 0 else 0)
+                avg_fps = sum(fps_counter) / len(fps_counter)
+                
+                if self.record_options and not recorder and len(fps_counter) == fps_counter.maxlen:
+                    recorder = self.make_recorder('webcam', max(1.0, avg_fps))
+                if recorder:
+                    # The recorder keeps frames beyond this slot's lifetime
+                    clip = recorder.push(frame.copy(), self.detected_classes(detections))
+                    if clip:
+                        print(f"Recording clip {clip}")
+                
+                # The display process returns the slot once it has drawn the frame
+                del frame
+                results.put((slot, height, width, (detections.class_ids, detections.confidences,
+                                                   detections.boxes, avg_fps)))
+        finally:
+            stop.set()
+            results.put(None)
+            for worker in workers:
+                worker.join(timeout=2.0)
+                if worker.is_alive():
+                    worker.terminate()
+            ring.close()
+            if aggregator:
+                self.store_events(aggregator.flush())
+            if recorder:
+                recorder.close()
+        
+        print(f"Session ended. Processed {frame_count} frames, "
+              f"capture dropped {ring.dropped.value} while all slots were busy.")
+
+    def _store_live(self, detections, aggregator=None):
+        """Store one live frame as rows, or as events when an aggregator is given"""
+        if aggregator:
+            self.store_events(aggregator.update(detections.to_dicts(self.class_names),
+                                                detections.timestamp))
+        else:
+            self.store_frame(detections, 'webcam')
+        self.detection_history.extend(detections.to_dicts(self.class_names))
+
+    def draw_detections(self, frame, detections):
+        """Draw bounding boxes and labels on frame"""
+        return draw_boxes(frame, detections, self.class_names)
 
     def generate_report(self, output_path='detection_report.json'):
         """Generate comprehensive detection report"""
@@ -279,6 +934,7 @@ class SmartDetectionSystem:
             'timestamp': datetime.now().isoformat(),
             'total_detections': len(list(self.detection_history)),
             'accuracy_metrics': metrics,
+            'cascade': self.cascade_stats.describe() if self.cascade else None,
             'model_info': {
                 'name': 'YOLOv11n',
                 'size': '6.2MB',
@@ -308,9 +964,21 @@ Examples:
   python yodavi.py --source image.jpg --output result.jpg
   python yodavi.py --source video.mp4 --output output.mp4 --report
   python yodavi.py --source folder/ --report
+  python yodavi.py --source video.mp4 --output output.mp4 --sink columnar --log-dir runs/video
+  python yodavi.py --source long.mp4 --output long_out.mp4 --checkpoint-seconds 60
+  python yodavi.py --source archive.mp4 --analyze-only --sample-seconds 5
+  python yodavi.py --source video.mp4 --output output.mp4 --cascade-model yolo11s.pt
+  python yodavi.py --source panorama.jpg --output result.jpg --tile 640 --tile-overlap 0.25
+  python yodavi.py --source webcam --multiprocess
+  python yodavi.py --source webcam --record-classes knife,person@20-6 --record-dir clips
+  python yodavi.py --source folder/ --store-raw
+  python yodavi.py --source spool/ --watch --watch-batch 16 --watch-workers 4
+  python yodavi.py --rescore --thresholds person=0.55,car=0.65,default=0.45 --iou 0.5 --report
+  python yodavi.py --retention-days 30
+  python yodavi.py --region 100,50,300,400 --class person --since 2024-05-01
         """)
     
-    parser.add_argument('--source', required=True,
+    parser.add_argument('--source',
                        help='Input source: webcam, image file, video file, or folder')
     parser.add_argument('--output', 
                        help='Output file path (optional for webcam)')
@@ -322,11 +990,121 @@ Examples:
                        help='Generate detection report')
     parser.add_argument('--verbose', action='store_true',
                        help='Verbose output')
+    parser.add_argument('--sink', choices=SINKS, default='sqlite',
+                       help='Detection storage: sqlite table, columnar log, or both (default: sqlite)')
+    parser.add_argument('--log-dir', default='detection_log',
+                       help='Directory of the columnar detection log (default: detection_log)')
+    parser.add_argument('--tile', type=int,
+                       help='Sliced inference: detect on overlapping tiles of this size in pixels')
+    parser.add_argument('--tile-overlap', type=float, default=0.2,
+                       help='Fraction by which neighbouring tiles overlap (default: 0.2)')
+    parser.add_argument('--no-full-frame', action='store_true',
+                       help='Sliced inference: skip the extra whole-frame pass')
+    parser.add_argument('--cascade-model',
+                       help='Re-check uncertain frames with this larger model, e.g. yolo11s.pt')
+    parser.add_argument('--cascade-margin', type=float, default=0.15,
+                       help='Escalate boxes this close to their class threshold (default: 0.15)')
+    parser.add_argument('--cascade-watch', default='knife',
+                       help='Classes always escalated, comma-separated (default: knife)')
+    parser.add_argument('--cascade-crops', action='store_true',
+                       help='Escalate padded crops around uncertain boxes instead of whole frames')
+    parser.add_argument('--rescan', action='store_true',
+                       help='Folder: process every image even if the manifest says it is unchanged')
+    parser.add_argument('--watch', action='store_true',
+                       help='Folder: keep running and process images as they arrive')
+    parser.add_argument('--watch-batch', type=int, default=8,
+                       help='Watch: images per model call (default: 8)')
+    parser.add_argument('--watch-workers', type=int, default=4,
+                       help='Watch: threads decoding images concurrently (default: 4)')
+    parser.add_argument('--settle', type=float, default=1.0,
+                       help='Watch: seconds a file must stay unchanged before it is read (default: 1)')
+    parser.add_argument('--poll-interval', type=float, default=2.0,
+                       help='Watch: seconds between rescans when polling (default: 2)')
+    parser.add_argument('--polling', action='store_true',
+                       help='Watch: poll even where inotify is available, e.g. on network mounts')
+    parser.add_argument('--checkpoint-seconds', type=float,
+                       help='Video: checkpoint every N seconds of video; rerun the same command to resume')
+    parser.add_argument('--analyze-only', action='store_true',
+                       help='Video: decode only sampled frames; --output becomes a sparse annotated video')
+    parser.add_argument('--stride', type=int, default=3,
+                       help='Video analysis: process every Nth frame (default: 3)')
+    parser.add_argument('--sample-seconds', type=float,
+                       help='Video analysis: process one frame every N seconds (seeks when coarse)')
+    parser.add_argument('--record-classes',
+                       help='Record clips when these classes appear, e.g. knife,person@20-6 (local hours)')
+    parser.add_argument('--record-dir', default='clips',
+                       help='Directory for recorded clips (default: clips)')
+    parser.add_argument('--pre-roll', type=float, default=5.0,
+                       help='Seconds recorded before a trigger (default: 5)')
+    parser.add_argument('--post-roll', type=float, default=5.0,
+                       help='Seconds recorded after the last trigger (default: 5)')
+    parser.add_argument('--multiprocess', action='store_true',
+                       help='Webcam: capture and display in separate processes sharing frame memory')
+    parser.add_argument('--events', action='store_true',
+                       help='Webcam: store one event per object appearance instead of every box')
+    parser.add_argument('--store-raw', action='store_true',
+                       help='Also store all predictions above --raw-floor for later --rescore')
+    parser.add_argument('--raw-floor', type=float, default=0.05,
+                       help='Lowest confidence stored with --store-raw (default: 0.05)')
+    parser.add_argument('--rescore', action='store_true',
+                       help='Rebuild stored detections from raw predictions without re-running the model')
+    parser.add_argument('--thresholds',
+                       help='Re-score: per-class confidences, e.g. person=0.55,car=0.65,default=0.45')
+    parser.add_argument('--iou', type=float, default=0.4,
+                       help=f'Re-score: NMS IoU, at most {RAW_IOU} (default: 0.4)')
+    parser.add_argument('--retention-days', type=int,
+                       help='Downsample stored detections older than N days into hourly aggregates')
+    parser.add_argument('--aggregate-days', type=int, default=0,
+                       help='Delete hourly aggregates older than N days (default: keep)')
+    parser.add_argument('--region',
+                       help='Query stored detections in a pixel region x1,y1,x2,y2')
+    parser.add_argument('--region-mode', choices=['intersects', 'within', 'contains'],
+                       default='intersects', help='How boxes must relate to --region')
+    parser.add_argument('--class', dest='class_name',
+                       help='Region query: only this class')
+    parser.add_argument('--since', help='Region query: ISO start time (UTC)')
+    parser.add_argument('--until', help='Region query: ISO end time (UTC)')
     
     args = parser.parse_args()
+    if args.source is None and args.retention_days is None and args.region is None and not args.rescore:
+        parser.error('--source is required unless only running --retention-days, --region or --rescore')
+    thresholds = {}
+    if args.thresholds:
+        try:
+            for item in args.thresholds.split(','):
+                name, value = item.split('=')
+                thresholds[name.strip()] = float(value)
+        except ValueError:
+            parser.error('--thresholds must look like person=0.55,car=0.65')
+    if args.iou > RAW_IOU:
+        parser.error(f'--iou cannot exceed {RAW_IOU}, the IoU raw predictions are captured with')
+    if args.record_classes:
+        try:
+            parse_triggers(args.record_classes)
+        except ValueError as e:
+            parser.error(f'--record-classes: {e}')
+    region = None
+    if args.region:
+        try:
+            region = [float(value) for value in args.region.split(',')]
+        except ValueError:
+            region = []
+        if len(region) != 4:
+            parser.error('--region must be four numbers: x1,y1,x2,y2')
     
     # Initialize detection system
-    detector = SmartDetectionSystem(args.model)
+    detector = SmartDetectionSystem(args.model, sink=args.sink, log_dir=args.log_dir)
+    if args.tile:
+        detector.enable_tiling(args.tile, args.tile_overlap, not args.no_full_frame)
+    if args.cascade_model:
+        detector.enable_cascade(args.cascade_model, args.cascade_margin,
+                                [name.strip() for name in args.cascade_watch.split(',') if name.strip()],
+                                args.cascade_crops)
+    if args.store_raw:
+        detector.enable_raw_capture(args.raw_floor)
+    if args.record_classes:
+        detector.enable_recording(args.record_dir, args.record_classes,
+                                  args.pre_roll, args.post_roll)
     
     print("🎯 YODAVI - Smart Detection System")
     print("===================================")
@@ -336,30 +1114,51 @@ Examples:
     print()
     
     try:
-        if args.source.lower() == 'webcam':
-            detector.process_webcam()
+        if args.source is None:
+            pass
+        elif args.source.lower() == 'webcam':
+            detector.process_webcam(events=args.events, multiprocess=args.multiprocess)
         elif os.path.isfile(args.source):
-            if args.source.lower().endswith(('.mp4', '.avi', '.mov', '.mkv')):
-                detector.process_video(args.source, args.output)
+            if args.source.lower().endswith(VIDEO_EXTENSIONS) and args.analyze_only:
+                detector.analyze_video(args.source, args.output, args.stride, args.sample_seconds)
+            elif args.source.lower().endswith(VIDEO_EXTENSIONS):
+                detector.process_video(args.source, args.output, args.checkpoint_seconds)
             else:
                 detector.process_image(args.source, args.output)
+        elif os.path.isdir(args.source) and args.watch:
+            detector.watch_directory(args.source, args.watch_batch, args.watch_workers,
+                                     args.settle, args.poll_interval, args.polling)
         elif os.path.isdir(args.source):
-            # Process all images in directory
-            image_extensions = ('.jpg', '.jpeg', '.png', '.bmp')
-            processed = 0
-            
-            for filename in os.listdir(args.source):
-                if filename.lower().endswith(image_extensions):
-                    filepath = os.path.join(args.source, filename)
-                    print(f"Processing: {filename}")
-                    detector.process_image(filepath)
-                    processed += 1
-            
-            print(f"\nProcessed {processed} images")
+            # Process new and changed images in the tree; --output is a mirror directory
+            detector.process_directory(args.source, args.output, args.rescan)
         else:
             print(f"Error: Source '{args.source}' not found")
             return
         
+        if args.rescore:
+            default = thresholds.pop('default', None)
+            summary = detector.rescore(thresholds, default, args.iou, args.conf)
+            print(f"Re-scored {summary['frames']} frames from {summary['sources']} sources: "
+                  f"kept {summary['kept_boxes']} of {summary['raw_boxes']} raw boxes")
+        
+        if args.retention_days is not None:
+            summary = detector.apply_retention(args.retention_days, args.aggregate_days)
+            print(f"Retention: downsampled {summary['downsampled_rows']} rows and "
+                  f"{summary['downsampled_events']} events, pruned "
+                  f"{summary['pruned_raw_predictions']} raw frames, "
+                  f"reclaimed {summary['vacuumed_pages']} pages")
+        
+        if region:
+            matches = detector.query_region(
+                region, args.region_mode, class_name=args.class_name,
+                start=normalize_timestamp(args.since) if args.since else None,
+                end=normalize_timestamp(args.until) if args.until else None)
+            print(f"Region {args.region_mode} {args.region}: {len(matches)} detections")
+            for match in matches:
+                x1, y1, x2, y2 = match['bbox']
+                print(f"  {match['timestamp']} {match['class']} {match['confidence']:.2f} "
+                      f"[{x1:.0f}, {y1:.0f}, {x2:.0f}, {y2:.0f}] {match['image_path']}")
+        
         if args.report:
             detector.generate_report()
         
@@ -371,6 +1170,12 @@ Examples:
             for class_name, stats in metrics.items():
                 print(f"{class_name}: {stats['count']} detections, "
                      f"avg confidence: {stats['avg_confidence']:.3f}")
+        
+        if detector.cascade:
+            cascade = detector.cascade_stats.describe()
+            print(f"\nCascade: escalated {cascade['escalated_frames']} of {cascade['frames']} frames "
+                  f"({cascade['escalation_rate']:.1%}), {cascade['uncertain_boxes']} uncertain and "
+                  f"{cascade['watched_boxes']} watched boxes")
     
     except KeyboardInterrupt:
         print("\n⏹️  Detection stopped by user")
@@ -380,6 +1185,14 @@ Examples:
             import traceback
             traceback.print_exc()
     finally:
+        if detector.clip_writer:
+            detector.clip_writer.stop()
+            if detector.clip_writer.dropped_frames:
+                print(f"⚠️  Clip encoder fell behind: {detector.clip_writer.dropped_frames} "
+                      f"frames were left out of recorded clips")
+        if detector.columnar:
+            detector.columnar.close()
+            print(f"Columnar log: {detector.columnar.rows_written} detections in {args.log_dir}")
         if detector.db:
             detector.db.close()
 
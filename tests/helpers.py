@@ -0,0 +1,37 @@
+"""
+Shared fixtures for tests that run SmartDetectionSystem without a trained model
+"""
+
+import os
+import sys
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from yodavi import SmartDetectionSystem
+
+
+class FakeModel:
+    """Stands in for YOLO where tests stub out detection; only class names are used"""
+
+    def __init__(self, names=None):
+        self.names = names or {0: 'person'}
+
+
+class StubDetectionSystem(SmartDetectionSystem):
+    """SmartDetectionSystem on an in-memory (or given) database with a FakeModel.
+
+    The real __init__ runs, so the schema and settings match production;
+    subclasses override detection or storage for what they test.
+    """
+
+    def __init__(self, db=':memory:', **kwargs):
+        super().__init__(db=db, model=FakeModel(), **kwargs)
+
+    def settings_fingerprint(self):
+        return 'stub'
+
+
+def create_db():
+    """In-memory connection with the schema SmartDetectionSystem creates"""
+    return StubDetectionSystem().db
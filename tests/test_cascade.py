@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the two-tier model cascade
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+import torch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from cascade import CascadeStats, crop_window, escalation_masks
+from detections import Detections
+from yodavi import SmartDetectionSystem
+
+NAMES = {0: 'person', 1: 'knife', 2: 'car'}
+
+
+class FakeBoxes:
+    def __init__(self, rows):
+        data = torch.tensor(rows, dtype=torch.float32).reshape(-1, 6)
+        self.xyxy, self.conf, self.cls = data[:, :4], data[:, 4], data[:, 5]
+
+    def __len__(self):
+        return len(self.cls)
+
+
+class FakeModel:
+    """Returns fixed boxes for every input and records input sizes"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def __call__(self, frames, conf=0.5, iou=0.4):
+        frames = frames if isinstance(frames, list) else [frames]
+        self.calls.append([frame.shape[:2] for frame in frames])
+        return [type('Result', (), {'boxes': FakeBoxes([r for r in self.rows if r[4] >= conf])})()
+                for _ in frames]
+
+
+class CascadeSystem(SmartDetectionSystem):
+    def __init__(self, primary, large, crops):
+        self.model = primary
+        self.class_names = NAMES
+        self.tiling = None
+        self.threshold_table = np.array([0.6, 0.4, 0.7], dtype=np.float32)
+        self.raw_floor = None
+        self.nms_iou = 0.4
+        self.cascade = {'model': large, 'margin': 0.1, 'watch_ids': {1}, 'crops': crops}
+        self.cascade_stats = CascadeStats()
+
+
+class TestCascade(unittest.TestCase):
+    """Test cases for escalation decisions and both escalation modes"""
+
+    def test_escalation_masks(self):
+        """Test boxes near their class threshold or of a watched class escalate"""
+        detections = Detections([0, 0, 2, 1], [0.95, 0.65, 0.62, 0.9], np.zeros((4, 4)))
+        uncertain, watched = escalation_masks(detections, np.array([0.6, 0.4, 0.7]), 0.1, {1})
+        self.assertEqual(uncertain.tolist(), [False, True, True, False])
+        self.assertEqual(watched.tolist(), [False, False, False, True])
+
+    def test_crop_window(self):
+        """Test windows pad the box, respect a minimum size and stay in the frame"""
+        self.assertEqual(crop_window([100, 100, 200, 300], 640, 480), (75, 50, 225, 350))
+        self.assertEqual(crop_window([0, 0, 10, 10], 640, 480), (0, 0, 69, 69))
+
+    def test_confident_frames_not_escalated(self):
+        """Test frames with only clear detections never reach the larger model"""
+        large = FakeModel([])
+        system = CascadeSystem(FakeModel([[10, 10, 50, 50, 0.95, 0]]), large, crops=False)
+        detections = system.detect_objects(np.zeros((480, 640, 3), dtype=np.uint8))
+        self.assertEqual(len(detections), 1)
+        self.assertEqual(large.calls, [])
+        self.assertEqual(system.cascade_stats.describe()['escalation_rate'], 0.0)
+
+    def test_frame_escalation_replaces_result(self):
+        """Test an uncertain frame is answered by the larger model"""
+        primary = FakeModel([[10, 10, 50, 50, 0.62, 0]])
+        large = FakeModel([[12, 12, 52, 52, 0.9, 0], [300, 300, 340, 340, 0.8, 2]])
+        system = CascadeSystem(primary, large, crops=False)
+        detections = system.detect_objects(np.zeros((480, 640, 3), dtype=np.uint8))
+        self.assertEqual(detections.class_ids.tolist(), [0, 2])
+        self.assertEqual(large.calls, [[(480, 640)]])
+        stats = system.cascade_stats.describe()
+        self.assertEqual((stats['escalated_frames'], stats['uncertain_boxes']), (1, 1))
+
+    def test_crop_escalation_keeps_confident_boxes(self):
+        """Test only crops around escalated boxes are re-detected and merged back"""
+        primary = FakeModel([[10, 10, 50, 50, 0.95, 0], [400, 300, 420, 360, 0.9, 1]])
+        # The larger model sees the knife at 0.85 within its crop
+        large = FakeModel([[10, 10, 30, 70, 0.85, 1]])
+        system = CascadeSystem(primary, large, crops=True)
+        detections = system.detect_objects(np.zeros((480, 640, 3), dtype=np.uint8))
+
+        self.assertEqual(len(large.calls[0]), 1)
+        self.assertLess(large.calls[0][0][0] * large.calls[0][0][1], 480 * 640 / 10)
+        self.assertEqual(sorted(detections.class_ids.tolist()), [0, 1])
+        knife = detections.boxes[detections.class_ids == 1][0]
+        x1, y1 = crop_window([400, 300, 420, 360], 640, 480)[:2]
+        np.testing.assert_array_equal(knife, [x1 + 10, y1 + 10, x1 + 30, y1 + 70])
+        self.assertEqual(system.cascade_stats.describe()['watched_boxes'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
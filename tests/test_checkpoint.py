@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Unit tests for checkpointed, resumable video processing
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+import cv2
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from checkpoint import VideoCheckpoint, segment_path
+from database import insert_raw_predictions
+from detections import Detections
+from tests.helpers import StubDetectionSystem, create_db
+
+FRAMES = 30
+
+
+class FailingSystem(StubDetectionSystem):
+    """One detection per processed frame; optionally fails at a given frame"""
+
+    def __init__(self, conn, fail_at=None):
+        super().__init__(conn)
+        self.fail_at = fail_at
+
+    def detect_objects(self, frame, conf_threshold=0.5, frame_index=0):
+        if frame_index == self.fail_at:
+            raise RuntimeError('preempted')
+        return Detections([0], [0.9], [[frame_index, 0, frame_index + 1, 1]], frame_index=frame_index)
+
+    def draw_detections(self, frame, detections):
+        return frame
+
+
+class TestVideoCheckpoint(unittest.TestCase):
+    """Test cases for checkpoints, resuming and joining output segments"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.video = os.path.join(self.dir, 'input.avi')
+        writer = cv2.VideoWriter(self.video, cv2.VideoWriter_fourcc(*'MJPG'), 10, (64, 48))
+        for index in range(1, FRAMES + 1):
+            writer.write(np.full((48, 64, 3), index * 8, dtype=np.uint8))
+        writer.release()
+        self.output = os.path.join(self.dir, 'output.avi')
+        self.conn = create_db()
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.dir)
+
+    def stored_frames(self):
+        return [row[0] for row in self.conn.execute(
+            "SELECT CAST(x1 AS INTEGER) FROM detections WHERE image_path = ? ORDER BY x1",
+            (self.video,))]
+
+    def test_resume_after_failure(self):
+        with self.assertRaises(RuntimeError):
+            FailingSystem(self.conn, fail_at=18).process_video(
+                self.video, self.output, checkpoint_seconds=0.6)
+        position, segments = self.conn.execute(
+            'SELECT position, segments FROM video_checkpoints').fetchone()
+        self.assertEqual(position, 17)
+        self.assertIn(os.path.basename(segment_path(self.output, 2)), segments)
+        self.assertFalse(os.path.exists(self.output))
+        self.assertEqual(self.stored_frames(), [3, 6, 9, 12, 15])
+
+        series = FailingSystem(self.conn).process_video(
+            self.video, self.output, checkpoint_seconds=0.6)
+        self.assertEqual(series['frame'].tolist(), [18, 21, 24, 27, 30])
+        self.assertEqual(self.stored_frames(), list(range(3, FRAMES + 1, 3)))
+
+        # One valid output with every frame in order; segments and checkpoint are gone
+        cap = cv2.VideoCapture(self.output)
+        means = []
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            means.append(frame.mean())
+        cap.release()
+        self.assertEqual(len(means), FRAMES)
+        # Two lossy encodes shift the levels, but each frame is one step brighter
+        steps = np.diff(means)
+        self.assertTrue(((steps > 4) & (steps < 12)).all(), steps)
+        self.assertEqual(sorted(os.listdir(self.dir)), ['input.avi', 'output.avi'])
+        self.assertIsNone(self.conn.execute('SELECT * FROM video_checkpoints').fetchone())
+
+    def test_rows_after_checkpoint_are_discarded(self):
+        checkpoint = VideoCheckpoint(self.conn, self.video, None, 'v1')
+        self.assertEqual(checkpoint.resume(), 0)
+        checkpoint.save(0)
+        self.conn.execute("INSERT INTO detections (class_name, x1, y1, x2, y2, image_path) "
+                          "VALUES ('person', 3, 0, 4, 1, ?)",
+                          (self.video,))
+        checkpoint.save(6)
+        # Stored by a run that was killed before its next checkpoint
+        self.conn.execute("INSERT INTO detections (class_name, x1, y1, x2, y2, image_path) "
+                          "VALUES ('person', 9, 0, 10, 1, ?)",
+                          (self.video,))
+        self.conn.commit()
+
+        self.assertEqual(VideoCheckpoint(self.conn, self.video, None, 'v1').resume(), 6)
+        self.assertEqual(self.stored_frames(), [3])
+
+        # Other settings: the interrupted run is dropped entirely
+        self.assertEqual(VideoCheckpoint(self.conn, self.video, None, 'v2').resume(), 0)
+        self.assertEqual(self.stored_frames(), [])
+
+
+    def test_raw_frames_of_earlier_runs_survive(self):
+        def raw_frames():
+            return [row[0] for row in self.conn.execute(
+                'SELECT frame_index FROM raw_predictions WHERE source = ? ORDER BY id', (self.video,))]
+
+        def store_raw(frame_index):
+            insert_raw_predictions(self.conn, Detections([0], [0.9], [[0, 0, 1, 1]],
+                                                         frame_index=frame_index), self.video)
+            self.conn.commit()
+
+        # A completed earlier run of the same video
+        for frame_index in (3, 12, 24):
+            store_raw(frame_index)
+
+        checkpoint = VideoCheckpoint(self.conn, self.video, None, 'v1')
+        checkpoint.resume()
+        store_raw(3)
+        checkpoint.save(6)
+        store_raw(9)  # after the last checkpoint
+
+        self.assertEqual(VideoCheckpoint(self.conn, self.video, None, 'v1').resume(), 6)
+        self.assertEqual(raw_frames(), [3, 12, 24, 3])
+        self.assertEqual(VideoCheckpoint(self.conn, self.video, None, 'v2').resume(), 0)
+        self.assertEqual(raw_frames(), [3, 12, 24])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the columnar detection log
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from columnar import ColumnarReader, ColumnarWriter
+
+
+class TestColumnarLog(unittest.TestCase):
+    """Test cases for writing chunks and reading them back as arrays"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'log')
+        self.names = {0: 'person', 2: 'car'}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_frames(self, writer):
+        writer.append(1, 100.0, [0, 2], [0.9, 0.6], [[0, 0, 10, 10], [5, 5, 50, 40]])
+        writer.append(2, 101.0, [], [], [])
+        writer.append(3, 102.0, [0], [0.7], [[1, 1, 11, 11]])
+
+    def test_round_trip(self):
+        """Test rows come back column by column in append order"""
+        with ColumnarWriter(self.path, self.names, chunk_rows=2) as writer:
+            self.write_frames(writer)
+            # The first frame filled a chunk and was written straight away
+            self.assertEqual(writer.rows_written, 2)
+
+        reader = ColumnarReader(self.path)
+        self.assertEqual(len(reader), 3)
+        np.testing.assert_array_equal(reader['frame'], [1, 1, 3])
+        np.testing.assert_array_equal(reader['class_id'], [0, 2, 0])
+        np.testing.assert_allclose(reader['confidence'], [0.9, 0.6, 0.7], rtol=1e-6)
+        self.assertEqual(reader['box'].shape, (3, 4))
+        np.testing.assert_array_equal(reader['box'][1], [5, 5, 50, 40])
+        self.assertEqual(reader.class_counts(), {'person': 2, 'car': 1})
+
+    def test_appends_across_sessions_and_masks(self):
+        """Test reopening appends and masks combine class, time and confidence"""
+        with ColumnarWriter(self.path, self.names) as writer:
+            self.write_frames(writer)
+        with ColumnarWriter(self.path, {}) as writer:
+            writer.append(4, 200.0, [2], [0.95], [[0, 0, 1, 1]])
+
+        reader = ColumnarReader(self.path)
+        self.assertEqual(len(reader), 4)
+        self.assertEqual(reader.class_names, self.names)
+        self.assertEqual(int(reader.mask(class_name='person').sum()), 2)
+        self.assertEqual(int(reader.mask(start=101.0, end=200.0).sum()), 1)
+        self.assertEqual(int(reader.mask(class_name='car', min_confidence=0.9).sum()), 1)
+
+    def test_partial_chunk_is_trimmed(self):
+        """Test columns of unequal length are cut back to complete rows"""
+        with ColumnarWriter(self.path, self.names) as writer:
+            self.write_frames(writer)
+        with open(os.path.join(self.path, 'frame.bin'), 'ab') as f:
+            f.write(np.array([9], dtype='<i8').tobytes())
+
+        self.assertEqual(len(ColumnarReader(self.path)), 3)
+
+    def test_reopening_realigns_columns(self):
+        """Test a writer truncates a torn chunk before appending after it"""
+        with ColumnarWriter(self.path, self.names) as writer:
+            self.write_frames(writer)
+        # A crash part-way through a chunk: one full row in one column, half a row in another
+        with open(os.path.join(self.path, 'frame.bin'), 'ab') as f:
+            f.write(np.array([9], dtype='<i8').tobytes())
+        with open(os.path.join(self.path, 'box.bin'), 'ab') as f:
+            f.write(np.array([1, 2], dtype='<f4').tobytes())
+
+        with ColumnarWriter(self.path, {}) as writer:
+            writer.append(4, 200.0, [2], [0.95], [[0, 0, 1, 1]])
+
+        reader = ColumnarReader(self.path)
+        self.assertEqual(len(reader), 4)
+        np.testing.assert_array_equal(reader['frame'], [1, 1, 3, 4])
+        np.testing.assert_array_equal(reader['box'][3], [0, 0, 1, 1])
+
+    def test_empty_log(self):
+        """Test a log with no rows reads as empty arrays"""
+        ColumnarWriter(self.path, self.names).close()
+        reader = ColumnarReader(self.path)
+        self.assertEqual(len(reader), 0)
+        self.assertEqual(reader['box'].shape, (0, 4))
+        self.assertEqual(reader.class_counts(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the SQLite connection pool
+"""
+
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from database import ConnectionPool, fetch_history_page, normalize_timestamp
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Test cases for WAL mode, writer serialization and readers"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pool = ConnectionPool(os.path.join(self.tmp.name, 'test.db'), readers=2)
+        with self.pool.write() as conn:
+            conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)')
+
+    def tearDown(self):
+        self.pool.close()
+        self.tmp.cleanup()
+
+    def test_wal_mode_enabled(self):
+        """Test the database is switched to write-ahead logging"""
+        with self.pool.read() as conn:
+            mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_new_file_uses_incremental_vacuum(self):
+        """Test a new database gets incremental auto-vacuum without a VACUUM"""
+        with self.pool.read() as conn:
+            mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+        self.assertEqual(mode, 2)
+
+    def test_reads_do_not_block_on_open_write(self):
+        """Test readers see the committed snapshot while a write is in progress"""
+        with self.pool.write() as conn:
+            conn.execute("INSERT INTO items (name) VALUES ('committed')")
+
+        with self.pool.write() as conn:
+            conn.execute("INSERT INTO items (name) VALUES ('pending')")
+            with self.pool.read() as reader:
+                names = [row[0] for row in reader.execute('SELECT name FROM items')]
+            self.assertEqual(names, ['committed'])
+
+    def test_readers_are_read_only(self):
+        """Test pooled readers reject writes"""
+        with self.pool.read() as conn:
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("INSERT INTO items (name) VALUES ('nope')")
+
+    def test_failed_write_rolls_back(self):
+        """Test an exception inside a write block discards its changes"""
+        with self.assertRaises(RuntimeError):
+            with self.pool.write() as conn:
+                conn.execute("INSERT INTO items (name) VALUES ('lost')")
+                raise RuntimeError('boom')
+        with self.pool.read() as conn:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM items').fetchone()[0], 0)
+
+
+class TestHistoryPagination(unittest.TestCase):
+    """Test cases for keyset-paginated detection history"""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute('''
+            CREATE TABLE detections (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                class_name TEXT,
+                confidence REAL,
+                source TEXT
+            )
+        ''')
+        # Two rows per second so pages split rows sharing a timestamp
+        rows = [(f"2024-01-01 00:00:{i // 2:02d}", 'person' if i % 3 else 'car', 0.9, 'webcam')
+                for i in range(10)]
+        self.conn.executemany(
+            'INSERT INTO detections (timestamp, class_name, confidence, source) VALUES (?, ?, ?, ?)', rows)
+
+    def collect(self, **filters):
+        ids, cursor = [], None
+        while True:
+            items, cursor = fetch_history_page(self.conn, cursor=cursor, limit=3, **filters)
+            ids.extend(item['id'] for item in items)
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_every_row_once(self):
+        """Test walking the cursors visits each row exactly once in order"""
+        self.assertEqual(self.collect(), list(range(10, 0, -1)))
+        self.assertEqual(self.collect(descending=False), list(range(1, 11)))
+
+    def test_filters(self):
+        """Test class and time range filters"""
+        self.assertEqual(self.collect(class_name='car'), [10, 7, 4, 1])
+        self.assertEqual(self.collect(start='2024-01-01 00:00:01', end='2024-01-01 00:00:03'),
+                         [6, 5, 4, 3])
+
+    def test_normalize_timestamp(self):
+        """Test ISO timestamps are converted to UTC SQLite format"""
+        self.assertEqual(normalize_timestamp('2024-01-01T02:00:00+02:00'), '2024-01-01 00:00:00')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Unit tests for resolution-aware image decoding
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from decoding import read_image, reduction_factor, scale_bbox
+from detections import Detections
+
+
+class TestDecoding(unittest.TestCase):
+    """Test cases for reduced JPEG decodes and box rescaling"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, width, height):
+        path = os.path.join(self.tmp.name, name)
+        image = np.zeros((height, width, 3), dtype=np.uint8)
+        image[:, width // 2:] = 255
+        cv2.imwrite(path, image)
+        return path
+
+    def test_reduction_factor(self):
+        """Test the largest reduction that keeps the long side at the target"""
+        self.assertEqual(reduction_factor(6000, 4000, 640), 8)
+        self.assertEqual(reduction_factor(3000, 2000, 640), 4)
+        self.assertEqual(reduction_factor(1000, 1500, 640), 2)
+        self.assertEqual(reduction_factor(1000, 700, 640), 1)
+        self.assertEqual(reduction_factor(0, 0, 640), 1)
+
+    def test_large_jpeg_decoded_reduced(self):
+        """Test big JPEGs decode at a fraction of the size with a matching scale"""
+        path = self.write('big.jpg', 2600, 1302)
+        image, scale = read_image(path, 640)
+        self.assertEqual(image.shape[:2], (326, 650))
+        self.assertAlmostEqual(scale[0], 4.0)
+        self.assertAlmostEqual(scale[1], 1302 / 326)
+
+        full, full_scale = read_image(path)
+        self.assertEqual(full.shape[:2], (1302, 2600))
+        self.assertEqual(full_scale, (1.0, 1.0))
+
+    def test_png_and_small_images_decoded_fully(self):
+        """Test only JPEGs large enough to shrink are reduced"""
+        self.assertEqual(read_image(self.write('big.png', 2600, 1300), 640)[0].shape[:2], (1300, 2600))
+        self.assertEqual(read_image(self.write('small.jpg', 800, 600), 640)[1], (1.0, 1.0))
+        self.assertEqual(read_image(os.path.join(self.tmp.name, 'missing.jpg'), 640), (None, None))
+
+    def test_boxes_scaled_to_original(self):
+        """Test boxes found on the reduced image map back to original pixels"""
+        self.assertEqual(scale_bbox([10, 20, 30, 40], (4.0, 2.0)), [40.0, 40.0, 120.0, 80.0])
+        scaled = Detections([0], [0.9], [[10, 20, 30, 40]]).scaled(4.0, 2.0)
+        np.testing.assert_array_equal(scaled.boxes, [[40, 40, 120, 80]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Unit tests for live detection deltas
+"""
+
+import unittest
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from deltas import DetectionDeltas
+
+
+def detection(class_name, bbox, confidence=0.9):
+    return {'class': class_name, 'confidence': confidence, 'bbox': bbox, 'timestamp': '12:00:00'}
+
+
+class TestDetectionDeltas(unittest.TestCase):
+    """Test cases for delta generation keyed by track identity"""
+
+    def setUp(self):
+        self.deltas = DetectionDeltas()
+
+    def test_first_frame_adds_everything(self):
+        """Test the first frame has no base and adds every box"""
+        base, delta, snapshot = self.deltas.update([detection('person', [0, 0, 100, 200])], 1)
+        self.assertIsNone(base)
+        self.assertEqual(len(delta['added']), 1)
+        self.assertEqual(snapshot, delta['added'])
+
+    def test_jitter_produces_empty_delta(self):
+        """Test small movements keep the same id and send nothing"""
+        self.deltas.update([detection('person', [0, 0, 100, 200])], 1)
+        base, delta, snapshot = self.deltas.update([detection('person', [2, 1, 101, 199], 0.91)], 2)
+        self.assertEqual(base, 1)
+        self.assertEqual(delta, {})
+        self.assertEqual(len(snapshot), 1)
+
+    def test_move_add_and_remove(self):
+        """Test moved boxes update, new boxes add and vanished boxes remove"""
+        _, first, _ = self.deltas.update([detection('person', [0, 0, 100, 200]),
+                                          detection('car', [300, 300, 400, 400])], 1)
+        person_id, car_id = [item['id'] for item in first['added']]
+        _, delta, snapshot = self.deltas.update([detection('person', [20, 0, 120, 200]),
+                                                 detection('dog', [500, 0, 600, 100])], 2)
+        self.assertEqual([item['id'] for item in delta['updated']], [person_id])
+        self.assertEqual([item['class'] for item in delta['added']], ['dog'])
+        self.assertEqual(delta['removed'], [car_id])
+        self.assertEqual(len(snapshot), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,7 @@ Unit tests for object detection functionality
 import unittest
 import sys
 import os
+import tempfile
 import cv2
 import numpy as np
 
@@ -19,13 +20,18 @@ except ImportError:
     import sys
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
     from src.web_app import PhotoBoothDetector
+from roi import RegionOfInterest
+from tracking import EventAggregator
 
 class TestObjectDetection(unittest.TestCase):
     """Test cases for object detection"""
     
     def setUp(self):
         """Set up test fixtures"""
-        self.detector = PhotoBoothDetector()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.detector = PhotoBoothDetector(os.path.join(tmp.name, 'detections.db'))
+        self.addCleanup(self.detector.db_pool.close)
         
     def test_model_loading(self):
         """Test YOLO model loads correctly"""
@@ -58,5 +64,44 @@ class TestObjectDetection(unittest.TestCase):
         result = cursor.fetchone()
         self.assertIsNotNone(result)
 
+    def test_remove_stream_drops_its_state(self):
+        """Test removing a stream closes its events and forgets its ROI and deltas"""
+        self.detector.streams.add('door', 'missing.mp4')
+        self.detector.rois['door'] = RegionOfInterest([[[0, 0], [1, 0], [1, 1]]])
+        self.detector.deltas['door'] = object()
+        self.detector.event_aggregators['door'] = EventAggregator()
+        self.detector.event_aggregators['door'].update(
+            [{'class': 'person', 'confidence': 0.9, 'bbox': [0, 0, 5, 5]}])
+        
+        self.detector.remove_stream('door')
+        for state in (self.detector.rois, self.detector.deltas,
+                      self.detector.event_aggregators, self.detector.recorders):
+            self.assertNotIn('door', state)
+        with self.detector.db_pool.read() as conn:
+            stored = conn.execute(
+                "SELECT COUNT(*) FROM detection_events WHERE source = 'door'").fetchone()[0]
+        self.assertGreaterEqual(stored, 1)
+        with self.assertRaises(KeyError):
+            self.detector.remove_stream('door')
+
+    def test_roi_of_unknown_stream(self):
+        """Test reading or clearing the ROI of a stream that does not exist is a 404"""
+        import web_app
+        web_app._detector = self.detector
+        try:
+            client = web_app.app.test_client()
+            self.assertEqual(client.get('/streams/nope/roi').status_code, 404)
+            self.assertEqual(client.delete('/streams/nope/roi').status_code, 404)
+        finally:
+            web_app._detector = None
+
+class TestLazyDetector(unittest.TestCase):
+    """Test the web app defers its detector to the serving process"""
+    
+    def test_import_opens_nothing(self):
+        """Test importing the app creates no detector, database pool or threads"""
+        import web_app
+        self.assertIsNone(web_app._detector)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
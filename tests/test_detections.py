@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the array-backed detection types
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from detections import Detections, DetectionSeries
+
+NAMES = {0: 'person', 1: 'bicycle', 2: 'car'}
+
+
+class TestDetections(unittest.TestCase):
+    """Test cases for per-frame detections and multi-frame series"""
+
+    def make(self, frame_index, count):
+        return Detections([frame_index % 3] * count, [0.5] * count,
+                          [[frame_index, 0, frame_index + 1, 1]] * count,
+                          frame_index=frame_index, timestamp=1000.0 + frame_index)
+
+    def test_mask_keeps_frame_metadata(self):
+        """Test subsets keep the frame index and timestamp"""
+        detections = Detections([0, 2], [0.9, 0.4], [[0, 0, 1, 1], [2, 2, 3, 3]],
+                                frame_index=7, timestamp=1000.0)
+        kept = detections[detections.confidences > 0.5]
+        self.assertEqual(len(kept), 1)
+        self.assertEqual((kept.frame_index, kept.timestamp), (7, 1000.0))
+        self.assertEqual(kept.boxes.shape, (1, 4))
+        self.assertEqual(len(Detections.empty()), 0)
+        self.assertEqual(Detections.empty().boxes.shape, (0, 4))
+
+    def test_to_dicts(self):
+        """Test the dict form resolves class names and shares one time per frame"""
+        dicts = Detections([2, 0], [0.75, 0.5], [[1, 2, 3, 4], [5, 6, 7, 8]]).to_dicts(NAMES)
+        self.assertEqual([d['class'] for d in dicts], ['car', 'person'])
+        self.assertEqual(dicts[0]['confidence'], 0.75)
+        self.assertEqual(dicts[1]['bbox'], [5.0, 6.0, 7.0, 8.0])
+        self.assertEqual(dicts[0]['timestamp'], dicts[1]['timestamp'])
+
+    def test_series_grows(self):
+        """Test a series appends past its capacity and keeps row order"""
+        series = DetectionSeries(capacity=2)
+        for frame_index in range(1, 6):
+            series.append(self.make(frame_index, frame_index % 2 + 1))
+        series.append(Detections.empty())
+
+        np.testing.assert_array_equal(series['frame'], [1, 1, 2, 3, 3, 4, 5, 5])
+        np.testing.assert_array_equal(series['timestamp'][:3], [1001.0, 1001.0, 1002.0])
+        self.assertEqual(series['box'].shape, (8, 4))
+        self.assertEqual(series.class_counts(NAMES), {'person': 2, 'bicycle': 3, 'car': 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
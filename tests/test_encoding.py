@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Unit tests for adaptive per-viewer encoding
+"""
+
+import unittest
+import sys
+import os
+import base64
+import cv2
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from encoding import MIN_WIDTH, ViewerRegistry, encode_frame
+
+TIERS = [(80, None), (60, 640), (30, 320)]
+
+
+class TestAdaptiveEncoding(unittest.TestCase):
+    """Test cases for tier selection and encoding"""
+
+    def setUp(self):
+        self.registry = ViewerRegistry(TIERS, max_in_flight=2, downgrade_interval=0, upgrade_interval=0)
+        self.registry.connect('a', 'webcam')
+
+    def test_encode_frame_downscales(self):
+        """Test frames wider than max_width are resized before encoding"""
+        frame = np.zeros((480, 1280, 3), dtype=np.uint8)
+        data = base64.b64decode(encode_frame(frame, 60, 320))
+        decoded = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(decoded.shape[:2], (120, 320))
+
+    def test_encode_frame_clamps_tiny_widths(self):
+        """Test widths below MIN_WIDTH never produce an empty frame"""
+        frame = np.zeros((48, 1920, 3), dtype=np.uint8)
+        data = base64.b64decode(encode_frame(frame, 60, 1))
+        decoded = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(decoded.shape[:2], (2, MIN_WIDTH))
+
+    def test_configure_validates_max_width(self):
+        """Test bad widths are rejected and small ones clamped"""
+        for bad in (-1, '-1', 'wide', 12.5, True, [320]):
+            with self.assertRaises(ValueError):
+                self.registry.configure('a', max_width=bad)
+        self.assertIsNone(self.registry.viewers['a'].max_width)
+        self.registry.configure('a', max_width='8')
+        self.assertEqual(self.registry.viewers['a'].max_width, MIN_WIDTH)
+        self.registry.configure('a', max_width=0)
+        self.assertIsNone(self.registry.viewers['a'].max_width)
+
+    def test_backlog_downgrades_tier(self):
+        """Test a viewer that stops acknowledging frames moves to a cheaper tier"""
+        for frame_count in range(1, 5):
+            self.registry.on_sent('a', frame_count, 1000)
+        self.assertEqual(self.registry.viewers['a'].tier, 2)
+        self.assertEqual(list(self.registry.viewers_for('webcam')), [])
+
+    def test_healthy_viewer_upgrades(self):
+        """Test prompt acknowledgements move a viewer back to a better tier"""
+        self.registry.viewers['a'].tier = 1
+        for frame_count in range(1, 12):
+            self.registry.on_sent('a', frame_count, 1000)
+            self.registry.on_ack('a', frame_count)
+        self.assertEqual(self.registry.viewers['a'].tier, 0)
+
+    def test_low_delivery_rate_downgrades_tier(self):
+        """Test a viewer that acknowledges only a fraction of the bytes sent steps down"""
+        registry = ViewerRegistry(TIERS, max_in_flight=5, downgrade_interval=1, upgrade_interval=0)
+        registry.connect('a', 'webcam')
+        viewer = registry.viewers['a']
+        viewer.last_change -= 10
+        for frame_count in range(1, 7):
+            registry.on_sent('a', frame_count, 10000)
+            if frame_count % 3 == 0:
+                # Skipped frames are popped unacknowledged; backlog and latency stay low
+                registry.on_ack('a', frame_count)
+        self.assertLessEqual(len(viewer.in_flight), 2)
+        self.assertEqual(viewer.tier, 1)
+
+    def test_viewers_grouped_by_encoding(self):
+        """Test viewers sharing a tier share one encode and client limits apply"""
+        self.registry.connect('b', 'webcam')
+        self.registry.connect('c', 'webcam')
+        self.registry.configure('c', max_width=200)
+        groups = self.registry.viewers_for('webcam')
+        self.assertEqual(groups[('jpeg', 80, None)], ['a', 'b'])
+        self.assertEqual(groups[('jpeg', 80, 200)], ['c'])
+
+    def test_webp_requires_opt_in(self):
+        """Test WebP is only used when enabled on the server"""
+        self.registry.configure('a', fmt='webp')
+        self.assertEqual(self.registry.viewers['a'].fmt, 'jpeg')
+
+
+if __name__ == '__main__':
+    unittest.main()
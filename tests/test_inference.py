@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the batching inference service
+"""
+
+import unittest
+import sys
+import os
+import threading
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from inference import InferenceService, PRIORITY_BULK, PRIORITY_LIVE
+
+
+class TestInferenceService(unittest.TestCase):
+    """Test cases for request coalescing and priorities"""
+
+    def setUp(self):
+        self.batches = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def batch_fn(self, frames):
+        self.started.set()
+        self.release.wait()
+        self.batches.append(list(frames))
+        return [f"result-{frame}" for frame in frames]
+
+    def test_results_returned_per_request(self):
+        """Test each caller gets the result for its own frame"""
+        service = InferenceService(self.batch_fn)
+        self.assertEqual(service.detect_many([1, 2, 3]), ['result-1', 'result-2', 'result-3'])
+        self.assertEqual(service.detect(4, PRIORITY_LIVE), 'result-4')
+
+    def test_concurrent_requests_coalesce(self):
+        """Test requests queued while the worker is busy share one batch"""
+        service = InferenceService(self.batch_fn, max_batch_size=8)
+        self.release.clear()
+        first = service.submit('warmup')
+        self.started.wait(timeout=5)
+        futures = [service.submit(i) for i in range(5)]
+        self.release.set()
+        first.result(timeout=5)
+        for future in futures:
+            future.result(timeout=5)
+        self.assertEqual(self.batches[1], [0, 1, 2, 3, 4])
+
+        metrics = service.get_metrics()
+        self.assertEqual(metrics['batches'], 2)
+        self.assertEqual(metrics['max_batch_size'], 5)
+        self.assertEqual(metrics['priorities']['bulk']['requests'], 6)
+
+    def test_live_requests_preempt_bulk(self):
+        """Test live frames are batched ahead of earlier bulk uploads"""
+        service = InferenceService(self.batch_fn, max_batch_size=2)
+        self.release.clear()
+        first = service.submit('warmup')
+        self.started.wait(timeout=5)
+        bulk = [service.submit(f"bulk{i}", PRIORITY_BULK) for i in range(2)]
+        live = service.submit('live', PRIORITY_LIVE)
+        self.release.set()
+        for future in [first, live] + bulk:
+            future.result(timeout=5)
+        self.assertEqual(self.batches[1], ['live', 'bulk0'])
+
+    def test_errors_propagate(self):
+        """Test a failing model call surfaces on every waiting caller"""
+        def failing(frames):
+            raise RuntimeError('model failed')
+
+        service = InferenceService(failing)
+        with self.assertRaises(RuntimeError):
+            service.detect('frame', timeout=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the processed-file manifest and resumable directory runs
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from manifest import Manifest, fingerprint, scan_files
+from tests.helpers import StubDetectionSystem, create_db
+
+
+class CrashingSystem(StubDetectionSystem):
+    """Stores one detection per image and can crash after a number of images"""
+
+    def __init__(self, conn, crash_after=None):
+        super().__init__(conn)
+        self.crash_after = crash_after
+        self.seen = []
+
+    def process_image(self, image_path, output_path=None, preview=True):
+        if self.crash_after is not None and len(self.seen) == self.crash_after:
+            raise KeyboardInterrupt
+        self.seen.append(os.path.basename(image_path))
+        self.db.execute("INSERT INTO detections (class_name, confidence, image_path) "
+                        "VALUES ('person', 0.9, ?)", (image_path,))
+        self.db.commit()
+        return [{'class': 'person'}]
+
+
+class TestManifest(unittest.TestCase):
+    """Test cases for scanning, skipping unchanged files and resuming"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for name in ('a.jpg', 'b.png', 'notes.txt', os.path.join('sub', 'c.jpg'),
+                     os.path.join('sub', 'deeper', 'd.JPG')):
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(b'x' * 10)
+        self.conn = create_db()
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.root)
+
+    def count_rows(self):
+        return self.conn.execute('SELECT COUNT(*) FROM detections').fetchone()[0]
+
+    def test_scan_is_recursive_and_ordered(self):
+        paths = [os.path.relpath(path, self.root)
+                 for path, _, _ in scan_files(self.root, ('.jpg', '.png'))]
+        self.assertEqual(paths, ['a.jpg', 'b.png', os.path.join('sub', 'c.jpg'),
+                                 os.path.join('sub', 'deeper', 'd.JPG')])
+
+    def test_unchanged_files_are_skipped(self):
+        manifest = Manifest(self.conn, 'v1')
+        for path, size, mtime_ns in manifest.pending(scan_files(self.root, ('.jpg',))):
+            manifest.record(path, size, mtime_ns, 0)
+        manifest.checkpoint()
+
+        # Touch one file and grow another
+        changed = os.path.join(self.root, 'a.jpg')
+        os.utime(changed, ns=(0, 1_000_000_000))
+        with open(os.path.join(self.root, 'sub', 'c.jpg'), 'ab') as f:
+            f.write(b'more')
+
+        pending = [os.path.basename(path) for path, _, _ in
+                   Manifest(self.conn, 'v1').pending(scan_files(self.root, ('.jpg',)))]
+        self.assertEqual(pending, ['a.jpg', 'c.jpg'])
+
+        # New settings make every file pending again
+        pending = list(Manifest(self.conn, 'v2').pending(scan_files(self.root, ('.jpg',))))
+        self.assertEqual(len(pending), 3)
+
+    def test_fingerprint(self):
+        self.assertEqual(fingerprint('model.pt', 0.5), fingerprint('model.pt', 0.5))
+        self.assertNotEqual(fingerprint('model.pt', 0.5), fingerprint('model.pt', 0.6))
+
+    def test_resume_after_crash(self):
+        with self.assertRaises(KeyboardInterrupt):
+            CrashingSystem(self.conn, crash_after=2).process_directory(
+                self.root, checkpoint_every=1)
+        self.assertEqual(self.count_rows(), 2)
+
+        detector = CrashingSystem(self.conn)
+        summary = detector.process_directory(self.root, checkpoint_every=1)
+        self.assertEqual(summary, {'processed': 2, 'skipped': 2})
+        self.assertEqual(detector.seen, ['c.jpg', 'd.JPG'])
+        self.assertEqual(self.count_rows(), 4)
+
+    def test_reprocessing_replaces_rows(self):
+        # Rows stored after the last checkpoint are not duplicated on the rerun
+        CrashingSystem(self.conn).process_directory(self.root)
+        self.conn.execute('DELETE FROM processed_files')
+        self.conn.commit()
+        CrashingSystem(self.conn).process_directory(self.root)
+        self.assertEqual(self.count_rows(), 4)
+
+        summary = CrashingSystem(self.conn).process_directory(self.root, rescan=True)
+        self.assertEqual(summary['processed'], 4)
+        self.assertEqual(self.count_rows(), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
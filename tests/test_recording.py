@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Unit tests for event-triggered clip recording
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from recording import ClipRecorder, ClipWriter, parse_triggers, within_hours
+
+
+class RecordingWriter:
+    """ClipWriter stand-in that keeps frame values per clip in memory"""
+
+    def __init__(self):
+        self.clips = {}
+        self.closed = []
+
+    def open(self, key, path, fps, size):
+        self.clips[key] = []
+
+    def write(self, key, frame, block=False):
+        self.clips[key].append(int(frame[0, 0, 0]))
+
+    def close(self, key):
+        self.closed.append(key)
+
+
+class TestClipRecording(unittest.TestCase):
+    """Test cases for trigger parsing, pre/post roll and clip encoding"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def frame(self, value):
+        return np.full((48, 64, 3), value, dtype=np.uint8)
+
+    def test_parse_triggers_and_hours(self):
+        """Test trigger specs and hour windows that wrap past midnight"""
+        self.assertEqual(parse_triggers('knife, person@20-6,'),
+                         {'knife': None, 'person': (20, 6)})
+        noon = time.mktime((2024, 5, 1, 12, 0, 0, 0, 0, -1))
+        night = time.mktime((2024, 5, 1, 23, 0, 0, 0, 0, -1))
+        self.assertFalse(within_hours((20, 6), noon))
+        self.assertTrue(within_hours((20, 6), night))
+        self.assertTrue(within_hours((9, 17), noon))
+        self.assertTrue(within_hours(None, noon))
+        for bad in ('person@night', 'person@20', '@9-17', 'knife@9-30', 'person@8-8'):
+            with self.assertRaises(ValueError):
+                parse_triggers(bad)
+
+    def test_pre_and_post_roll(self):
+        """Test a clip holds the pre-roll, the event and the post-roll only"""
+        writer = RecordingWriter()
+        recorder = ClipRecorder(self.tmp.name, {'knife': None}, fps=1, writer=writer,
+                                pre_seconds=2, post_seconds=2)
+        timeline = [(), (), (), ('knife',), ('person',), (), (), (), ()]
+        started = [recorder.push(self.frame(t), classes, now=t)
+                   for t, classes in enumerate(timeline)]
+
+        self.assertEqual(len(recorder.clips), 1)
+        self.assertEqual(started[3], recorder.clips[0])
+        key = list(writer.clips)[0]
+        # Frames 1-2 are pre-roll; recording stops 2 seconds after frame 3
+        self.assertEqual(writer.clips[key], [1, 2, 3, 4, 5])
+        self.assertEqual(writer.closed, [key])
+        self.assertIn('knife', os.path.basename(recorder.clips[0]))
+
+    def test_retrigger_extends_and_max_length(self):
+        """Test repeated triggers extend a clip up to its maximum length"""
+        writer = RecordingWriter()
+        recorder = ClipRecorder(self.tmp.name, {'knife': None}, fps=1, writer=writer,
+                                pre_seconds=0, post_seconds=1, max_seconds=3)
+        for t in range(6):
+            recorder.push(self.frame(t), ('knife',), now=t)
+        self.assertEqual(list(writer.clips.values()), [[0, 1, 2, 3], [4, 5]])
+
+    def test_clip_encoded_in_background(self):
+        """Test the background writer produces a readable clip file"""
+        writer = ClipWriter(fourcc='MJPG')
+        recorder = ClipRecorder(self.tmp.name, {'car': None}, fps=5, writer=writer,
+                                pre_seconds=1, post_seconds=1, extension='.avi')
+        for t in range(10):
+            recorder.push(self.frame(t * 10), ('car',) if t == 6 else (), now=t / 5)
+        recorder.close()
+        writer.stop()
+
+        capture = cv2.VideoCapture(recorder.clips[0])
+        frames = 0
+        while capture.read()[0]:
+            frames += 1
+        capture.release()
+        # Five pre-roll frames, the trigger frame and five post-roll frames (clipped by the end)
+        self.assertEqual(frames, 9)
+        self.assertEqual(writer.dropped_frames, 0)
+
+    def test_blocking_recorder_never_drops(self):
+        """Test offline recorders wait for the encoder instead of dropping frames"""
+        writer = ClipWriter(fourcc='MJPG', max_queue=1)
+        recorder = ClipRecorder(self.tmp.name, {'car': None}, fps=5, writer=writer,
+                                pre_seconds=0, post_seconds=100, extension='.avi', block=True)
+        for t in range(40):
+            recorder.push(self.frame(t), ('car',), now=t / 5)
+        recorder.close()
+        writer.stop()
+
+        capture = cv2.VideoCapture(recorder.clips[0])
+        frames = 0
+        while capture.read()[0]:
+            frames += 1
+        capture.release()
+        self.assertEqual(frames, 40)
+        self.assertEqual(writer.dropped_frames, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Unit tests for raw prediction storage and re-scoring
+"""
+
+import unittest
+import sys
+import os
+import sqlite3
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from database import init_raw_table, insert_raw_predictions, iter_raw_predictions
+from detections import Detections
+from rescoring import rescore, select_predictions
+from spatial import init_spatial_index
+
+CLASS_NAMES = {0: 'person', 1: 'car'}
+
+
+class TestRescoring(unittest.TestCase):
+    """Test cases for re-applying thresholds and NMS to stored raw predictions"""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute('''
+            CREATE TABLE detections (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                class_name TEXT,
+                confidence REAL,
+                bbox TEXT,
+                image_path TEXT
+            )
+        ''')
+        init_spatial_index(self.conn)
+        init_raw_table(self.conn)
+
+        # Frame 1: two overlapping people (IoU ~0.68) and a weak car
+        raw_id = insert_raw_predictions(self.conn, Detections(
+            [0, 0, 1], [0.9, 0.6, 0.2],
+            [[0, 0, 100, 100], [10, 10, 110, 110], [300, 300, 400, 400]],
+            frame_index=1, timestamp=1714550400.0), 'cam.mp4')
+        # Frame 2: one mid-confidence car
+        insert_raw_predictions(self.conn, Detections(
+            [1], [0.45], [[50, 50, 150, 150]], frame_index=2, timestamp=1714550401.0), 'cam.mp4')
+        # A stale row selected from frame 1 by an earlier run, which re-scoring must replace
+        self.conn.execute("INSERT INTO detections (class_name, confidence, image_path, raw_id) "
+                          "VALUES ('car', 0.99, 'cam.mp4', ?)", (raw_id,))
+        # Rows of the same source from a run without raw capture are left alone
+        self.conn.execute("INSERT INTO detections (class_name, confidence, image_path) "
+                          "VALUES ('bus', 0.8, 'cam.mp4')")
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def stored(self):
+        return self.conn.execute(
+            'SELECT class_name, confidence FROM detections ORDER BY class_name, confidence DESC'
+        ).fetchall()
+
+    def test_round_trip(self):
+        frames = list(iter_raw_predictions(self.conn))
+        self.assertEqual(len(frames), 2)
+        _, source, frame_index, timestamp, class_ids, confidences, boxes = frames[0]
+        self.assertEqual((source, frame_index), ('cam.mp4', 1))
+        self.assertTrue(timestamp.startswith('2024-05-01'))
+        np.testing.assert_array_equal(class_ids, [0, 0, 1])
+        self.assertEqual(boxes.shape, (3, 4))
+
+    def test_thresholds_and_iou(self):
+        table = np.array([0.5, 0.5], dtype=np.float32)
+        summary = rescore(self.conn, CLASS_NAMES, table, iou=0.4)
+        self.assertEqual(summary['frames'], 2)
+        self.assertEqual(summary['raw_boxes'], 4)
+        # The overlapping person is suppressed and the stale row is gone
+        self.assertEqual([name for name, _ in self.stored()], ['bus', 'person'])
+
+        table = np.array([0.5, 0.4], dtype=np.float32)
+        rescore(self.conn, CLASS_NAMES, table, iou=0.7)
+        self.assertEqual([name for name, _ in self.stored()], ['bus', 'car', 'person', 'person'])
+
+    def test_rows_carry_numeric_boxes(self):
+        rescore(self.conn, CLASS_NAMES, np.array([0.5, 0.4], dtype=np.float32))
+        row = self.conn.execute(
+            "SELECT x1, y1, x2, y2, image_path FROM detections WHERE class_name = 'car'").fetchone()
+        self.assertEqual(row, (50.0, 50.0, 150.0, 150.0, 'cam.mp4'))
+
+    def test_select_predictions(self):
+        keep = select_predictions(np.array([0, 0, 1]), np.array([0.9, 0.6, 0.2], dtype=np.float32),
+                                  np.array([[0, 0, 100, 100], [10, 10, 110, 110], [0, 0, 100, 100]],
+                                           dtype=np.float32),
+                                  np.array([0.1, 0.1], dtype=np.float32), 0.4)
+        self.assertEqual(keep.tolist(), [0, 2])
+
+    def test_subset_keeps_raw(self):
+        raw = Detections([0, 1], [0.9, 0.1], [[0, 0, 10, 10], [0, 0, 5, 5]])
+        kept = Detections(raw.class_ids, raw.confidences, raw.boxes, raw=raw)[np.array([True, False])]
+        self.assertIs(kept.raw, raw)
+        self.assertEqual(len(kept.scaled(2, 2).raw), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
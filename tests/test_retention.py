@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Unit tests for detection retention and downsampling
+"""
+
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from database import init_event_table, init_raw_table
+from retention import RetentionManager, connection_writer
+
+
+class TestRetention(unittest.TestCase):
+    """Test cases for downsampling old rows into aggregates"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.conn = sqlite3.connect(os.path.join(self.tmp.name, 'test.db'))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE detections (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                class_name TEXT,
+                confidence REAL,
+                source TEXT
+            )
+        ''')
+        old = [('2000-01-01 10:15:00', 'person', 0.6, 'webcam'),
+               ('2000-01-01 10:45:00', 'person', 0.8, 'webcam'),
+               ('2000-01-01 11:05:00', 'car', 0.9, 'door'),
+               ('2000-01-01 10:20:00', 'person', 1.0, 'webcam')]
+        self.conn.executemany(
+            'INSERT INTO detections (timestamp, class_name, confidence, source) VALUES (?, ?, ?, ?)', old)
+        self.conn.execute("INSERT INTO detections (class_name, confidence, source) VALUES ('dog', 0.7, 'webcam')")
+        self.conn.commit()
+        self.manager = RetentionManager(lambda: connection_writer(self.conn), raw_days=1,
+                                        batch_size=2, batch_pause=0)
+        self.manager.init_schema()
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def test_old_rows_downsampled_in_batches(self):
+        """Test expired rows become hourly aggregates and recent rows stay"""
+        summary = self.manager.run_once()
+        self.assertEqual(summary['downsampled_rows'], 4)
+
+        remaining = self.conn.execute('SELECT class_name FROM detections').fetchall()
+        self.assertEqual(remaining, [('dog',)])
+
+        aggregates = self.conn.execute('''
+            SELECT bucket, class_name, source, count, confidence_sum, max_confidence
+            FROM detection_aggregates ORDER BY bucket
+        ''').fetchall()
+        self.assertEqual(aggregates[0][:4], ('2000-01-01 10:00:00', 'person', 'webcam', 3))
+        self.assertAlmostEqual(aggregates[0][4], 2.4)
+        self.assertEqual(aggregates[0][5], 1.0)
+        self.assertEqual(aggregates[1][:4], ('2000-01-01 11:00:00', 'car', 'door', 1))
+
+    def test_aggregate_retention(self):
+        """Test aggregates past their own retention are deleted"""
+        self.manager.aggregate_days = 30
+        summary = self.manager.run_once()
+        self.assertEqual(summary['expired_aggregates'], 2)
+
+    def test_events_and_raw_predictions_expire(self):
+        """Test old events are folded into aggregates and old raw frames deleted"""
+        init_event_table(self.conn)
+        init_raw_table(self.conn)
+        self.conn.executemany('''
+            INSERT INTO detection_events (source, class_name, first_seen, last_seen, peak_confidence)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [('door', 'car', '2000-01-01 11:00:00', '2000-01-01 11:10:00', 0.5),
+              ('door', 'car', '2000-01-01 11:20:00', '2000-01-01 11:30:00', 0.7),
+              ('door', 'car', '2999-01-01 11:20:00', '2999-01-01 11:30:00', 0.7)])
+        self.conn.executemany(
+            'INSERT INTO raw_predictions (source, frame_index, timestamp) VALUES (?, ?, ?)',
+            [('cam.mp4', 1, '2000-01-01 10:00:00'), ('cam.mp4', 2, '2000-01-01 10:00:01'),
+             ('cam.mp4', 3, '2000-01-01 10:00:02'), ('cam.mp4', 4, '2999-01-01 10:00:00')])
+        self.conn.commit()
+        self.manager.init_schema()
+
+        summary = self.manager.run_once()
+        self.assertEqual(summary['downsampled_events'], 2)
+        self.assertEqual(summary['pruned_raw_predictions'], 3)
+        self.assertEqual(self.conn.execute('SELECT COUNT(*) FROM detection_events').fetchone()[0], 1)
+        self.assertEqual(self.conn.execute('SELECT frame_index FROM raw_predictions').fetchall(), [(4,)])
+        # Events and the door car detection in the same hour are counted apart
+        count, max_confidence = self.conn.execute('''
+            SELECT count, max_confidence FROM event_aggregates
+            WHERE bucket = '2000-01-01 11:00:00' AND class_name = 'car'
+        ''').fetchone()
+        self.assertEqual((count, max_confidence), (2, 0.7))
+        count, max_confidence = self.conn.execute('''
+            SELECT count, max_confidence FROM detection_aggregates
+            WHERE bucket = '2000-01-01 11:00:00' AND class_name = 'car'
+        ''').fetchone()
+        self.assertEqual((count, max_confidence), (1, 0.9))
+
+    def test_enable_incremental_vacuum(self):
+        """Test existing databases are converted to incremental auto-vacuum"""
+        self.manager.enable_incremental_vacuum()
+        self.assertEqual(self.conn.execute('PRAGMA auto_vacuum').fetchone()[0], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
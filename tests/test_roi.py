@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Unit tests for regions of interest
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from roi import RegionOfInterest, parse_rois, points_in_polygon
+
+# An L-shaped region in the lower left of the frame
+L_SHAPE = [[0.0, 0.5], [0.5, 0.5], [0.5, 0.75], [0.25, 0.75], [0.25, 1.0], [0.0, 1.0]]
+
+
+class TestRegionOfInterest(unittest.TestCase):
+    """Test cases for polygon tests, cropping and filtering"""
+
+    def test_points_in_polygon(self):
+        """Test concave polygons with points inside, outside and in the notch"""
+        polygon = np.array(L_SHAPE) * 100
+        points = [[10, 60], [40, 60], [40, 90], [10, 90], [80, 10], [-5, 60]]
+        self.assertEqual(points_in_polygon(points, polygon).tolist(),
+                         [True, True, False, True, False, False])
+
+    def test_crop_to_bounds(self):
+        """Test inference is cropped to the rectangle around all polygons"""
+        roi = RegionOfInterest([L_SHAPE, [[0.8, 0.1], [0.9, 0.1], [0.9, 0.2]]])
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        self.assertEqual(roi.bounds(640, 480), (0, 48, 576, 480))
+        crop, offset = roi.crop(frame)
+        self.assertEqual(crop.shape[:2], (432, 576))
+        self.assertEqual(offset, (0, 48))
+
+    def test_restore_shifts_and_filters(self):
+        """Test crop-relative boxes move back to the frame and outside ones are dropped"""
+        roi = RegionOfInterest([L_SHAPE])
+        detections = [
+            {'class': 'person', 'bbox': [10, 10, 50, 50]},    # centre (30, 270) in frame
+            {'class': 'car', 'bbox': [200, 140, 240, 180]},   # centre (220, 400), in the notch
+        ]
+        kept = roi.restore(detections, (0, 240), 640, 480)
+        self.assertEqual([d['class'] for d in kept], ['person'])
+        self.assertEqual(kept[0]['bbox'], [10, 250, 50, 290])
+        self.assertEqual(roi.restore([], (0, 240), 640, 480), [])
+
+    def test_parse_and_validate(self):
+        """Test JSON config parsing and rejection of bad polygons"""
+        rois = parse_rois('{"door": [[[0.1, 0.1], [0.9, 0.1], [0.5, 0.9]]]}')
+        self.assertEqual(list(rois), ['door'])
+        self.assertEqual(parse_rois(''), {})
+        for polygons in ([], [[[0, 0], [1, 1]]], [[[0, 0], [2, 0], [0, 1]]], [[[0, 0], [0.5, 0], [1, 0]]]):
+            with self.assertRaises(ValueError):
+                RegionOfInterest(polygons)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Unit tests for decode-skipping video sampling
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sampling import VideoSampler
+
+
+class TestVideoSampler(unittest.TestCase):
+    """Test cases for grab-based skipping and seeking"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmp.name, 'clip.avi')
+        writer = cv2.VideoWriter(cls.path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (64, 48))
+        # Frame n (1-based) is filled with 2n so samples can be identified
+        for index in range(1, 51):
+            writer.write(np.full((48, 64, 3), 2 * index, dtype=np.uint8))
+        writer.release()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def assert_frames(self, samples, expected):
+        self.assertEqual([index for index, _ in samples], expected)
+        for index, frame in samples:
+            self.assertAlmostEqual(float(frame.mean()), 2 * index, delta=3)
+
+    def test_grab_skips_retrieval(self):
+        """Test skipped frames are grabbed and only sampled ones retrieved"""
+        sampler = VideoSampler(self.path, stride=3)
+        samples = list(sampler)
+        self.assert_frames(samples, list(range(3, 51, 3)))
+
+        summary = sampler.summary()
+        self.assertEqual(summary['frames'], 50)
+        self.assertEqual(summary['retrieved'], 16)
+        self.assertEqual(summary['seeks'], 0)
+        self.assertEqual(summary['grabbed_only'] + summary['retrieved'], 50)
+        self.assertEqual(summary['retrieve_savings'], 0.68)
+
+    def test_coarse_interval_seeks(self):
+        """Test long intervals seek to the same frames grabbing would reach"""
+        sampler = VideoSampler.every(self.path, 2.0)
+        self.assertEqual(sampler.stride, 20)
+        self.assertTrue(sampler.seek)
+        samples = list(sampler)
+        self.assert_frames(samples, [20, 40])
+        self.assertEqual(sampler.summary()['grabbed_only'], 0)
+        self.assertEqual(sampler.summary()['frames'], 40)
+        self.assertEqual(sampler.summary()['never_decoded'], 38)
+
+    def test_every_frame(self):
+        """Test stride 1 reads every frame"""
+        sampler = VideoSampler(self.path)
+        self.assertEqual(len(list(sampler)), 50)
+        self.assertEqual(sampler.summary()['retrieve_savings'], 0.0)
+
+    def test_missing_source(self):
+        with self.assertRaises(FileNotFoundError):
+            VideoSampler(os.path.join(self.tmp.name, 'missing.avi'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared-memory frame ring and capture processes
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import time
+import cv2
+import numpy as np
+from multiprocessing import shared_memory
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sharedframes import FrameRing, capture_frames, spawn_context
+from streams import ProcessVideoStream, StreamManager
+
+
+def write_clip(path, frames=10):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (64, 48))
+    for i in range(frames):
+        writer.write(np.full((48, 64, 3), i * 20, dtype=np.uint8))
+    writer.release()
+
+
+class TestFrameRing(unittest.TestCase):
+    """Test cases for slot hand-over, stale frame recycling and capture processes"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.clip = os.path.join(self.tmp.name, 'clip.avi')
+        write_clip(self.clip)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_take_latest_recycles_stale_slots(self):
+        """Test only the newest ready frame is returned and older slots become free"""
+        ring = FrameRing(slots=3, shape=(4, 4, 3))
+        try:
+            for _ in range(3):
+                ring.free.get(timeout=1)
+            for slot in range(3):
+                ring.frame(slot, 4, 4)[...] = slot
+                ring.ready.put((slot, slot + 1, time.time(), 4, 4))
+            time.sleep(0.1)  # let the queue feeder thread flush
+
+            slot, frame_id, _, height, width = ring.take_latest(timeout=1)
+            self.assertEqual((slot, frame_id), (2, 3))
+            self.assertTrue((ring.frame(slot, height, width) == 2).all())
+            time.sleep(0.1)
+            self.assertEqual(sorted([ring.free.get(timeout=1), ring.free.get(timeout=1)]), [0, 1])
+            self.assertIsNone(ring.take_latest())
+        finally:
+            ring.close()
+
+    def test_capture_process_writes_into_slots(self):
+        """Test a spawned capture process fills slots that this process reads in place"""
+        context = spawn_context()
+        ring = FrameRing(slots=3, shape=(48, 64, 3), context=context)
+        stop = context.Event()
+        process = context.Process(target=capture_frames, args=(ring, self.clip, stop), daemon=True)
+        process.start()
+        try:
+            seen = []
+            deadline = time.time() + 20
+            while len(seen) < 5 and time.time() < deadline:
+                item = ring.ready.get(timeout=deadline - time.time())
+                slot, frame_id, _, height, width = item
+                seen.append((frame_id, (height, width), float(ring.frame(slot, height, width).mean())))
+                ring.free.put(slot)
+        finally:
+            stop.set()
+            process.join(timeout=5)
+            ring.close()
+
+        self.assertEqual([frame_id for frame_id, _, _ in seen], [1, 2, 3, 4, 5])
+        self.assertEqual(seen[0][1], (48, 64))
+        # Frames arrive in order with their own pixels
+        levels = [level for _, _, level in seen]
+        self.assertEqual(levels, sorted(levels))
+        self.assertGreater(levels[-1] - levels[0], 40)
+        self.assertEqual(process.exitcode, 0)
+
+    def test_producer_allocated_slots_are_unlinked(self):
+        """Test a ring the capture process sized is freed by its creator, even unread"""
+        context = spawn_context()
+        ring = FrameRing(slots=2, shape=None, context=context)
+        stop = context.Event()
+        process = context.Process(target=capture_frames, args=(ring, self.clip, stop), daemon=True)
+        # The process allocates before it first checks stop
+        stop.set()
+        process.start()
+        process.join(timeout=20)
+        ring.close()
+
+        self.assertEqual(ring.shape, (48, 64, 3))
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=ring.shm.name)
+
+    def test_process_stream_manager(self):
+        """Test a StreamManager with capture processes samples like the threaded one"""
+        # The requested size only applies to devices; the clip keeps its own
+        manager = StreamManager(width=32, height=24, capture_processes=True)
+        stream = manager.add('demo', self.clip)
+        self.assertIsInstance(stream, ProcessVideoStream)
+        manager.start_all()
+        try:
+            batch = []
+            deadline = time.time() + 20
+            while not batch and time.time() < deadline:
+                batch = manager.sample()
+                time.sleep(0.01)
+            self.assertEqual(len(batch), 1)
+            name, frame_id, frame, is_device = batch[0]
+            self.assertEqual((name, is_device), ('demo', False))
+            self.assertEqual(frame.shape, (48, 64, 3))
+            # Slots are sized from the clip, not a fixed maximum
+            self.assertEqual(stream.ring.shape, (48, 64, 3))
+            self.assertIsNotNone(manager.describe()[0]['process'])
+        finally:
+            manager.stop_all()
+        self.assertIsNone(stream.ring)
+
+    def test_frames_beyond_slot_shape_are_scaled_down(self):
+        """Test only frames larger than the slots are resized"""
+        stream = ProcessVideoStream('demo', self.clip, slot_shape=(24, 32, 3))
+        stream.start()
+        try:
+            frame = None
+            deadline = time.time() + 20
+            while frame is None and time.time() < deadline:
+                _, frame = stream.read()
+                time.sleep(0.01)
+            self.assertEqual(frame.shape, (24, 32, 3))
+        finally:
+            stream.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the R*Tree region index over stored boxes
+"""
+
+import unittest
+import sys
+import os
+import json
+import sqlite3
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from spatial import init_spatial_index, query_region
+
+
+class TestSpatialIndex(unittest.TestCase):
+    """Test cases for region queries with and without the R*Tree"""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute('''
+            CREATE TABLE detections (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                class_name TEXT,
+                confidence REAL,
+                bbox TEXT,
+                image_path TEXT
+            )
+        ''')
+        # A legacy row with only the JSON bbox
+        self.conn.execute(
+            "INSERT INTO detections (timestamp, class_name, confidence, bbox, image_path) "
+            "VALUES ('2024-05-01 09:00:00', 'person', 0.9, ?, 'webcam')",
+            (json.dumps([10.0, 10.0, 50.0, 50.0]),))
+        self.has_rtree = init_spatial_index(self.conn)
+        rows = [('2024-05-02 09:00:00', 'person', 0.8, 100.0, 100.0, 200.0, 200.0),
+                ('2024-05-03 09:00:00', 'car', 0.7, 0.0, 0.0, 400.0, 300.0),
+                ('2024-05-04 09:00:00', 'person', 0.6, 150.0, 150.0, 250.0, 250.0)]
+        self.conn.executemany('''
+            INSERT INTO detections (timestamp, class_name, confidence, x1, y1, x2, y2, image_path)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 'webcam')
+        ''', rows)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def classes(self, *args, **kwargs):
+        return [row['class'] + row['timestamp'][8:10]
+                for row in query_region(self.conn, *args, use_rtree=self.has_rtree, **kwargs)]
+
+    def test_legacy_rows_backfilled(self):
+        """Test JSON boxes are copied into the numeric columns and the index"""
+        rows = query_region(self.conn, (0, 0, 20, 20), use_rtree=self.has_rtree)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['bbox'], [10.0, 10.0, 50.0, 50.0])
+        if self.has_rtree:
+            count = self.conn.execute('SELECT COUNT(*) FROM detections_rtree').fetchone()[0]
+            self.assertEqual(count, 4)
+
+    def test_region_modes(self):
+        """Test intersects, within and contains against the same region"""
+        region = (90, 90, 210, 210)
+        self.assertEqual(self.classes(region), ['person02', 'car03', 'person04'])
+        self.assertEqual(self.classes(region, 'within'), ['person02'])
+        self.assertEqual(self.classes(region, 'contains'), ['car03'])
+        with self.assertRaises(ValueError):
+            query_region(self.conn, region, 'overlaps')
+
+    def test_class_and_time_filters(self):
+        """Test region filters combine with class and a half-open time range"""
+        region = (0, 0, 500, 500)
+        self.assertEqual(self.classes(region, class_name='person', start='2024-05-02 00:00:00',
+                                      end='2024-05-04 09:00:00'), ['person02'])
+        self.assertEqual(self.classes(region, limit=1), ['person01'])
+
+    def test_scan_fallback_matches_index(self):
+        """Test the column scan used without R*Tree returns the same rows"""
+        region = (120, 120, 160, 160)
+        for mode in ('intersects', 'within', 'contains'):
+            indexed = query_region(self.conn, region, mode, use_rtree=self.has_rtree)
+            scanned = query_region(self.conn, region, mode, use_rtree=False)
+            self.assertEqual(indexed, scanned)
+
+    def test_deleted_rows_leave_index(self):
+        """Test deleting detections removes their index entries"""
+        self.conn.execute("DELETE FROM detections WHERE class_name = 'car'")
+        self.assertEqual(self.classes((0, 0, 500, 500)), ['person01', 'person02', 'person04'])
+        if self.has_rtree:
+            count = self.conn.execute('SELECT COUNT(*) FROM detections_rtree').fetchone()[0]
+            self.assertEqual(count, 3)
+
+
+    def test_backfill_only_until_synced(self):
+        """Test reopening skips the backfill scan unless the sync triggers are missing"""
+        if not self.has_rtree:
+            self.skipTest('SQLite built without R*Tree')
+        self.conn.execute("DELETE FROM detections_rtree WHERE id = 1")
+        init_spatial_index(self.conn)
+        count = self.conn.execute('SELECT COUNT(*) FROM detections_rtree').fetchone()[0]
+        self.assertEqual(count, 3)
+
+        # An interrupted first run left no triggers: the index is completed
+        self.conn.execute('DROP TRIGGER detections_rtree_insert')
+        init_spatial_index(self.conn)
+        count = self.conn.execute('SELECT COUNT(*) FROM detections_rtree').fetchone()[0]
+        self.assertEqual(count, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the streaming detection API
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from detections import Detections
+from tests.helpers import StubDetectionSystem
+
+
+class MeanColourSystem(StubDetectionSystem):
+    """One box per frame at its mean colour"""
+
+    def __init__(self):
+        super().__init__()
+        self.stored = []
+
+    def detect_objects(self, frame, conf_threshold=0.5, frame_index=0):
+        value = float(frame.mean())
+        return Detections([0], [0.9], [[value, 0, value + 1, 1]], frame_index=frame_index)
+
+    def store_frame(self, detections, source='webcam'):
+        self.stored.append((source, detections.frame_index))
+
+
+class TestIterDetections(unittest.TestCase):
+    """Test cases for lazily iterating detections over sources"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.system = MeanColourSystem()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_video(self, frames):
+        path = os.path.join(self.tmp.name, 'clip.avi')
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (64, 48))
+        for index in range(frames):
+            writer.write(np.full((48, 64, 3), index * 20, dtype=np.uint8))
+        writer.release()
+        return path
+
+    def test_video_stride_and_early_stop(self):
+        """Test every stride-th frame is yielded and stopping early is clean"""
+        path = self.write_video(9)
+        results = list(self.system.iter_detections(path, stride=3, store=True))
+        self.assertEqual([r.frame_index for r in results], [3, 6, 9])
+        self.assertEqual(self.system.stored, [(path, 3), (path, 6), (path, 9)])
+
+        stream = self.system.iter_detections(path)
+        first = next(stream)
+        stream.close()
+        self.assertEqual(first.frame_index, 1)
+        self.assertEqual(first.frame.shape, (48, 64, 3))
+
+    def test_folder_and_image(self):
+        """Test folders yield their readable images in name order"""
+        for name, value in (('b.png', 200), ('a.jpg', 100)):
+            cv2.imwrite(os.path.join(self.tmp.name, name), np.full((8, 8, 3), value, dtype=np.uint8))
+        with open(os.path.join(self.tmp.name, 'notes.txt'), 'w') as f:
+            f.write('skip me')
+
+        results = list(self.system.iter_detections(self.tmp.name, annotate=True))
+        self.assertEqual([os.path.basename(r.source) for r in results], ['a.jpg', 'b.png'])
+        self.assertEqual(self.system.stored, [])
+
+        single = list(self.system.iter_detections(results[1].source))
+        self.assertEqual(len(single), 1)
+        self.assertAlmostEqual(float(single[0].detections.boxes[0, 0]), 200.0, delta=2)
+
+        with self.assertRaises(FileNotFoundError):
+            list(self.system.iter_detections(os.path.join(self.tmp.name, 'missing.jpg')))
+
+
+if __name__ == '__main__':
+    unittest.main()
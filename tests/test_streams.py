@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Unit tests for multi-stream ingestion
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import time
+import cv2
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from streams import StreamManager, VideoStream, parse_source, parse_stream_sources
+
+
+class DeadStream(VideoStream):
+    """A stream whose capture fails as soon as it starts, like an unplugged camera"""
+
+    def start(self):
+        self.starts = getattr(self, 'starts', 0) + 1
+
+    def stop(self):
+        pass
+
+
+class TestStreams(unittest.TestCase):
+    """Test cases for stream registration and sampling"""
+
+    def test_parse_stream_sources(self):
+        """Test name=source specs, device indices and unnamed sources"""
+        streams = parse_stream_sources("lobby=0, door=rtsp://cam/live?a=1,demo.mp4")
+        self.assertEqual(streams['lobby'], '0')
+        self.assertEqual(streams['door'], 'rtsp://cam/live?a=1')
+        self.assertEqual(streams['stream2'], 'demo.mp4')
+        self.assertEqual(parse_source('0'), 0)
+
+    def test_parse_unnamed_source_with_query(self):
+        """Test an '=' inside an unnamed URL does not split off a name"""
+        streams = parse_stream_sources("rtsp://cam/live?channel=1, lobby=http://cam/mjpg?fps=5")
+        self.assertEqual(streams, {'stream0': 'rtsp://cam/live?channel=1',
+                                   'lobby': 'http://cam/mjpg?fps=5'})
+
+    def test_stream_limit(self):
+        """Test duplicate names and the stream limit are rejected"""
+        manager = StreamManager(max_streams=1)
+        manager.add('a', 'missing.mp4')
+        with self.assertRaises(ValueError):
+            manager.add('a', 'missing.mp4')
+        with self.assertRaises(ValueError):
+            manager.add('b', 'missing.mp4')
+        manager.remove('a')
+        self.assertEqual(manager.names(), [])
+
+    def test_restart_stopped_streams(self):
+        """Test active streams that stopped are restarted, spaced out by restart_interval"""
+        manager = StreamManager(restart_interval=60)
+        manager.stream_class = DeadStream
+        lobby = manager.add('lobby', 0)
+        door = manager.add('door', 1)
+        manager.start_all({'lobby'})
+        self.assertEqual(lobby.starts, 1)
+
+        self.assertEqual(manager.sample(), [])
+        self.assertEqual(lobby.starts, 2)
+        self.assertFalse(hasattr(door, 'starts'))
+
+        manager.sample()
+        self.assertEqual(lobby.starts, 2)
+        manager.restarted_at['lobby'] = 0
+        manager.sample()
+        self.assertEqual(lobby.starts, 3)
+
+    def test_sample_looped_file(self):
+        """Test a video file stands in for a camera and is sampled once per frame"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'clip.avi')
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (64, 48))
+            for i in range(5):
+                writer.write(np.full((48, 64, 3), i * 40, dtype=np.uint8))
+            writer.release()
+
+            manager = StreamManager()
+            manager.add('demo', path)
+            manager.start_all()
+            try:
+                batch = []
+                deadline = time.time() + 5
+                while not batch and time.time() < deadline:
+                    batch = manager.sample()
+                    time.sleep(0.01)
+                self.assertEqual(len(batch), 1)
+                name, frame_id, frame, is_device = batch[0]
+                self.assertEqual(name, 'demo')
+                self.assertFalse(is_device)
+                self.assertEqual(frame.shape, (48, 64, 3))
+                self.assertEqual(manager.last_sampled['demo'], frame_id)
+            finally:
+                manager.stop_all()
+
+
+if __name__ == '__main__':
+    unittest.main()
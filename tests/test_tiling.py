@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Unit tests for sliced inference tiling and merging
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tiling import merge_tiles, nms, tile_starts, tile_windows, touches_seam
+
+
+class TestTiling(unittest.TestCase):
+    """Test cases for tile layout and cross-tile NMS"""
+
+    def test_tiles_cover_frame_with_overlap(self):
+        """Test tiles overlap, end flush with the frame and never exceed it"""
+        self.assertEqual(tile_starts(1600, 640, 0.25), [0, 480, 960])
+        self.assertEqual(tile_starts(500, 640, 0.25), [0])
+
+        windows = tile_windows(1600, 900, 640, 0.25)
+        self.assertEqual(len(windows), 6)
+        self.assertEqual(windows[-1], (960, 260, 1600, 900))
+        covered = np.zeros((900, 1600), dtype=bool)
+        for x1, y1, x2, y2 in windows:
+            self.assertLessEqual(x2 - x1, 640)
+            covered[y1:y2, x1:x2] = True
+        self.assertTrue(covered.all())
+
+    def test_nms_is_class_aware(self):
+        """Test overlapping boxes only suppress boxes of the same class"""
+        boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [0, 0, 10, 10], [50, 50, 60, 60]], dtype=np.float32)
+        scores = np.array([0.6, 0.9, 0.8, 0.5])
+        classes = np.array([0, 0, 1, 0])
+        self.assertEqual(nms(boxes, scores, classes, 0.5).tolist(), [1, 2, 3])
+        self.assertEqual(len(nms(np.empty((0, 4)), np.empty(0), np.empty(0))), 0)
+
+    def test_seam_mask(self):
+        """Test only box edges on a tile edge inside the frame count as a seam"""
+        boxes = [[600, 100, 640, 200], [0, 100, 40, 200], [100, 100, 200, 200]]
+        self.assertEqual(touches_seam(boxes, (0, 0, 640, 640), 1120, 640).tolist(),
+                         [True, False, False])
+        self.assertEqual(touches_seam(boxes, (480, 0, 1120, 640), 1120, 640).tolist(),
+                         [False, True, False])
+
+    def test_truncated_seam_copy_merged(self):
+        """Test a box cut at a tile edge merges with the whole box from the neighbour"""
+        whole = [600, 100, 700, 200]
+        # The left tile (0-640) only sees the part of the object left of its edge
+        left = (0, 0, [0], [0.9], [[600, 100, 640, 200]], [True])
+        right = (480, 0, [0], [0.7], [[whole[0] - 480, 100, whole[2] - 480, 200]], [False])
+        elsewhere = (480, 0, [0], [0.8], [[500, 300, 540, 340]], [False])
+        class_ids, scores, boxes = merge_tiles([left, right, elsewhere, (0, 0, [], [], [])])
+
+        self.assertEqual(class_ids.tolist(), [0, 0])
+        np.testing.assert_allclose(scores, [0.9, 0.8])
+        np.testing.assert_array_equal(boxes[0], whole)
+        np.testing.assert_array_equal(boxes[1], [980, 300, 1020, 340])
+        # Without the seam mask plain IoU keeps both copies
+        self.assertEqual(len(merge_tiles([left[:5], right[:5]])[0]), 2)
+
+    def test_object_cut_by_both_tiles(self):
+        """Test an object wider than the overlap is rebuilt from both cut-off halves"""
+        left = (0, 0, [0], [0.8], [[400, 100, 640, 200]], [True])
+        right = (480, 0, [0], [0.9], [[0, 100, 240, 200]], [True])
+        class_ids, scores, boxes = merge_tiles([left, right])
+        np.testing.assert_allclose(scores, [0.9])
+        np.testing.assert_array_equal(boxes[0], [400, 100, 720, 200])
+
+    def test_nested_box_away_from_seams_kept(self):
+        """Test a small object inside a larger one of the same class is not merged away"""
+        tile = (0, 0, [0, 0], [0.9, 0.8], [[100, 100, 300, 400], [150, 120, 200, 180]], [False, False])
+        class_ids, scores, boxes = merge_tiles([tile])
+        self.assertEqual(len(class_ids), 2)
+
+    def test_nothing_detected(self):
+        class_ids, scores, boxes = merge_tiles([(0, 0, [], [], [])])
+        self.assertEqual(boxes.shape, (0, 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Unit tests for frame association and track-level events
+"""
+
+import unittest
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tracking import EventAggregator, IdentityTracker, box_iou
+
+
+def detection(class_name, bbox, confidence=0.8):
+    return {'class': class_name, 'confidence': confidence, 'bbox': bbox}
+
+
+class TestTracking(unittest.TestCase):
+    """Test cases for identity tracking and event aggregation"""
+
+    def test_box_iou(self):
+        self.assertAlmostEqual(box_iou([0, 0, 10, 10], [5, 0, 15, 10]), 1 / 3)
+        self.assertEqual(box_iou([0, 0, 10, 10], [20, 20, 30, 30]), 0.0)
+
+    def test_identity_survives_short_dropout(self):
+        """Test a track keeps its id across missing frames up to max_missing"""
+        tracker = IdentityTracker(max_missing=1)
+        first = tracker.update([detection('person', [0, 0, 10, 10])])[0][0]
+        tracker.update([])
+        self.assertEqual(tracker.update([detection('person', [1, 0, 11, 10])])[0][0], first)
+
+    def test_one_event_per_appearance(self):
+        """Test a lingering object becomes a single event flushed when it leaves"""
+        aggregator = EventAggregator(max_missing=2, trajectory_interval=1.0)
+        finished = []
+        for second in range(10):
+            box = [second, 0, second + 50, 100]
+            finished += aggregator.update([detection('person', box, 0.5 + second / 100)], now=second)
+        self.assertEqual(finished, [])
+
+        for second in range(10, 13):
+            finished += aggregator.update([], now=second)
+        self.assertEqual(len(finished), 1)
+
+        event = finished[0]
+        self.assertEqual((event['first_seen'], event['last_seen']), (0, 9))
+        self.assertEqual(event['frames'], 10)
+        self.assertAlmostEqual(event['peak_confidence'], 0.59)
+        self.assertEqual(len(event['trajectory']), 10)
+        self.assertEqual(event['trajectory'][-1], [9, 9, 0, 59, 100])
+
+    def test_flush_closes_open_events(self):
+        aggregator = EventAggregator()
+        aggregator.update([detection('car', [0, 0, 10, 10]), detection('person', [50, 50, 60, 60])], now=0)
+        self.assertEqual(sorted(event['class'] for event in aggregator.flush()), ['car', 'person'])
+        self.assertEqual(aggregator.events, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
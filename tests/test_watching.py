@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the watch-folder daemon
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from detections import Detections
+from tests.helpers import StubDetectionSystem, create_db
+from watching import Debouncer, InotifyWatcher, PollingWatcher
+
+EXTENSIONS = ('.jpg', '.png')
+
+
+def write_image(path, value=128):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    cv2.imwrite(path, np.full((32, 48, 3), value, dtype=np.uint8))
+
+
+class RecordingSystem(StubDetectionSystem):
+    """Records each batch and stops the daemon once enough files are stored"""
+
+    def __init__(self, conn, expected, stop):
+        super().__init__(conn)
+        self.expected = expected
+        self.stop = stop
+        self.batches = []
+        self.stored = []
+
+    def detect_many(self, frames, conf_threshold=0.5):
+        self.batches.append(len(frames))
+        return [Detections([0], [0.9], [[0, 0, 10, 10]]) for _ in frames]
+
+    def store_frame(self, detections, source='webcam'):
+        self.stored.append(os.path.basename(source))
+        if len(self.stored) >= self.expected:
+            self.stop.set()
+
+
+class TestWatching(unittest.TestCase):
+    """Test cases for change detection, debouncing and batched ingestion"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_debouncer_waits_for_stable_files(self):
+        path = os.path.join(self.root, 'a.jpg')
+        with open(path, 'wb') as f:
+            f.write(b'partial')
+        debouncer = Debouncer(settle=1.0)
+        debouncer.add(path)
+        self.assertEqual(debouncer.ready(now=0.0), [])
+
+        # Still being written: the settle timer restarts
+        with open(path, 'ab') as f:
+            f.write(b' more')
+        self.assertEqual(debouncer.ready(now=0.8), [])
+        self.assertEqual(debouncer.ready(now=1.5), [])
+        ready = debouncer.ready(now=1.9)
+        self.assertEqual([entry[0] for entry in ready], [path])
+        self.assertEqual(len(debouncer), 0)
+
+        # Files deleted before settling are dropped
+        debouncer.add(os.path.join(self.root, 'gone.jpg'))
+        self.assertEqual(debouncer.ready(now=5.0), [])
+        self.assertEqual(len(debouncer), 0)
+
+    def test_polling_watcher(self):
+        write_image(os.path.join(self.root, 'old.jpg'))
+        watcher = PollingWatcher(self.root, EXTENSIONS, interval=0.01)
+        write_image(os.path.join(self.root, 'sub', 'new.png'))
+        with open(os.path.join(self.root, 'ignored.txt'), 'w') as f:
+            f.write('x')
+        changed = watcher.changes(timeout=1.0)
+        self.assertEqual([os.path.basename(path) for path in changed], ['new.png'])
+        self.assertEqual(watcher.changes(timeout=1.0), [])
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'inotify is Linux only')
+    def test_inotify_watcher(self):
+        watcher = InotifyWatcher(self.root, EXTENSIONS)
+        try:
+            write_image(os.path.join(self.root, 'a.jpg'))
+            os.makedirs(os.path.join(self.root, 'sub'))
+            seen = set()
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline and 'b.jpg' not in seen:
+                seen.update(os.path.basename(path) for path in watcher.changes(0.1))
+                if 'a.jpg' in seen and len(watcher.watches) == 2 and not os.path.exists(
+                        os.path.join(self.root, 'sub', 'b.jpg')):
+                    # The new subdirectory is watched, so files written into it are seen
+                    write_image(os.path.join(self.root, 'sub', 'b.jpg'))
+            self.assertEqual(seen, {'a.jpg', 'b.jpg'})
+        finally:
+            watcher.close()
+
+    def test_watch_directory_ingests_backlog_and_new_files(self):
+        write_image(os.path.join(self.root, 'a.jpg'))
+        write_image(os.path.join(self.root, 'b.jpg'))
+        with open(os.path.join(self.root, 'broken.jpg'), 'wb') as f:
+            f.write(b'not an image')
+
+        conn = create_db()
+        stop = threading.Event()
+        detector = RecordingSystem(conn, expected=3, stop=stop)
+        timer = threading.Timer(0.3, write_image, (os.path.join(self.root, 'late', 'c.jpg'),))
+        timer.start()
+        watchdog = threading.Timer(10, stop.set)
+        watchdog.start()
+        try:
+            summary = detector.watch_directory(self.root, batch_size=2, settle=0.05,
+                                               poll_interval=0.05, stop=stop)
+        finally:
+            timer.cancel()
+            watchdog.cancel()
+
+        self.assertEqual(sorted(detector.stored), ['a.jpg', 'b.jpg', 'c.jpg'])
+        self.assertTrue(all(size <= 2 for size in detector.batches))
+        self.assertEqual(summary['processed'], 4)
+        recorded = conn.execute('SELECT COUNT(*) FROM processed_files').fetchone()[0]
+        self.assertEqual(recorded, 4)
+
+        # A restart finds nothing left to do
+        stop = threading.Event()
+        stop.set()
+        restarted = RecordingSystem(conn, expected=1, stop=stop)
+        restarted.watch_directory(self.root, stop=stop)
+        self.assertEqual(restarted.stored, [])
+        conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()